@@ -20,6 +20,7 @@ import logging
 import io
 import json
 import re
+from collections import defaultdict
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from enum import Enum
@@ -46,6 +47,10 @@ except ImportError:
 # Azure File Storage directory for underwriting submissions
 STORAGE_DIRECTORY = "underwriting_submissions"
 
+# Separators that vary between extracted search text and the PDF text layer
+# (e.g. "$1,250,000" vs "$1250000", "POL-123" vs "POL 123")
+SEARCH_SEPARATOR_PATTERN = re.compile(r'[\s,\-]+')
+
 
 class DocumentType(Enum):
     ACORD_125 = "ACORD 125 - Commercial Insurance Application"
@@ -180,8 +185,7 @@ class ApexIntakeAgent(BasicAgent):
                 # Convert to base64
                 buffer = io.BytesIO()
                 img.save(buffer, format="PNG", optimize=True)
-                buffer.seek(0)
-                img_base64 = base64.b64encode(buffer.read()).decode('utf-8')
+                img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
                 images.append(img_base64)
 
             doc.close()
@@ -526,6 +530,22 @@ Underwriting Team
         "risk": (0.8, 1, 0.6),         # Light lime
     }
 
+    # Fixed colors for report headers and status boxes
+    _HEADER_COLOR = (0.1, 0.2, 0.4)
+    _SECTION_HEADER_COLOR = (0.2, 0.3, 0.5)
+    _ALERT_HEADER_STROKE = (0.7, 0, 0)
+    _ALERT_HEADER_FILL = (0.8, 0.1, 0.1)
+    _STATS_STROKE = (0.9, 0.9, 0.9)
+    _STATS_FILL = (0.95, 0.95, 0.95)
+    _ALERT_STROKE = (1, 0.9, 0.9)
+    _ALERT_FILL = (1, 0.95, 0.95)
+    _OK_STROKE = (0.9, 1, 0.9)
+    _OK_FILL = (0.95, 1, 0.95)
+    _BADGE_COLOR = (0.8, 0, 0)
+
+    # Maximum rows shown per category on the extraction summary page
+    SUMMARY_ITEMS_PER_CATEGORY = 10
+
     def _generate_intake_report(self, submission_folder: str) -> str:
         """
         Generate a consolidated intake report PDF with clickable links to highlighted source locations.
@@ -633,7 +653,7 @@ Report saved to Azure File Storage: `{storage_path}/{output_filename}`"""
             source_doc = fitz.open(stream=doc_bytes, filetype="pdf")
             source_docs.append((filename, doc_type, source_doc))
 
-            doc_data = self._extract_with_locations_for_report(source_doc, doc_type, filename)
+            doc_data = self._extract_with_locations_for_report(doc_bytes, doc_type, filename)
             all_doc_data.append(doc_data)
 
             logging.info(f"Found {len(doc_data.get('extractions', []))} extractions, {len(doc_data.get('missing_required', []))} missing")
@@ -662,8 +682,16 @@ Report saved to Azure File Storage: `{storage_path}/{output_filename}`"""
         # 5. Add internal links from summary pages to highlighted locations
         links_added = self._add_report_internal_links(report_doc)
 
-        # Get report as bytes
-        report_bytes = report_doc.tobytes()
+        # Get report as bytes - garbage=4 merges the duplicate fonts/resources that
+        # per-page insert_pdf copies in, and deflate/object streams compress the rest
+        report_bytes = report_doc.tobytes(
+            garbage=4,
+            clean=True,
+            deflate=True,
+            deflate_images=True,
+            deflate_fonts=True,
+            use_objstms=1
+        )
 
         # Close all documents
         for _, _, source_doc in source_docs:
@@ -678,9 +706,10 @@ Report saved to Azure File Storage: `{storage_path}/{output_filename}`"""
             "internal_links": links_added
         }
 
-    def _extract_with_locations_for_report(self, doc: fitz.Document, doc_type: str, doc_name: str) -> Dict:
+    def _extract_with_locations_for_report(self, doc_bytes: bytes, doc_type: str, doc_name: str) -> Dict:
         """Extract data with GPT vision for the report, including search text for highlighting."""
-        images = self._pdf_to_base64_images(doc.tobytes())
+        # Render from the original bytes rather than re-serializing the opened document
+        images = self._pdf_to_base64_images(doc_bytes)
 
         prompt = f"""Analyze this {doc_type} and extract data in STRUCTURED JSON format.
 
@@ -733,9 +762,26 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
             logging.error(f"Error extracting with locations: {e}")
             return {"document_name": doc_name, "extractions": [], "missing_required": []}
 
+    @staticmethod
+    def _compile_search_pattern(search_text: str) -> Optional[re.Pattern]:
+        """Compile search text into a pattern tolerant of spacing, comma and hyphen variants."""
+        tokens = [re.escape(token) for token in SEARCH_SEPARATOR_PATTERN.split(search_text) if token]
+        if not tokens:
+            return None
+        return re.compile(r'[\s,\-]*'.join(tokens), re.IGNORECASE)
+
     def _highlight_and_copy_pages_for_report(self, source_doc: fitz.Document, target_doc: fitz.Document,
                                               extractions: List[Dict], doc_name: str):
         """Copy pages with highlights and track locations for linking."""
+        # Compile each search term once per document instead of re-searching per page
+        searchable = []
+        for ext in extractions:
+            search_text = ext.get("search_text", "")
+            if search_text and len(search_text) >= 2:
+                pattern = self._compile_search_pattern(search_text)
+                if pattern:
+                    searchable.append((ext, pattern))
+
         for page_num in range(len(source_doc)):
             target_doc.insert_pdf(source_doc, from_page=page_num, to_page=page_num)
             target_page = target_doc[-1]
@@ -743,13 +789,19 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
 
             # Add document header
             header_rect = fitz.Rect(0, 0, target_page.rect.width, 30)
-            target_page.draw_rect(header_rect, color=(0.2, 0.3, 0.5), fill=(0.2, 0.3, 0.5))
+            target_page.draw_rect(header_rect, color=self._SECTION_HEADER_COLOR, fill=self._SECTION_HEADER_COLOR)
             target_page.insert_text((10, 20), f"  {doc_name} - Page {page_num + 1}",
                                    fontsize=12, fontname="helv", color=(1, 1, 1))
 
+            # Extract page text once and only call search_for on variants actually present
+            page_text = target_page.get_text("text")
+
             # Add highlights and track locations
-            for ext in extractions:
-                search_text = ext.get("search_text", "")
+            for ext, pattern in searchable:
+                variants = {" ".join(match.group(0).split()) for match in pattern.finditer(page_text)}
+                if not variants:
+                    continue
+
                 field_name = ext.get("field", "")
                 category = ext.get("category", "insured")
                 is_missing = ext.get("is_missing", False)
@@ -759,22 +811,24 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
 
                 color = self.HIGHLIGHT_COLORS.get(category, (1, 1, 0.6))
 
-                if search_text and len(search_text) >= 2:
-                    instances = target_page.search_for(search_text)
-                    for inst in instances:
-                        highlight = target_page.add_highlight_annot(inst)
-                        highlight.set_colors(stroke=color)
+                instances = []
+                for variant in variants:
+                    instances.extend(target_page.search_for(variant))
+
+                for inst in instances:
+                    highlight = target_page.add_highlight_annot(inst)
+                    highlight.set_colors(stroke=color)
 
-                        comment = f"MISSING: {field_name}" if is_missing else f"{field_name}: {ext.get('value', '')}"
-                        highlight.set_info(content=comment, title="AI Extraction")
-                        highlight.update()
+                    comment = f"MISSING: {field_name}" if is_missing else f"{field_name}: {ext.get('value', '')}"
+                    highlight.set_info(content=comment, title="AI Extraction")
+                    highlight.update()
 
-                        # Store location for linking
-                        location_key = f"{doc_name}:{field_name}"
-                        if location_key not in self.highlight_locations:
-                            self.highlight_locations[location_key] = (final_page_num, inst)
-                        if field_name and field_name not in self.highlight_locations:
-                            self.highlight_locations[field_name] = (final_page_num, inst)
+                    # Store location for linking
+                    location_key = f"{doc_name}:{field_name}"
+                    if location_key not in self.highlight_locations:
+                        self.highlight_locations[location_key] = (final_page_num, inst)
+                    if field_name and field_name not in self.highlight_locations:
+                        self.highlight_locations[field_name] = (final_page_num, inst)
 
     def _create_report_cover_page(self, doc: fitz.Document, submission_name: str, documents: List[Dict]):
         """Create cover page for the report."""
@@ -782,7 +836,7 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
 
         # Header bar
         header_rect = fitz.Rect(0, 0, 612, 80)
-        page.draw_rect(header_rect, color=(0.1, 0.2, 0.4), fill=(0.1, 0.2, 0.4))
+        page.draw_rect(header_rect, color=self._HEADER_COLOR, fill=self._HEADER_COLOR)
         page.insert_text((50, 35), "APEX UNDERWRITING INTAKE REPORT", fontsize=20, fontname="helv", color=(1, 1, 1))
         page.insert_text((50, 55), "AI-Powered Document Analysis & Gap Detection", fontsize=11, fontname="helv", color=(0.8, 0.8, 0.8))
 
@@ -796,7 +850,7 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
         # Stats box
         y += 40
         stats_rect = fitz.Rect(50, y, 300, y + 80)
-        page.draw_rect(stats_rect, color=(0.9, 0.9, 0.9), fill=(0.95, 0.95, 0.95))
+        page.draw_rect(stats_rect, color=self._STATS_STROKE, fill=self._STATS_FILL)
 
         total_extractions = sum(len(d.get("extractions", [])) for d in documents)
         total_missing = sum(len(d.get("missing_required", [])) for d in documents)
@@ -810,12 +864,12 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
         # Status indicator
         status_rect = fitz.Rect(320, y, 560, y + 80)
         if total_missing > 0:
-            page.draw_rect(status_rect, color=(1, 0.9, 0.9), fill=(1, 0.95, 0.95))
+            page.draw_rect(status_rect, color=self._ALERT_STROKE, fill=self._ALERT_FILL)
             page.insert_text((340, y + 25), "STATUS: ACTION REQUIRED", fontsize=11, fontname="helv", color=(0.8, 0, 0))
             page.insert_text((340, y + 45), f"{total_missing} missing field(s)", fontsize=10, fontname="helv", color=(0.6, 0, 0))
             page.insert_text((340, y + 60), "See Page 2 for details", fontsize=9, fontname="helv", color=(0.5, 0.5, 0.5))
         else:
-            page.draw_rect(status_rect, color=(0.9, 1, 0.9), fill=(0.95, 1, 0.95))
+            page.draw_rect(status_rect, color=self._OK_STROKE, fill=self._OK_FILL)
             page.insert_text((340, y + 25), "STATUS: COMPLETE", fontsize=11, fontname="helv", color=(0, 0.5, 0))
             page.insert_text((340, y + 45), "All required fields present", fontsize=10, fontname="helv", color=(0, 0.4, 0))
 
@@ -872,7 +926,7 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
 
         # Header
         header_rect = fitz.Rect(0, 0, 612, 50)
-        page.draw_rect(header_rect, color=(0.7, 0, 0), fill=(0.8, 0.1, 0.1))
+        page.draw_rect(header_rect, color=self._ALERT_HEADER_STROKE, fill=self._ALERT_HEADER_FILL)
         page.insert_text((50, 32), "MISSING DATA SUMMARY - ACTION REQUIRED", fontsize=16, fontname="helv", color=(1, 1, 1))
 
         y = 70
@@ -899,11 +953,11 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
                 y = 50
 
             box_rect = fitz.Rect(50, y, 560, y + 70)
-            page.draw_rect(box_rect, color=(1, 0.9, 0.9), fill=(1, 0.95, 0.95))
+            page.draw_rect(box_rect, color=self._ALERT_STROKE, fill=self._ALERT_FILL)
 
             # Number badge
             badge_rect = fitz.Rect(55, y + 5, 75, y + 25)
-            page.draw_rect(badge_rect, color=(0.8, 0, 0), fill=(0.8, 0, 0))
+            page.draw_rect(badge_rect, color=self._BADGE_COLOR, fill=self._BADGE_COLOR)
             page.insert_text((60, y + 19), str(i), fontsize=11, fontname="helv", color=(1, 1, 1))
 
             field_name = missing.get("field", "Unknown Field")
@@ -935,22 +989,19 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
         page = doc.new_page(-1, width=612, height=792)
 
         header_rect = fitz.Rect(0, 0, 612, 40)
-        page.draw_rect(header_rect, color=(0.2, 0.3, 0.5), fill=(0.2, 0.3, 0.5))
+        page.draw_rect(header_rect, color=self._SECTION_HEADER_COLOR, fill=self._SECTION_HEADER_COLOR)
         page.insert_text((50, 26), "EXTRACTION SUMMARY - Click any item to jump to source", fontsize=14, fontname="helv", color=(1, 1, 1))
 
         y = 60
 
-        # Group extractions by category
-        categories = {}
+        # Group extractions by category, keeping only the rows that get displayed
+        categories = defaultdict(list)
         for doc_info in documents:
             doc_name = doc_info.get("document_name", "Unknown")
             for ext in doc_info.get("extractions", []):
-                ext_copy = ext.copy()
-                ext_copy["source_document"] = doc_name
-                cat = ext.get("category", "other")
-                if cat not in categories:
-                    categories[cat] = []
-                categories[cat].append(ext_copy)
+                cat_items = categories[ext.get("category", "other")]
+                if len(cat_items) < self.SUMMARY_ITEMS_PER_CATEGORY:
+                    cat_items.append((ext, doc_name))
 
         category_labels = {
             "insured": "INSURED INFORMATION",
@@ -964,7 +1015,8 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
         }
 
         for cat, label in category_labels.items():
-            if cat not in categories:
+            cat_items = categories.get(cat)
+            if not cat_items:
                 continue
 
             if y > 700:
@@ -978,14 +1030,13 @@ IMPORTANT: Identify ALL missing/blank REQUIRED fields and explain their importan
             page.insert_text((55, y + 13), label, fontsize=9, fontname="helv", color=(0, 0, 0))
             y += 22
 
-            for ext in categories[cat][:10]:
+            for ext, source in cat_items:
                 if y > 750:
                     page = doc.new_page(-1, width=612, height=792)
                     y = 50
 
                 field = ext.get("field", "")
                 value = ext.get("value", "")
-                source = ext.get("source_document", "")
 
                 text = f"{field}: {value}"
                 if len(text) > 80:
@@ -1,16 +1,26 @@
 import azure.functions as func
+import asyncio
 import logging
 import json
 import os
 import importlib
+import importlib.abc
 import importlib.util
 import inspect
+import functools
 import sys
 import re
+import types
 import subprocess
+import hashlib
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from agents.basic_agent import BasicAgent
 import uuid
-from openai import AzureOpenAI, APIError as OpenAIAPIError, RateLimitError, AuthenticationError, APITimeoutError, BadRequestError
+from openai import AsyncAzureOpenAI, APIError as OpenAIAPIError, RateLimitError, AuthenticationError, APITimeoutError, BadRequestError
+from azure.core.exceptions import ClientAuthenticationError, HttpResponseError
 from azure.identity import (
     ChainedTokenCredential,
     ManagedIdentityCredential,
@@ -23,6 +33,33 @@ from utils.azure_file_storage import safe_json_loads
 from utils.storage_factory import get_storage_manager
 from utils.result import Result, Success, Failure, AgentLoadError, APIError, partition_results
 
+# orjson (optional) parses demo, agent config and tool result JSON and serializes HTTP
+# responses several times faster than stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps_bytes(data):
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps_bytes(data):
+        return json.dumps(data).encode('utf-8')
+
+# tiktoken (optional) gives exact token counts for history budgeting; without it
+# a characters/3 estimate is used
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# numpy (optional) backs the semantic response cache's similarity search
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 # =============================================================================
 # AUTO-DEPENDENCY INSTALLATION
@@ -43,21 +80,47 @@ PACKAGE_NAME_MAP = {
     'dateutil': 'python-dateutil',
 }
 
+# Reverse of PACKAGE_NAME_MAP (pip package name -> import name)
+_IMPORT_NAME_BY_PACKAGE = {package: import_name for import_name, package in PACKAGE_NAME_MAP.items()}
+
+# Patterns used on every request / agent load, compiled once
+_GUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE)
+_LABELED_GUID_RE = re.compile(r'guid[:=\s]+([0-9a-f-]{36})', re.IGNORECASE)
+_DEMO_END_OR_STEP_RE = re.compile(
+    r'DemoCompletion|Demo finished|DemoExit|Performed (\S+) and got result:.*Step (\d+) of (\d+)'
+)
+_DEMO_STATE_RE = re.compile(r'\|\|\|DEMO_STATE:([^|]+):(\d+):(\d+)\|\|\|$')
+_MISSING_PKG_RE = re.compile(r"No module named ['\"]([^'\"\.]+)")
+_CANNOT_IMPORT_RE = re.compile(r"cannot import name .+ from ['\"]([^'\"]+)")
+# Separates the formatted reply from its spoken version in model output
+VOICE_DELIMITER = "|||VOICE|||"
+# Markdown markers and emoji stripped from voice responses, then whitespace collapsed
+_VOICE_STRIP_RE = re.compile(r'\*\*|---|[`#>\u2600-\u27BF\U00010000-\U0010ffff]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
 # Track packages we've already tried to install this session (avoid infinite loops)
 _install_attempted = set()
 
+# Maximum pip install runs per session, so a bad dependency can't keep triggering installs
+INSTALL_BUDGET = 10
+_install_budget = INSTALL_BUDGET
+
+# Backoff between an install and the retried import (seconds, doubled per retry, with jitter)
+IMPORT_RETRY_BASE_DELAY = 0.05
+IMPORT_RETRY_MAX_DELAY = 1.0
+
 
 def _extract_missing_package(error_message: str) -> str:
     """Extract the missing package name from an ImportError message."""
     # Pattern: "No module named 'package_name'" or "No module named 'package.submodule'"
-    match = re.search(r"No module named ['\"]([^'\"\.]+)", error_message)
+    match = _MISSING_PKG_RE.search(error_message)
     if match:
         import_name = match.group(1)
         # Map to pip package name if different
         return PACKAGE_NAME_MAP.get(import_name, import_name)
 
     # Pattern: "cannot import name 'X' from 'package'"
-    match = re.search(r"cannot import name .+ from ['\"]([^'\"]+)", error_message)
+    match = _CANNOT_IMPORT_RE.search(error_message)
     if match:
         import_name = match.group(1).split('.')[0]
         return PACKAGE_NAME_MAP.get(import_name, import_name)
@@ -65,6 +128,135 @@ def _extract_missing_package(error_message: str) -> str:
     return None
 
 
+# Long-lived pip runner. Install requests are sent as JSON lines, so repeated
+# installs in a session skip interpreter + pip startup. The worker is recycled
+# after PIP_WORKER_MAX_INSTALLS installs to bound its memory growth.
+PIP_WORKER_MAX_INSTALLS = 20
+_PIP_WORKER_SCRIPT = """
+import contextlib, io, json, sys
+from pip._internal.cli.main import main
+for line in sys.stdin:
+    packages = json.loads(line)["pkgs"]
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            rc = main(["install", *packages, "--quiet", "--disable-pip-version-check"])
+        except SystemExit as e:
+            rc = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            output.write(str(e))
+            rc = 1
+    print(json.dumps({"rc": rc, "output": output.getvalue()}), flush=True)
+"""
+
+
+class _PipWorker:
+    """
+    A persistent `python -c <pip loop>` subprocess that installs packages on request.
+    Agent loading runs in worker threads, so one request/reply exchange (and any
+    restart or kill of the process) holds _lock from start to finish.
+    """
+
+    def __init__(self):
+        self._proc = None
+        self._installs = 0
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        self._proc = subprocess.Popen(
+            [sys.executable, '-u', '-c', _PIP_WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True
+        )
+        self._installs = 0
+        if self._reader is None:
+            self._reader = ThreadPoolExecutor(max_workers=1)
+
+    def stop(self):
+        with self._lock:
+            self._stop()
+
+    def _stop(self):
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=5)
+        except Exception:
+            self._proc.kill()
+        self._proc = None
+
+    def install(self, packages: list, timeout: float):
+        """Install packages in the worker. Returns (returncode, output)."""
+        with self._lock:
+            return self._install(packages, timeout)
+
+    def _install(self, packages: list, timeout: float):
+        self._ensure_started()
+        self._proc.stdin.write(json.dumps({"pkgs": packages}) + "\n")
+        self._proc.stdin.flush()
+
+        # readline blocks, so wait on it from the reader thread to enforce the timeout
+        try:
+            line = self._reader.submit(self._proc.stdout.readline).result(timeout=timeout)
+        except FuturesTimeoutError:
+            self._proc.kill()
+            self._proc = None
+            raise subprocess.TimeoutExpired('pip install', timeout)
+
+        if not line:
+            self._proc = None
+            raise RuntimeError("pip worker exited unexpectedly")
+
+        self._installs += 1
+        if self._installs >= PIP_WORKER_MAX_INSTALLS:
+            self._stop()
+
+        reply = json.loads(line)
+        return reply["rc"], reply["output"]
+
+
+_pip_worker = _PipWorker()
+
+
+def _run_pip_install(packages: list, timeout: float):
+    """
+    Run `pip install` for packages, preferring the persistent worker.
+    Falls back to a one-shot subprocess if the worker can't be used.
+    Returns (returncode, output).
+    """
+    try:
+        return _pip_worker.install(packages, timeout)
+    except subprocess.TimeoutExpired:
+        raise
+    except Exception as e:
+        logging.warning(f"pip worker unavailable, falling back to one-shot pip: {e}")
+
+    result = subprocess.run(
+        [sys.executable, '-m', 'pip', 'install', *packages, '--quiet', '--disable-pip-version-check'],
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+    return result.returncode, result.stderr
+
+
+def _evict_package_modules(package_name: str):
+    """
+    Drop a freshly installed package and all of its submodules from sys.modules,
+    so a partially imported parent (e.g. PIL when PIL.Image failed) is re-imported.
+    """
+    import_name = _IMPORT_NAME_BY_PACKAGE.get(package_name, package_name.replace('-', '_'))
+    prefix = import_name + '.'
+    for module_name in [name for name in sys.modules if name == import_name or name.startswith(prefix)]:
+        del sys.modules[module_name]
+
+
 def auto_install_package(package_name: str) -> bool:
     """
     Attempt to install a package using pip.
@@ -80,34 +272,52 @@ def auto_install_package(package_name: str) -> bool:
         logging.warning(f"Already attempted to install {package_name} this session, skipping")
         return False
 
-    _install_attempted.add(package_name)
+    return auto_install_packages([package_name])
+
+
+def auto_install_packages(package_names) -> bool:
+    """
+    Attempt to install several packages with a single pip invocation.
+    Returns True if installation succeeded, False otherwise.
+
+    pip's interpreter startup and resolver cost is paid once for the whole
+    batch instead of once per missing package.
+    """
+    global _install_budget
+
+    pending = sorted({name for name in package_names if name and name not in _install_attempted})
+    if not pending:
+        return False
+
+    if _install_budget <= 0:
+        logging.warning(f"Auto-install budget exhausted this session, not installing {', '.join(pending)}")
+        return False
+
+    _install_budget -= 1
+    _install_attempted.update(pending)
 
-    logging.info(f"Auto-installing missing package: {package_name}")
+    logging.info(f"Auto-installing missing package(s): {', '.join(pending)}")
     try:
-        # Use subprocess to run pip install
-        result = subprocess.run(
-            [sys.executable, '-m', 'pip', 'install', package_name, '--quiet', '--disable-pip-version-check'],
-            capture_output=True,
-            text=True,
-            timeout=120  # 2 minute timeout
-        )
+        returncode, output = _run_pip_install(pending, timeout=120 * max(1, len(pending) // 4))  # 2 minutes per 4 packages
 
-        if result.returncode == 0:
-            logging.info(f"Successfully auto-installed: {package_name}")
+        if returncode == 0:
+            logging.info(f"Successfully auto-installed: {', '.join(pending)}")
             # Clear the module cache to allow re-import
-            if package_name in sys.modules:
-                del sys.modules[package_name]
+            importlib.invalidate_caches()
+            for package_name in pending:
+                _evict_package_modules(package_name)
             return True
         else:
-            logging.error(f"Failed to install {package_name}: {result.stderr}")
-            return False
-
+            logging.error(f"Failed to install {', '.join(pending)}: {output}")
     except subprocess.TimeoutExpired:
-        logging.error(f"Timeout installing {package_name}")
-        return False
+        logging.error(f"Timeout installing {', '.join(pending)}")
     except Exception as e:
-        logging.error(f"Error installing {package_name}: {e}")
-        return False
+        logging.error(f"Error installing {', '.join(pending)}: {e}")
+
+    # One bad package fails the whole batch - allow per-package retries to isolate it
+    if len(pending) > 1:
+        _install_attempted.difference_update(pending)
+    return False
 
 
 def _try_import_with_auto_install(import_func, max_retries: int = 2):
@@ -126,6 +336,7 @@ def _try_import_with_auto_install(import_func, max_retries: int = 2):
         ImportError: If import fails after all retries
     """
     last_error = None
+    delay = IMPORT_RETRY_BASE_DELAY
 
     for attempt in range(max_retries + 1):
         try:
@@ -139,6 +350,9 @@ def _try_import_with_auto_install(import_func, max_retries: int = 2):
                 package_name = _extract_missing_package(error_msg)
                 if package_name and auto_install_package(package_name):
                     logging.info(f"Retrying import after installing {package_name}")
+                    # Give the filesystem a moment to settle; jitter avoids lockstep retries
+                    time.sleep(delay + random.random() * delay)
+                    delay = min(delay * 2, IMPORT_RETRY_MAX_DELAY)
                     continue
 
             # If we get here, either no package found or install failed
@@ -170,6 +384,18 @@ def _try_import_with_auto_install(import_func, max_retries: int = 2):
 # This default exists solely for anonymous/unauthenticated sessions.
 DEFAULT_USER_GUID = "c0p110t0-aaaa-bbbb-cccc-123456789abc"
 
+# Parsed demo definitions from the 'demos' storage folder, shared across requests.
+# check_demo_trigger runs on every message, so the listing and JSON parsing are
+# only redone once the index is older than DEMO_INDEX_TTL_SECONDS.
+DEMO_INDEX_TTL_SECONDS = 60
+_demo_index = {}  # demo_name -> demo_data
+_demo_trigger_lookup = {}  # normalized trigger phrase -> demo_name
+_demo_index_built_at = None
+
+def _clean_voice_text(text):
+    """Strip markdown and emoji from text meant to be spoken, collapsing whitespace."""
+    return _WHITESPACE_RE.sub(' ', _VOICE_STRIP_RE.sub('', text)).strip()
+
 def ensure_string_content(message):
     """
     Ensures message content is converted to a string regardless of input type.
@@ -183,22 +409,22 @@ def ensure_string_content(message):
         # Convert whatever we have to string
         return {"role": "user", "content": str(message) if message is not None else ""}
     
+    content = message.get('content')
+
+    # Already well-formed (the common case) - nothing to convert, so no copy needed
+    if type(content) is str and 'role' in message:
+        return message
+
     # Create a copy to avoid modifying the original
     message = message.copy()
-    
+
     # Ensure we have a role
     if 'role' not in message:
         message['role'] = 'user'
-    
-    # Handle content - check if it exists and is not None
-    if 'content' in message:
-        content = message['content']
-        # Convert to string, handling None case
-        message['content'] = str(content) if content is not None else ''
-    else:
-        # No content key at all
-        message['content'] = ''
-    
+
+    # Convert content to string, handling missing and None content
+    message['content'] = '' if content is None else str(content)
+
     return message
 
 def ensure_string_function_args(function_call):
@@ -221,10 +447,12 @@ def ensure_string_function_args(function_call):
     
     return str(function_call.arguments)
 
+@functools.lru_cache(maxsize=128)
 def build_cors_response(origin):
     """
     Builds CORS response headers.
     Safely handles None origin.
+    Cached per origin - callers must not mutate the returned dict.
     """
     return {
         "Access-Control-Allow-Origin": str(origin) if origin else "*",
@@ -234,20 +462,30 @@ def build_cors_response(origin):
         "Access-Control-Max-Age": "86400",
     }
 
-def _load_single_agent_local(file: str) -> Result[BasicAgent, AgentLoadError]:
+def _cached_import_module(name: str):
+    """Return an already-imported module from sys.modules, importing it only on a miss."""
+    modules = sys.modules
+    module = modules.get(name)
+    if module is not None:
+        return module
+    return importlib.import_module(name)
+
+
+def _load_single_agent_local(file: str, auto_install: bool = True) -> Result[BasicAgent, AgentLoadError]:
     """Load a single agent from local agents/ folder. Returns Result.
 
     If loading fails due to a missing package (ImportError), automatically
-    attempts to install the package and retry loading.
+    attempts to install the package and retry loading. Pass auto_install=False
+    to report the ImportError instead so installs can be batched by the caller.
     """
     module_name = file[:-3]
 
     def do_import():
-        return importlib.import_module(f'agents.{module_name}')
+        return _cached_import_module(f'agents.{module_name}')
 
     try:
         # Use auto-install wrapper for import
-        module = _try_import_with_auto_install(do_import)
+        module = _try_import_with_auto_install(do_import) if auto_install else do_import()
 
         for name, obj in inspect.getmembers(module):
             if inspect.isclass(obj) and issubclass(obj, BasicAgent) and obj is not BasicAgent:
@@ -258,127 +496,202 @@ def _load_single_agent_local(file: str) -> Result[BasicAgent, AgentLoadError]:
         return Failure(AgentLoadError(file, 'local', 'syntax', str(e)))
     except ImportError as e:
         # ImportError after auto-install attempts failed
-        return Failure(AgentLoadError(file, 'local', 'import', f'{str(e)} (auto-install attempted)'))
+        suffix = ' (auto-install attempted)' if auto_install else ''
+        return Failure(AgentLoadError(file, 'local', 'import', f'{str(e)}{suffix}'))
     except Exception as e:
         return Failure(AgentLoadError(file, 'local', 'instantiation', str(e)))
 
 
-def _load_single_agent_azure(file_name: str, file_content: str, source: str) -> Result[BasicAgent, AgentLoadError]:
+# Modules loaded from Azure storage content: (source, file_name) -> (sha1 of content, module)
+_azure_module_cache = {}
+
+# Compiled agent source: (sha1 of content, file_name) -> code object
+_azure_code_cache = {}
+
+
+class _InMemorySourceLoader(importlib.abc.Loader):
+    """Loader that executes an already-compiled code object, so agent source never touches disk."""
+
+    def __init__(self, code):
+        self._code = code
+
+    def create_module(self, spec):
+        return None  # Use the default module creation
+
+    def exec_module(self, module):
+        exec(self._code, module.__dict__)
+
+
+def _load_single_agent_azure(file_name: str, file_content: str, source: str,
+                             auto_install: bool = True) -> Result[BasicAgent, AgentLoadError]:
     """Load a single agent from Azure storage content. Returns Result.
 
+    The module is built straight from the downloaded source; no temp file is written.
+
     If loading fails due to a missing package (ImportError), automatically
-    attempts to install the package and retry loading.
+    attempts to install the package and retry loading. Pass auto_install=False
+    to report the ImportError instead so installs can be batched by the caller.
     """
-    temp_dir = f"/tmp/{source}"
-    temp_file = f"{temp_dir}/{file_name}"
     module_name = file_name[:-3]
+    full_name = f"multi_agents.{module_name}" if source == 'multi_agents' else module_name
+    origin = f"/tmp/{source}/{file_name}"  # Reported as __file__ and in tracebacks
+
+    content_bytes = file_content.encode('utf-8') if isinstance(file_content, str) else file_content
+    content_hash = hashlib.sha1(content_bytes).hexdigest()
+    cache_key = (source, file_name)
 
     def do_load_module():
         """Inner function that handles module loading - can be retried after auto-install."""
-        os.makedirs(temp_dir, exist_ok=True)
-        with open(temp_file, 'w') as f:
-            f.write(file_content)
+        code_key = (content_hash, file_name)
+        code = _azure_code_cache.get(code_key)
+        if code is None:
+            code = compile(content_bytes, origin, 'exec')
+            _azure_code_cache[code_key] = code
 
-        if temp_dir not in sys.path:
-            sys.path.append(temp_dir)
+        spec = importlib.util.spec_from_loader(full_name, _InMemorySourceLoader(code), origin=origin)
+        spec.has_location = True
+        module = importlib.util.module_from_spec(spec)
 
         # For multi_agents, set up package structure
         if source == 'multi_agents':
-            parent_dir = "/tmp"
-            if parent_dir not in sys.path:
-                sys.path.append(parent_dir)
-            import types
             if 'multi_agents' not in sys.modules:
-                multi_agents_module = types.ModuleType('multi_agents')
-                sys.modules['multi_agents'] = multi_agents_module
-            spec = importlib.util.spec_from_file_location(f"multi_agents.{module_name}", temp_file)
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[f"multi_agents.{module_name}"] = module
-        else:
-            spec = importlib.util.spec_from_file_location(module_name, temp_file)
-            module = importlib.util.module_from_spec(spec)
+                sys.modules['multi_agents'] = types.ModuleType('multi_agents')
+            sys.modules[full_name] = module
 
         spec.loader.exec_module(module)
         return module
 
     try:
-        # Use auto-install wrapper for module loading
-        module = _try_import_with_auto_install(do_load_module)
+        cached = _azure_module_cache.get(cache_key)
+        if cached is not None and cached[0] == content_hash:
+            # Unchanged since the last load - reuse the module, skip the exec
+            module = cached[1]
+        else:
+            # Use auto-install wrapper for module loading
+            module = _try_import_with_auto_install(do_load_module) if auto_install else do_load_module()
+            _azure_module_cache[cache_key] = (content_hash, module)
 
         for name, obj in inspect.getmembers(module):
             if inspect.isclass(obj) and issubclass(obj, BasicAgent) and obj is not BasicAgent:
                 agent_instance = obj()
-                os.remove(temp_file)
+                # Storage file it came from, matched against a GUID's enabled_agents.json
+                agent_instance._agent_file = file_name
                 return Success(agent_instance)
 
-        os.remove(temp_file)
         return Failure(AgentLoadError(file_name, source, 'no_class', 'No BasicAgent subclass found'))
 
     except SyntaxError as e:
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
         return Failure(AgentLoadError(file_name, source, 'syntax', str(e)))
     except ImportError as e:
         # ImportError after auto-install attempts failed
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-        return Failure(AgentLoadError(file_name, source, 'import', f'{str(e)} (auto-install attempted)'))
+        suffix = ' (auto-install attempted)' if auto_install else ''
+        return Failure(AgentLoadError(file_name, source, 'import', f'{str(e)}{suffix}'))
     except Exception as e:
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
         return Failure(AgentLoadError(file_name, source, 'instantiation', str(e)))
 
 
+# File name suffix for agents stored in Azure File Storage
+AGENT_FILE_SUFFIX = '_agent.py'
+
+# Python files in the local agents/ folder that are not agents
+_NON_AGENT_FILES = frozenset(("__init__.py", "basic_agent.py"))
+
+# Concurrent downloads when fetching agent source files from Azure File Storage
+AGENT_DOWNLOAD_WORKERS = 8
+
+
+def _read_files_parallel(storage_manager, directory_name: str, file_names: list) -> list:
+    """
+    Download files from storage concurrently.
+    Returns (file_name, content) pairs in input order; content is None if the read failed.
+    """
+    def read_one(file_name):
+        try:
+            return storage_manager.read_file(directory_name, file_name)
+        except Exception as e:
+            logging.error(f"Error reading {directory_name}/{file_name}: {str(e)}")
+            return None
+
+    if not file_names:
+        return []
+    with ThreadPoolExecutor(max_workers=min(AGENT_DOWNLOAD_WORKERS, len(file_names))) as executor:
+        return list(zip(file_names, executor.map(read_one, file_names)))
+
+
+def load_user_specific_agents(user_guid, storage_manager=None):
+    """
+    Return the Azure agent file names enabled for user_guid, or None when every agent is enabled
+    (no GUID, or no readable agent_config/<guid>/enabled_agents.json).
+    """
+    if not user_guid:
+        return None
+    try:
+        agent_config_content = (storage_manager or get_storage_manager()).read_file(
+            f"agent_config/{user_guid}", 'enabled_agents.json'
+        )
+        if agent_config_content:
+            # frozenset for O(1) membership checks while filtering storage listings
+            return frozenset(_json_loads(agent_config_content))
+    except Exception as e:
+        logging.info(f"No agent config found for GUID {user_guid}, loading all agents: {str(e)}")
+    return None
+
+
 def load_agents_from_folder(user_guid=None):
     """
     Load agents from local folder and Azure storage.
     Uses Result type to track all failures and log a summary.
     """
     agents_directory = os.path.join(os.path.dirname(__file__), "agents")
-    files_in_agents_directory = os.listdir(agents_directory)
-    agent_files = [f for f in files_in_agents_directory if f.endswith(".py") and f not in ["__init__.py", "basic_agent.py"]]
+    with os.scandir(agents_directory) as entries:
+        agent_files = [
+            entry.name for entry in entries
+            if entry.name.endswith(".py") and entry.name not in _NON_AGENT_FILES and entry.is_file()
+        ]
 
     declared_agents = {}
     all_errors: list[AgentLoadError] = []
-
-    # Load local agents
-    for file in agent_files:
-        result = _load_single_agent_local(file)
-        if result.is_success:
-            declared_agents[result.value.name] = result.value
-        else:
-            all_errors.append(result.error)
+    # Loads that failed on a missing package: (error, loader, args), retried after one batched install
+    deferred_imports = []
 
     storage_manager = get_storage_manager()
 
+    # Start the network-bound storage listings while local agents load on this thread
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        agents_listing = executor.submit(storage_manager.list_files, 'agents')
+        multi_agents_listing = executor.submit(storage_manager.list_files, 'multi_agents')
+        enabled_agents_read = executor.submit(load_user_specific_agents, user_guid, storage_manager)
+
+        # Load local agents
+        for file in agent_files:
+            result = _load_single_agent_local(file, auto_install=False)
+            if result.is_success:
+                declared_agents[result.value.name] = result.value
+            elif result.error.error_type == 'import':
+                deferred_imports.append((result.error, _load_single_agent_local, (file,)))
+            else:
+                all_errors.append(result.error)
+
     # Load enabled agents list for this GUID
-    enabled_agents = None
-    if user_guid:
-        try:
-            agent_config_path = f"agent_config/{user_guid}"
-            agent_config_content = storage_manager.read_file(agent_config_path, 'enabled_agents.json')
-            if agent_config_content:
-                enabled_agents = json.loads(agent_config_content)
-        except Exception as e:
-            logging.info(f"No agent config found for GUID {user_guid}, loading all agents: {str(e)}")
+    enabled_agents = enabled_agents_read.result()
 
     # Load agents from Azure 'agents' folder
     try:
-        azure_agent_files = storage_manager.list_files('agents')
-        for file in azure_agent_files:
-            if not file.name.endswith('_agent.py'):
-                continue
-            if enabled_agents is not None and file.name not in enabled_agents:
-                continue
-
-            file_content = storage_manager.read_file('agents', file.name)
+        azure_agent_files = [
+            file.name for file in agents_listing.result()
+            if file.name.endswith(AGENT_FILE_SUFFIX) and (enabled_agents is None or file.name in enabled_agents)
+        ]
+        # Downloads run in parallel; module loading stays on this thread (it mutates sys.modules)
+        for file_name, file_content in _read_files_parallel(storage_manager, 'agents', azure_agent_files):
             if file_content is None:
-                all_errors.append(AgentLoadError(file.name, 'azure', 'file_read', 'Could not read file content'))
+                all_errors.append(AgentLoadError(file_name, 'azure', 'file_read', 'Could not read file content'))
                 continue
 
-            result = _load_single_agent_azure(file.name, file_content, 'agents')
+            result = _load_single_agent_azure(file_name, file_content, 'agents', auto_install=False)
             if result.is_success:
                 declared_agents[result.value.name] = result.value
+            elif result.error.error_type == 'import':
+                deferred_imports.append((result.error, _load_single_agent_azure, (file_name, file_content, 'agents')))
             else:
                 all_errors.append(result.error)
 
@@ -387,28 +700,37 @@ def load_agents_from_folder(user_guid=None):
 
     # Load multi-agents from Azure 'multi_agents' folder
     try:
-        multi_agent_files = storage_manager.list_files('multi_agents')
-        for file in multi_agent_files:
-            if not file.name.endswith('_agent.py'):
-                continue
-            if enabled_agents is not None and file.name not in enabled_agents:
-                continue
-
-            file_content = storage_manager.read_file('multi_agents', file.name)
+        multi_agent_files = [
+            file.name for file in multi_agents_listing.result()
+            if file.name.endswith(AGENT_FILE_SUFFIX) and (enabled_agents is None or file.name in enabled_agents)
+        ]
+        for file_name, file_content in _read_files_parallel(storage_manager, 'multi_agents', multi_agent_files):
             if file_content is None:
-                all_errors.append(AgentLoadError(file.name, 'multi_agents', 'file_read', 'Could not read file content'))
+                all_errors.append(AgentLoadError(file_name, 'multi_agents', 'file_read', 'Could not read file content'))
                 continue
 
-            result = _load_single_agent_azure(file.name, file_content, 'multi_agents')
+            result = _load_single_agent_azure(file_name, file_content, 'multi_agents', auto_install=False)
             if result.is_success:
                 declared_agents[result.value.name] = result.value
                 logging.info(f"Loaded multi-agent: {result.value.name}")
+            elif result.error.error_type == 'import':
+                deferred_imports.append((result.error, _load_single_agent_azure, (file_name, file_content, 'multi_agents')))
             else:
                 all_errors.append(result.error)
 
     except Exception as e:
         logging.error(f"Error listing multi-agents from Azure File Share: {str(e)}")
 
+    # Install every missing package in one pip call, then retry the failed loads
+    if deferred_imports:
+        auto_install_packages(_extract_missing_package(error.message) for error, _, _ in deferred_imports)
+        for _, loader, args in deferred_imports:
+            result = loader(*args)
+            if result.is_success:
+                declared_agents[result.value.name] = result.value
+            else:
+                all_errors.append(result.error)
+
     # Log summary of all errors (not hidden in individual try/catch blocks)
     if all_errors:
         logging.warning(f"Agent loading completed with {len(all_errors)} error(s):")
@@ -418,54 +740,488 @@ def load_agents_from_folder(user_guid=None):
     logging.info(f"Successfully loaded {len(declared_agents)} agent(s): {list(declared_agents.keys())}")
     return declared_agents
 
+def _demo_state_payload(demo_name, step=0, total_steps=0):
+    """Demo state returned to clients, who echo it back as demo_state on the next request."""
+    return {"active_demo": demo_name, "step": step if demo_name else 0, "total_steps": total_steps if demo_name else 0}
+
+def _demo_state_sentinel(demo_name, step, total_steps):
+    """Trailer appended to demo step logs so the next turn can read demo state from the last message."""
+    return f" |||DEMO_STATE:{demo_name}:{step}:{total_steps}|||"
+
+
+def _agent_tool_dict(agent):
+    """
+    Return the tools-API wrapper dict for an agent, built once and kept on the agent.
+    Rebuilt only if the agent's metadata object has been replaced.
+    """
+    tool = getattr(agent, '_tool_dict', None)
+    if tool is None or tool["function"] is not agent.metadata:
+        tool = {"type": "function", "function": agent.metadata}
+        agent._tool_dict = tool
+    return tool
+
+
+# Recently loaded context memory, shared across requests:
+# user_guid -> (shared_memory, user_memory, loaded_at), oldest first. Request GUIDs are
+# caller-supplied, so entries are dropped once expired and the cache holds at most
+# MEMORY_CACHE_SIZE of them.
+MEMORY_CACHE_TTL_SECONDS = 30
+MEMORY_CACHE_SIZE = 256
+_memory_cache = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+
+def _cache_memory(user_guid, shared_memory, user_memory):
+    """Store a GUID's recalled memory, dropping expired entries and anything over MEMORY_CACHE_SIZE."""
+    now = time.monotonic()
+    with _memory_cache_lock:
+        _memory_cache[user_guid] = (shared_memory, user_memory, now)
+        _memory_cache.move_to_end(user_guid)
+        while _memory_cache and (
+            len(_memory_cache) > MEMORY_CACHE_SIZE
+            or now - next(iter(_memory_cache.values()))[2] >= MEMORY_CACHE_TTL_SECONDS
+        ):
+            _memory_cache.popitem(last=False)
+
+# Conversation history sent to the model is capped at HISTORY_TOKEN_BUDGET tokens.
+# Groups with the least importance per token are dropped first (oldest first on
+# ties); the first group and the most recent HISTORY_KEEP_RECENT_GROUPS groups
+# are always kept.
+HISTORY_TOKEN_BUDGET = 20_000
+HISTORY_KEEP_RECENT_GROUPS = 5
+
+# Once the full history exceeds HISTORY_SUMMARY_TRIGGER_TOKENS, dropped groups are
+# summarized by a cheap model instead of being forgotten outright. Below the trigger
+# (history between HISTORY_TOKEN_BUDGET and HISTORY_SUMMARY_TRIGGER_TOKENS) dropped
+# groups are still lost with no summary; the trigger trades that for no extra model
+# call on mid-length sessions.
+# Summaries are shared across requests, keyed by a running hash over the dropped
+# messages in order. Each turn reuses the summary of the longest already-summarized
+# prefix and folds in only the messages after it, so a growing session costs one
+# small call per turn instead of re-summarizing everything dropped so far.
+HISTORY_SUMMARY_TRIGGER_TOKENS = 100_000
+HISTORY_SUMMARY_MAX_TOKENS = 400
+HISTORY_SUMMARY_CACHE_SIZE = 256
+_history_summary_cache = {}  # running sha1 of dropped messages -> summary text
+
+_HISTORY_SUMMARY_PROMPT = """Summarize the earlier part of a conversation between a user and an assistant so the assistant can continue it.
+The input may start with a summary of still earlier messages; fold it into yours.
+Be terse, roughly a tenth of the original length. Use exactly these sections:
+Intent: what the user is trying to accomplish
+Decisions: facts, choices and results established so far, including agent/tool outcomes
+Files: documents, records or identifiers referenced
+Next: open questions or pending actions"""
+
+@functools.lru_cache(maxsize=None)
+def _get_token_encoding():
+    """Return the cl100k_base encoding, or None if tiktoken is unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logging.warning(f"tiktoken encoding unavailable, estimating tokens from length: {e}")
+        return None
+
+def _count_message_tokens(message):
+    """Approximate prompt tokens for one chat message, including tool call arguments."""
+    encoding = _get_token_encoding()
+    if encoding is None:
+        return len(json.dumps(message, default=str)) // 3
+
+    text = str(message.get('content') or '')
+    for tool_call in message.get('tool_calls') or ():
+        text += str(tool_call.get('function', {}).get('arguments', ''))
+    function_call = message.get('function_call')
+    if function_call:
+        text += str(function_call.get('arguments', ''))
+    return _count_text_tokens(text)
+
+@functools.lru_cache(maxsize=4096)
+def _count_text_tokens(text):
+    """Tokens for one message's text. Cached since history is re-sent and re-counted every turn."""
+    # +4 for per-message framing tokens
+    return len(_get_token_encoding().encode(text)) + 4
+
+def _group_messages(messages):
+    """
+    Split messages into groups that must be kept or dropped together: an
+    assistant message that calls tools/functions plus the responses to it.
+    """
+    groups = []
+    pending_tool_ids = set()
+    for message in messages:
+        role = message.get('role')
+        if groups and (
+            (role == 'tool' and message.get('tool_call_id') in pending_tool_ids)
+            or (role == 'function' and groups[-1][0].get('function_call'))
+        ):
+            groups[-1].append(message)
+            continue
+
+        groups.append([message])
+        pending_tool_ids = {
+            tool_call.get('id') for tool_call in message.get('tool_calls') or ()
+        } if role == 'assistant' else set()
+    return groups
+
+def _classify_importance(message):
+    """Weight for keeping a message: tool traffic > full assistant replies > everything else."""
+    role = message.get('role')
+    if role in ('tool', 'function') or message.get('tool_calls') or message.get('function_call'):
+        return 3.0
+    if role == 'assistant' and VOICE_DELIMITER in (message.get('content') or ''):
+        return 2.0
+    return 1.0
+
+def _fit_history_to_budget(history, budget=HISTORY_TOKEN_BUDGET):
+    """
+    Drop message groups from history until it fits within budget tokens, lowest
+    importance per token first (a greedy knapsack over the droppable groups).
+    Returns (kept_messages, dropped_messages, history_tokens) where history_tokens
+    is the size of the full history before anything was dropped.
+    """
+    groups = _group_messages(history)
+    group_tokens = [sum(_count_message_tokens(message) for message in group) for group in groups]
+    total_tokens = history_tokens = sum(group_tokens)
+    if total_tokens <= budget:
+        return history, [], history_tokens
+
+    # Droppable: everything between the first group and the protected recent tail
+    droppable = range(1, len(groups) - HISTORY_KEEP_RECENT_GROUPS)
+    value_per_token = {
+        i: max(_classify_importance(message) for message in groups[i]) / max(group_tokens[i], 1)
+        for i in droppable
+    }
+    keep = [True] * len(groups)
+    for i in sorted(droppable, key=lambda i: (value_per_token[i], i)):
+        if total_tokens <= budget:
+            break
+        keep[i] = False
+        total_tokens -= group_tokens[i]
+
+    dropped = keep.count(False)
+    logging.debug(f"History over token budget: kept {len(groups) - dropped}, dropped {dropped} message group(s), ~{total_tokens} tokens remain")
+    kept_messages = [message for group, kept in zip(groups, keep) if kept for message in group]
+    dropped_messages = [message for group, kept in zip(groups, keep) if not kept for message in group]
+    return kept_messages, dropped_messages, history_tokens
+
+
+# Semantic response cache: plain (non-tool) replies are reused when a new prompt
+# embeds within SEMANTIC_CACHE_MIN_SIMILARITY of a cached one. Entries are
+# partitioned by user_guid plus a hash of everything sent before the prompt
+# (system prompt with memories, prior history), so replies never cross users
+# and memory updates naturally miss. Enabled by setting
+# AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME (e.g. a text-embedding-3-small deployment).
+SEMANTIC_CACHE_MIN_SIMILARITY = 0.92
+SEMANTIC_CACHE_TTL_SECONDS = 600
+SEMANTIC_CACHE_MAX_PARTITIONS = 512
+SEMANTIC_CACHE_MAX_ENTRIES = 32
+_semantic_cache = {}  # partition -> list of (unit vector, payload, stored_at)
+
+def _semantic_cache_partition(user_guid, messages):
+    """Hash the conversation state preceding the current prompt, scoped to user_guid."""
+    context = messages[:-1] if messages and messages[-1].get('role') == 'user' else messages
+    digest = hashlib.sha1(json.dumps(context, default=str).encode('utf-8')).hexdigest()
+    return f"{user_guid}:{digest}"
+
+def _semantic_cache_lookup(partition, vector):
+    """Return the cached payload most similar to vector, or None below the threshold."""
+    entries = _semantic_cache.get(partition)
+    if not entries:
+        return None
+
+    now = time.monotonic()
+    entries[:] = [entry for entry in entries if now - entry[2] < SEMANTIC_CACHE_TTL_SECONDS]
+    if not entries:
+        return None
+
+    # Vectors are unit length, so the dot product is the cosine similarity
+    similarities = np.stack([entry[0] for entry in entries]) @ vector
+    best = int(similarities.argmax())
+    if similarities[best] < SEMANTIC_CACHE_MIN_SIMILARITY:
+        return None
+    return entries[best][1]
+
+def _semantic_cache_store(partition, vector, payload):
+    """Remember payload for vector, evicting the oldest partition/entry when full."""
+    entries = _semantic_cache.get(partition)
+    if entries is None:
+        if len(_semantic_cache) >= SEMANTIC_CACHE_MAX_PARTITIONS:
+            _semantic_cache.pop(next(iter(_semantic_cache)))
+        entries = _semantic_cache[partition] = []
+    if len(entries) >= SEMANTIC_CACHE_MAX_ENTRIES:
+        entries.pop(0)
+    entries.append((vector, payload, time.monotonic()))
+
+
+# Agents that receive the caller's user_guid and share the storage manager's memory context
+_MEMORY_AGENTS = frozenset({'ManageMemory', 'ContextMemory'})
+
+
+# The system prompt is split so its long instruction block is byte-identical on
+# every request: message 0 holds only static text (the assistant name comes from
+# app settings), and the per-user memories follow in a second system message.
+# Azure OpenAI caches identical prompt prefixes, so the static block is billed
+# at the cached rate after the first request.
+_SYSTEM_PROMPT_PREFIX = """
+<identity>
+You are a Microsoft Copilot assistant named """
+_SYSTEM_PROMPT_SUFFIX = """, operating within Microsoft Teams.
+</identity>
+
+<context_instructions>
+- <shared_memory_output> represents common knowledge shared across all conversations
+- <specific_memory_output> represents specific context for the current conversation
+- Apply specific context with higher precedence than shared context
+- Synthesize information from both contexts for comprehensive responses
+</context_instructions>
+
+<agent_usage>
+IMPORTANT: You must be honest and accurate about agent usage:
+- NEVER pretend or imply you've executed an agent when you haven't actually called it
+- NEVER say "using my agent" unless you are actually making a function call to that agent
+- NEVER fabricate success messages about data operations that haven't occurred
+- If you need to perform an action and don't have the necessary agent, say so directly
+- When a user requests an action, either:
+  1. Call the appropriate agent and report actual results, or
+  2. Say "I don't have the capability to do that" and suggest an alternative
+  3. If no details are provided besides the request to run an agent, infer the necessary input parameters by "reading between the lines" of the conversation context so far
+- ALWAYS trust the tool schema provided - if a parameter is defined in the schema, USE IT
+- When your reply does not depend on what the agent returns (e.g. saving a memory), write the complete reply, including the |||VOICE||| part, in the same message as the agent call. Otherwise leave the message content empty and wait for the result
+</agent_usage>
+
+<project_tracker_note>
+The ProjectTracker agent supports ALL of these update fields:
+- step_notes: Object like {"1": "note for step 1", "2": "note for step 2"}
+- step_checklists: Object like {"1": {"item1": true}}
+- step_decisions: Object like {"1": "PASS", "2": "COMPLETE"}
+These ARE valid parameters. Use them when users want to save notes or decisions.
+</project_tracker_note>
+
+<response_format>
+CRITICAL: You must structure your response in TWO distinct parts separated by the delimiter |||VOICE|||
+
+1. FIRST PART (before |||VOICE|||): Your full formatted response
+   - Use **bold** for emphasis
+   - Use `code blocks` for technical content
+   - Apply --- for horizontal rules to separate sections
+   - Utilize > for important quotes or callouts
+   - Format code with ```language syntax highlighting
+   - Create numbered lists with proper indentation
+   - Add personality when appropriate
+   - Apply # ## ### headings for clear structure
+
+2. SECOND PART (after |||VOICE|||): A concise voice response
+   - Maximum 1-2 sentences
+   - Pure conversational English with NO formatting
+   - Extract only the most critical information
+   - Sound like a colleague speaking casually over a cubicle wall
+   - Be natural and conversational, not robotic
+   - Focus on the key takeaway or action item
+   - Example: "I found those Q3 sales figures - revenue's up 12 percent from last quarter." or "Sure, I'll pull up that customer data for you right now."
+
+EXAMPLE FORMAT:
+Here's the detailed analysis you requested:
+
+**Key Findings:**
+- Revenue increased by 12%
+- Customer satisfaction scores improved
+
+|||VOICE|||
+Revenue's up 12 percent and customers are happier - looking good for Q3.
+</response_format>
+"""
+
+
+_MEMORY_PROMPT_SHARED = """<shared_memory_output>
+These are memories accessible by all users of the system:
+"""
+_MEMORY_PROMPT_USER = """
+</shared_memory_output>
+
+<specific_memory_output>
+These are memories specific to the current conversation:
+"""
+_MEMORY_PROMPT_END = """
+</specific_memory_output>"""
+
+@functools.lru_cache(maxsize=None)
+def _static_system_prompt(assistant_name):
+    """The static system prompt for an assistant name, built once."""
+    return "".join((_SYSTEM_PROMPT_PREFIX, assistant_name, _SYSTEM_PROMPT_SUFFIX))
+
+
+# Upper bound on a single wait between OpenAI retries, including Retry-After values
+API_RETRY_MAX_DELAY = 60
+
+def _retry_after_seconds(error):
+    """Seconds requested by an OpenAI error response's Retry-After headers, or None."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    try:
+        retry_after_ms = headers.get('retry-after-ms')
+        if retry_after_ms is not None:
+            return float(retry_after_ms) / 1000
+        retry_after = headers.get('retry-after')
+        if retry_after is not None:
+            return float(retry_after)
+    except ValueError:
+        pass  # HTTP-date form or malformed - fall back to backoff
+    return None
+
+
+def _create_openai_client():
+    """Build the Azure OpenAI client. Priority: API Key > Entra ID (token auth)."""
+    api_key = os.environ.get('AZURE_OPENAI_API_KEY')
+
+    if api_key:
+        # Use API key authentication (simplest, works everywhere)
+        logging.info("Using API key authentication for Azure OpenAI")
+        return AsyncAzureOpenAI(
+            azure_endpoint=os.environ['AZURE_OPENAI_ENDPOINT'],
+            api_key=api_key,
+            api_version=os.environ.get('AZURE_OPENAI_API_VERSION', '2025-01-01-preview')
+        )
+    else:
+        # Use Entra ID authentication (token-based)
+        # Use optimized credential chain for faster cold starts:
+        # - ManagedIdentityCredential: Used in Azure (Function App, VM, etc.) - fastest
+        # - AzureCliCredential: Used locally after 'az login' - for development
+        if os.environ.get('WEBSITE_INSTANCE_ID'):
+            # Running in Azure - use ManagedIdentity directly (fastest)
+            credential = ManagedIdentityCredential()
+            logging.info("Using ManagedIdentityCredential for Azure deployment")
+        else:
+            # Local development - use chained credential
+            credential = ChainedTokenCredential(
+                ManagedIdentityCredential(),
+                AzureCliCredential()
+            )
+            logging.info("Using ChainedTokenCredential for local development")
+
+        token_provider = get_bearer_token_provider(
+            credential,
+            "https://cognitiveservices.azure.com/.default"
+        )
+
+        return AsyncAzureOpenAI(
+            azure_endpoint=os.environ['AZURE_OPENAI_ENDPOINT'],
+            azure_ad_token_provider=token_provider,
+            api_version=os.environ.get('AZURE_OPENAI_API_VERSION', '2025-01-01-preview')
+        )
+
+
+# Azure OpenAI client shared across requests so TLS connections are reused.
+# The async client's connection pool belongs to the event loop that first used
+# it, so a new client is built if requests arrive on a different loop.
+_openai_client = None
+_openai_client_loop = None
+
+def _get_openai_client():
+    """Return the shared Azure OpenAI client for the running event loop."""
+    global _openai_client, _openai_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _openai_client is None or _openai_client_loop is not loop:
+        _openai_client = _create_openai_client()
+        _openai_client_loop = loop
+    return _openai_client
+
+
+# Every local and Azure agent, shared across requests. Reloaded once older than
+# AGENT_CACHE_TTL_SECONDS so agents uploaded to storage still show up without a restart.
+AGENT_CACHE_TTL_SECONDS = 60
+_GLOBAL_AGENTS = None  # (agents, loaded_at)
+
+# A user_guid only narrows which Azure agents are enabled, so the per-GUID delta is the
+# enabled file list applied to _GLOBAL_AGENTS. Request GUIDs are caller-supplied, so this
+# is an LRU capped at USER_AGENT_CACHE_SIZE entries.
+USER_AGENT_CACHE_SIZE = 256
+_user_agents_cache = OrderedDict()  # user_guid -> (agents, global agents they came from, loaded_at)
+_agents_cache_lock = threading.Lock()
+
+
+def _get_global_agents():
+    """Return every agent, loading them only when the shared set is stale."""
+    global _GLOBAL_AGENTS
+
+    now = time.monotonic()
+    cached = _GLOBAL_AGENTS
+    if cached is not None and now - cached[1] < AGENT_CACHE_TTL_SECONDS:
+        return cached[0]
+
+    agents = load_agents_from_folder()
+    _GLOBAL_AGENTS = (agents, now)
+    return agents
+
+
+def get_agents(user_guid=None):
+    """Return the agents enabled for user_guid; anything but a GUID gets every agent."""
+    global_agents = _get_global_agents()
+    if not isinstance(user_guid, str) or not (user_guid == DEFAULT_USER_GUID or _GUID_RE.fullmatch(user_guid)):
+        return global_agents
+
+    now = time.monotonic()
+    with _agents_cache_lock:
+        cached = _user_agents_cache.get(user_guid)
+        if cached is not None and cached[1] is global_agents and now - cached[2] < AGENT_CACHE_TTL_SECONDS:
+            _user_agents_cache.move_to_end(user_guid)
+            return cached[0]
+
+    enabled_agents = load_user_specific_agents(user_guid)
+    if enabled_agents is None:
+        agents = global_agents
+    else:
+        # Local agents carry no _agent_file and are always enabled
+        agents = {}
+        for name, agent in global_agents.items():
+            agent_file = getattr(agent, '_agent_file', None)
+            if agent_file is None or agent_file in enabled_agents:
+                agents[name] = agent
+
+    with _agents_cache_lock:
+        _user_agents_cache[user_guid] = (agents, global_agents, now)
+        _user_agents_cache.move_to_end(user_guid)
+        # Drop expired entries from the old end, then anything over the cap
+        while _user_agents_cache:
+            oldest = next(iter(_user_agents_cache.values()))
+            if len(_user_agents_cache) <= USER_AGENT_CACHE_SIZE and now - oldest[2] < AGENT_CACHE_TTL_SECONDS:
+                break
+            _user_agents_cache.popitem(last=False)
+    return agents
+
+
+def _clear_agents_cache():
+    """Forget every loaded agent so the next request reloads them."""
+    global _GLOBAL_AGENTS
+
+    with _agents_cache_lock:
+        _GLOBAL_AGENTS = None
+        _user_agents_cache.clear()
+
+
 class Assistant:
-    def __init__(self, declared_agents):
+    def __init__(self, declared_agents, client=None):
         self.config = {
             'assistant_name': str(os.environ.get('ASSISTANT_NAME', 'BusinessInsightBot')),
             'characteristic_description': str(os.environ.get('CHARACTERISTIC_DESCRIPTION', 'helpful business assistant'))
         }
 
-        # Initialize Azure OpenAI client
-        # Priority: API Key > Entra ID (token auth)
-        api_key = os.environ.get('AZURE_OPENAI_API_KEY')
-
-        if api_key:
-            # Use API key authentication (simplest, works everywhere)
-            logging.info("Using API key authentication for Azure OpenAI")
-            self.client = AzureOpenAI(
-                azure_endpoint=os.environ['AZURE_OPENAI_ENDPOINT'],
-                api_key=api_key,
-                api_version=os.environ.get('AZURE_OPENAI_API_VERSION', '2025-01-01-preview')
-            )
-        else:
-            # Use Entra ID authentication (token-based)
-            # Use optimized credential chain for faster cold starts:
-            # - ManagedIdentityCredential: Used in Azure (Function App, VM, etc.) - fastest
-            # - AzureCliCredential: Used locally after 'az login' - for development
-            if os.environ.get('WEBSITE_INSTANCE_ID'):
-                # Running in Azure - use ManagedIdentity directly (fastest)
-                credential = ManagedIdentityCredential()
-                logging.info("Using ManagedIdentityCredential for Azure deployment")
-            else:
-                # Local development - use chained credential
-                credential = ChainedTokenCredential(
-                    ManagedIdentityCredential(),
-                    AzureCliCredential()
-                )
-                logging.info("Using ChainedTokenCredential for local development")
+        # Reuse the shared client (and its connection pool) when the caller provides one
+        self.client = client if client is not None else _create_openai_client()
 
-            token_provider = get_bearer_token_provider(
-                credential,
-                "https://cognitiveservices.azure.com/.default"
-            )
+        self.known_agents = self.reload_agents(declared_agents)
 
-            self.client = AzureOpenAI(
-                azure_endpoint=os.environ['AZURE_OPENAI_ENDPOINT'],
-                azure_ad_token_provider=token_provider,
-                api_version=os.environ.get('AZURE_OPENAI_API_VERSION', '2025-01-01-preview')
-            )
+        # Demo state after the last get_response call (None until one runs), echoed to clients
+        self.demo_state = None
 
-        self.known_agents = self.reload_agents(declared_agents)
+        # History dropped by the token budget in the last prepare_messages call
+        self._evicted_history = []
+        self._history_tokens = 0
         
         # Set the default user GUID instead of None
         self.user_guid = DEFAULT_USER_GUID
@@ -488,8 +1244,7 @@ class Assistant:
             if content is None:
                 return None
             content = str(content).strip()
-            guid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
-            if guid_pattern.match(content):
+            if _GUID_RE.fullmatch(content):
                 return content
         return None
 
@@ -502,63 +1257,160 @@ class Assistant:
                 self.user_memory = "No specific context memory available."
                 return
 
-            # Always get shared memories with full_recall=True to ensure complete context
-            self.storage_manager.set_memory_context(None)  # Reset to shared context
-            self.shared_memory = str(context_memory_agent.perform(full_recall=True))
-
-            # If user_guid provided, get user-specific memories with full_recall=True
             # If no user_guid is provided, fall back to the default GUID
             if not user_guid:
                 user_guid = DEFAULT_USER_GUID
 
+            # Sequential turns for the same GUID reuse the recent full recall
+            cached = _memory_cache.get(user_guid)
+            if cached and time.monotonic() - cached[2] < MEMORY_CACHE_TTL_SECONDS:
+                self.shared_memory, self.user_memory = cached[0], cached[1]
+                return
+
+            # Always get shared memories with full_recall=True to ensure complete context
+            self.storage_manager.set_memory_context(None)  # Reset to shared context
+            self.shared_memory = str(context_memory_agent.perform(full_recall=True))
+
+            # Get user-specific memories with full_recall=True
             self.storage_manager.set_memory_context(user_guid)
             self.user_memory = str(context_memory_agent.perform(user_guid=user_guid, full_recall=True))
 
+            _cache_memory(user_guid, self.shared_memory, self.user_memory)
+
         except Exception as e:
             logging.warning(f"Error initializing context memory: {str(e)}")
             self.shared_memory = "Context memory initialization failed."
             self.user_memory = "Context memory initialization failed."
 
-    def _extract_demo_state_from_history(self, conversation_history):
+    def invalidate_memory(self, user_guid=None):
+        """
+        Drop cached context memory so the next initialization re-reads storage.
+        Pass a GUID to drop one user's entry; with no GUID every entry is dropped
+        (shared memory is part of each entry).
+        """
+        with _memory_cache_lock:
+            if user_guid:
+                _memory_cache.pop(user_guid, None)
+            else:
+                _memory_cache.clear()
+
+    def _extract_demo_state_from_history(self, conversation_history, demo_state=None):
         """
         Extract active demo state from conversation history (stateless approach).
+        A demo_state echoed back by the client (see _demo_state_payload) is used
+        instead of scanning the history when present. It is client-controlled, so
+        only demos already in the index are accepted and the step is clamped to the demo.
         Returns: (demo_name, current_step, demo_steps_list) or (None, 0, None)
         """
+        if isinstance(demo_state, dict):
+            demo_name = demo_state.get('active_demo')
+            try:
+                current_step = int(demo_state.get('step', 0))
+            except (TypeError, ValueError):
+                current_step = None
+            if not demo_name:
+                return None, 0, None
+            if current_step is not None and isinstance(demo_name, str):
+                try:
+                    demo_data = self._get_demo_index().get(demo_name)
+                except Exception as e:
+                    logging.error(f"Error loading demo index: {str(e)}")
+                    demo_data = None
+                if demo_data is not None:
+                    demo_steps = demo_data.get('conversation_flow', [])
+                    return demo_name, min(max(current_step, 0), len(demo_steps)), demo_steps
+            # Malformed or unknown state - fall back to the history
+
         if not conversation_history:
             return None, 0, None
 
-        # Look backwards through conversation for the most recent demo-related system message
-        for message in reversed(conversation_history):
-            if message.get('role') == 'system':
-                content = str(message.get('content', ''))
-
-                # Check for demo completion or exit
-                if 'DemoCompletion' in content or 'Demo finished' in content or 'DemoExit' in content:
-                    return None, 0, None
+        # Fast path: demo step logs end with a DEMO_STATE sentinel, so when the latest
+        # message carries one there's no need to walk the history
+        match = None
+        last_message = conversation_history[-1]
+        if isinstance(last_message, dict) and last_message.get('role') == 'system':
+            match = _DEMO_STATE_RE.search(str(last_message.get('content', '')))
+
+        if match is None:
+            # Look backwards through conversation for the most recent demo-related system message
+            for message in reversed(conversation_history):
+                if message.get('role') != 'system':
+                    continue
+                content = message.get('content')
+                if content is None:
+                    continue
 
-                # Check for demo activation or continuation
+                # One scan for either a demo end marker (completion/exit) or a step log
                 # Format: "Performed Bot_342_Morning_Greeting_Demo and got result: Demo activated - Step 1 of 5"
                 # Format: "Performed Bot_342_Morning_Greeting_Demo and got result: Step 2 of 5 - ..."
-                match = re.search(r'Performed (\S+) and got result:.*Step (\d+) of (\d+)', content)
+                match = _DEMO_END_OR_STEP_RE.search(content if type(content) is str else str(content))
                 if match:
-                    demo_name = match.group(1)
-                    current_step = int(match.group(2))
-                    total_steps = int(match.group(3))
-
-                    # Load the demo data to get all steps
-                    try:
-                        demo_content = self.storage_manager.read_file('demos', f'{demo_name}.json')
-                        if demo_content:
-                            demo_data = json.loads(demo_content)
-                            demo_steps = demo_data.get('conversation_flow', [])
-                            logging.info(f"Extracted demo state from history: {demo_name}, step {current_step}/{len(demo_steps)}")
-                            return demo_name, current_step, demo_steps
-                    except Exception as e:
-                        logging.error(f"Error loading demo {demo_name}: {str(e)}")
+                    if match.group(1) is None:
                         return None, 0, None
+                    break
+            else:
+                return None, 0, None
+
+        demo_name = match.group(1)
+        current_step = int(match.group(2))
+
+        demo_steps = self._load_demo_steps(demo_name)
+        if demo_steps is not None:
+            logging.info(f"Extracted demo state from history: {demo_name}, step {current_step}/{len(demo_steps)}")
+            return demo_name, current_step, demo_steps
 
         return None, 0, None
 
+    def _load_demo_steps(self, demo_name):
+        """Return the conversation_flow steps for demo_name, or None if it can't be loaded."""
+        try:
+            demo_data = self._get_demo_index().get(demo_name)
+            if demo_data is None:
+                # Not in the cached index yet (e.g. uploaded since it was built)
+                demo_content = self.storage_manager.read_file('demos', f'{demo_name}.json')
+                demo_data = _json_loads(demo_content) if demo_content else None
+            if demo_data is not None:
+                return demo_data.get('conversation_flow', [])
+        except Exception as e:
+            logging.error(f"Error loading demo {demo_name}: {str(e)}")
+        return None
+
+    def _get_demo_index(self):
+        """Return {demo_name: demo_data} for all demos, rebuilding the shared index when stale."""
+        global _demo_index, _demo_trigger_lookup, _demo_index_built_at
+
+        now = time.monotonic()
+        if _demo_index_built_at is not None and now - _demo_index_built_at < DEMO_INDEX_TTL_SECONDS:
+            return _demo_index
+
+        demo_files = self.storage_manager.list_files('demos')
+        index = {}
+        for file in demo_files:
+            if not file.name.endswith('.json'):
+                continue
+
+            try:
+                demo_content = self.storage_manager.read_file('demos', file.name)
+                if not demo_content:
+                    continue
+                index[file.name[:-5]] = _json_loads(demo_content)  # strip '.json'
+            except Exception as e:
+                logging.error(f"Error loading demo {file.name}: {str(e)}")
+
+        # Normalize trigger phrases once; the first demo listing a phrase wins
+        trigger_lookup = {}
+        for demo_name, demo_data in index.items():
+            try:
+                for phrase in demo_data.get('trigger_phrases', []):
+                    trigger_lookup.setdefault(phrase.lower().strip(), demo_name)
+            except Exception as e:
+                logging.error(f"Error indexing trigger phrases for demo {demo_name}: {str(e)}")
+
+        _demo_index = index
+        _demo_trigger_lookup = trigger_lookup
+        _demo_index_built_at = now
+        return index
+
     def extract_user_guid(self, text):
         """Try to extract a GUID from user input, but only if it's the entire message"""
         if text is None:
@@ -567,14 +1419,12 @@ class Assistant:
         text_str = str(text).strip()
 
         # Only match if the entire message is just a GUID
-        guid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
-        match = guid_pattern.match(text_str)
+        match = _GUID_RE.fullmatch(text_str)
         if match:
             return match.group(0)
 
         # Also allow labeled GUIDs for explicit behavior
-        labeled_guid_pattern = re.compile(r'^guid[:=\s]+([0-9a-f-]{36})$', re.IGNORECASE)
-        match = labeled_guid_pattern.match(text_str)
+        match = _LABELED_GUID_RE.fullmatch(text_str)
         if match:
             return match.group(1)
 
@@ -583,50 +1433,31 @@ class Assistant:
     def check_demo_trigger(self, user_message):
         """Check if user message matches any demo trigger phrases (stateless)"""
         try:
-            # List all demo files
-            demo_files = self.storage_manager.list_files('demos')
-
-            user_message_lower = user_message.lower().strip()
+            # Parsed demos come from the shared index rather than a storage read per turn
+            demo_index = self._get_demo_index()
 
-            for file in demo_files:
-                if not file.name.endswith('.json'):
-                    continue
+            # Single dict probe against the normalized trigger phrases
+            demo_name = _demo_trigger_lookup.get(user_message.lower().strip())
+            if demo_name is None:
+                return {'triggered': False}
 
-                try:
-                    # Read demo file
-                    demo_content = self.storage_manager.read_file('demos', file.name)
-                    if not demo_content:
-                        continue
-
-                    demo_data = json.loads(demo_content)
-                    trigger_phrases = demo_data.get('trigger_phrases', [])
-
-                    # Check if user message matches any trigger phrase
-                    for phrase in trigger_phrases:
-                        if phrase.lower().strip() == user_message_lower:
-                            # Found a match!
-                            demo_name = file.name.replace('.json', '')
-                            conversation_flow = demo_data.get('conversation_flow', [])
-
-                            logging.info(f"Triggered demo: {demo_name} with {len(conversation_flow)} steps")
-
-                            return {
-                                'triggered': True,
-                                'demo_name': demo_name,
-                                'demo_data': demo_data,
-                                'conversation_flow': conversation_flow
-                            }
+            demo_data = demo_index[demo_name]
+            conversation_flow = demo_data.get('conversation_flow', [])
 
-                except Exception as e:
-                    logging.error(f"Error checking demo {file.name}: {str(e)}")
-                    continue
+            logging.info(f"Triggered demo: {demo_name} with {len(conversation_flow)} steps")
 
-            return {'triggered': False}
+            return {
+                'triggered': True,
+                'demo_name': demo_name,
+                'demo_data': demo_data,
+                'conversation_flow': conversation_flow
+            }
 
         except Exception as e:
             logging.error(f"Error in check_demo_trigger: {str(e)}")
             return {'triggered': False}
 
+    @functools.cached_property
     def _uses_tools_api(self):
         """
         Determine if the current model uses the tools API or legacy functions API.
@@ -638,6 +1469,8 @@ class Assistant:
         - gpt-4o, gpt-4o-mini, gpt-5.1-chat, o1, o1-mini, o3-mini, and all future models
 
         Strategy: Default to tools API (newer), only use legacy for known older models.
+
+        The deployment can't change mid-process, so this is computed once per instance.
         """
         deployment_name = os.environ.get('AZURE_OPENAI_DEPLOYMENT_NAME', 'gpt-deployment').lower()
 
@@ -663,187 +1496,121 @@ class Assistant:
 
     def get_agent_metadata_tools(self):
         """Convert agent metadata to tools format for GPT-4o/GPT-5.1+ compatibility"""
-        tools = []
-        for agent in self.known_agents.values():
-            if hasattr(agent, 'metadata'):
-                tool = {
-                    "type": "function",
-                    "function": agent.metadata
-                }
-                tools.append(tool)
+        # known_agents only changes through reload_agents, which clears this cache
+        if self._metadata_tools is not None:
+            return self._metadata_tools
+
+        # Tuple so callers can't mutate the shared cached value
+        tools = tuple(
+            _agent_tool_dict(agent) for agent in self.known_agents.values() if hasattr(agent, 'metadata')
+        )
+        self._metadata_tools = tools
+
+        # Log ProjectTracker metadata for debugging, once per schema build
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            for tool in tools:
+                if tool.get('function', {}).get('name') == 'ProjectTracker':
+                    props = tool.get('function', {}).get('parameters', {}).get('properties', {})
+                    logging.debug(f"ProjectTracker properties: {list(props.keys())}")
         return tools
 
     def get_agent_metadata_functions(self):
         """Get agent metadata in legacy functions format for GPT-3.5/GPT-4"""
-        functions = []
-        for agent in self.known_agents.values():
-            if hasattr(agent, 'metadata'):
-                functions.append(agent.metadata)
+        if self._metadata_functions is not None:
+            return self._metadata_functions
+
+        functions = tuple(agent.metadata for agent in self.known_agents.values() if hasattr(agent, 'metadata'))
+        self._metadata_functions = functions
         return functions
 
     def reload_agents(self, agent_objects):
-        known_agents = {}
+        # Agent set is changing - drop the cached metadata lists
+        self._metadata_tools = None
+        self._metadata_functions = None
+
         if isinstance(agent_objects, dict):
-            for agent_name, agent in agent_objects.items():
-                if hasattr(agent, 'name'):
-                    known_agents[agent.name] = agent
-                else:
-                    known_agents[str(agent_name)] = agent
+            return {getattr(agent, 'name', str(agent_name)): agent for agent_name, agent in agent_objects.items()}
         elif isinstance(agent_objects, list):
-            for agent in agent_objects:
-                if hasattr(agent, 'name'):
-                    known_agents[agent.name] = agent
+            return {agent.name: agent for agent in agent_objects if hasattr(agent, 'name')}
         else:
             logging.warning(f"Unexpected agent_objects type: {type(agent_objects)}")
-        return known_agents
+        return {}
 
     def prepare_messages(self, conversation_history):
+        """
+        Build the messages for the model from the system prompts and history.
+        Returns (messages, last_user_content), where last_user_content is the
+        stripped content of the last user message in the history (or None).
+        """
         if not isinstance(conversation_history, list):
             conversation_history = []
             
         messages = []
         current_datetime = datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
         
-        # System message
-        system_message = {
+        # Static system message first so the prompt prefix stays cacheable
+        messages.append({
             "role": "system",
-            "content": f"""
-<identity>
-You are a Microsoft Copilot assistant named {str(self.config.get('assistant_name', 'Assistant'))}, operating within Microsoft Teams.
-</identity>
-
-<shared_memory_output>
-These are memories accessible by all users of the system:
-{str(self.shared_memory)}
-</shared_memory_output>
-
-<specific_memory_output>
-These are memories specific to the current conversation:
-{str(self.user_memory)}
-</specific_memory_output>
-
-<context_instructions>
-- <shared_memory_output> represents common knowledge shared across all conversations
-- <specific_memory_output> represents specific context for the current conversation
-- Apply specific context with higher precedence than shared context
-- Synthesize information from both contexts for comprehensive responses
-</context_instructions>
-
-<agent_usage>
-IMPORTANT: You must be honest and accurate about agent usage:
-- NEVER pretend or imply you've executed an agent when you haven't actually called it
-- NEVER say "using my agent" unless you are actually making a function call to that agent
-- NEVER fabricate success messages about data operations that haven't occurred
-- If you need to perform an action and don't have the necessary agent, say so directly
-- When a user requests an action, either:
-  1. Call the appropriate agent and report actual results, or
-  2. Say "I don't have the capability to do that" and suggest an alternative
-  3. If no details are provided besides the request to run an agent, infer the necessary input parameters by "reading between the lines" of the conversation context so far
-- ALWAYS trust the tool schema provided - if a parameter is defined in the schema, USE IT
-</agent_usage>
-
-<project_tracker_note>
-The ProjectTracker agent supports ALL of these update fields:
-- step_notes: Object like {{"1": "note for step 1", "2": "note for step 2"}}
-- step_checklists: Object like {{"1": {{"item1": true}}}}
-- step_decisions: Object like {{"1": "PASS", "2": "COMPLETE"}}
-These ARE valid parameters. Use them when users want to save notes or decisions.
-</project_tracker_note>
-
-<response_format>
-CRITICAL: You must structure your response in TWO distinct parts separated by the delimiter |||VOICE|||
-
-1. FIRST PART (before |||VOICE|||): Your full formatted response
-   - Use **bold** for emphasis
-   - Use `code blocks` for technical content
-   - Apply --- for horizontal rules to separate sections
-   - Utilize > for important quotes or callouts
-   - Format code with ```language syntax highlighting
-   - Create numbered lists with proper indentation
-   - Add personality when appropriate
-   - Apply # ## ### headings for clear structure
-
-2. SECOND PART (after |||VOICE|||): A concise voice response
-   - Maximum 1-2 sentences
-   - Pure conversational English with NO formatting
-   - Extract only the most critical information
-   - Sound like a colleague speaking casually over a cubicle wall
-   - Be natural and conversational, not robotic
-   - Focus on the key takeaway or action item
-   - Example: "I found those Q3 sales figures - revenue's up 12 percent from last quarter." or "Sure, I'll pull up that customer data for you right now."
-
-EXAMPLE FORMAT:
-Here's the detailed analysis you requested:
+            "content": _static_system_prompt(self.config.get('assistant_name', 'Assistant'))
+        })
 
-**Key Findings:**
-- Revenue increased by 12%
-- Customer satisfaction scores improved
-
-|||VOICE|||
-Revenue's up 12 percent and customers are happier - looking good for Q3.
-</response_format>
-"""
-        }
-        messages.append(ensure_string_content(system_message))
+        # Per-user memories in their own system message after the static prefix
+        messages.append(ensure_string_content({
+            "role": "system",
+            "content": "".join((
+                _MEMORY_PROMPT_SHARED,
+                self.shared_memory,
+                _MEMORY_PROMPT_USER,
+                self.user_memory,
+                _MEMORY_PROMPT_END
+            ))
+        }))
         
         # Process conversation history - skip first message if it's just a GUID
         guid_only_first_message = self._check_first_message_for_guid(conversation_history)
         start_idx = 1 if guid_only_first_message else 0
-        
-        for i in range(start_idx, len(conversation_history)):
-            messages.append(ensure_string_content(conversation_history[i]))
-            
-        return messages
+
+        # Track the last user message while normalizing, so callers needn't rescan the history
+        last_user_content = guid_only_first_message
+        history = []
+        for message in conversation_history[start_idx:]:
+            message = ensure_string_content(message)
+            if message.get('role') == 'user':
+                last_user_content = message['content']
+            history.append(message)
+
+        kept_history, self._evicted_history, self._history_tokens = _fit_history_to_budget(history)
+        messages.extend(kept_history)
+
+        return messages, last_user_content.strip() if last_user_content is not None else None
     
-    def get_openai_api_call(self, messages) -> Result:
+    async def get_openai_api_call(self, messages) -> Result:
         """
         Make OpenAI API call with typed error handling.
         Returns Result[response, APIError] instead of raising exceptions.
         """
         deployment_name = os.environ.get('AZURE_OPENAI_DEPLOYMENT_NAME', 'gpt-deployment')
-        use_tools_api = self._uses_tools_api()
+        use_tools_api = self._uses_tools_api
 
         try:
+            request = {"model": deployment_name, "messages": messages}
             if use_tools_api:
                 # GPT-4o, GPT-5.1+ use the tools API format
                 tools = self.get_agent_metadata_tools()
-                # Log ProjectTracker metadata for debugging
-                for tool in tools:
-                    if tool.get('function', {}).get('name') == 'ProjectTracker':
-                        props = tool.get('function', {}).get('parameters', {}).get('properties', {})
-                        logging.info(f"ProjectTracker properties: {list(props.keys())}")
                 if tools:
-                    response = self.client.chat.completions.create(
-                        model=deployment_name,
-                        messages=messages,
-                        tools=tools,
-                        tool_choice="auto"
-                    )
-                else:
-                    response = self.client.chat.completions.create(
-                        model=deployment_name,
-                        messages=messages
-                    )
+                    request.update(tools=tools, tool_choice="auto")
             else:
                 # GPT-3.5, GPT-4 use the legacy functions API format
                 functions = self.get_agent_metadata_functions()
                 if functions:
-                    response = self.client.chat.completions.create(
-                        model=deployment_name,
-                        messages=messages,
-                        functions=functions,
-                        function_call="auto"
-                    )
-                else:
-                    response = self.client.chat.completions.create(
-                        model=deployment_name,
-                        messages=messages
-                    )
+                    request.update(functions=functions, function_call="auto")
+
+            response = await self.client.chat.completions.create(**request)
             return Success(response)
 
         except RateLimitError as e:
             logging.warning(f"Rate limit hit: {e}")
-            return Failure(APIError('rate_limit', str(e), 429, retryable=True))
+            return Failure(APIError('rate_limit', str(e), 429, retryable=True, retry_after=_retry_after_seconds(e)))
         except AuthenticationError as e:
             logging.error(f"Auth error: {e}")
             return Failure(APIError('auth', str(e), 401, retryable=False))
@@ -857,7 +1624,7 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
             status = getattr(e, 'status_code', 500)
             retryable = status >= 500
             logging.error(f"OpenAI API error ({status}): {e}")
-            return Failure(APIError('server', str(e), status, retryable=retryable))
+            return Failure(APIError('server', str(e), status, retryable=retryable, retry_after=_retry_after_seconds(e)))
         except Exception as e:
             logging.error(f"Unexpected error in OpenAI API call: {e}")
             return Failure(APIError('unknown', str(e), None, retryable=False))
@@ -868,7 +1635,7 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
             return "", ""
         
         # Split by the delimiter
-        parts = content.split("|||VOICE|||")
+        parts = content.split(VOICE_DELIMITER)
         
         if len(parts) >= 2:
             # We have both parts
@@ -882,14 +1649,144 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
             if sentences:
                 voice_response = sentences[0].strip() + "."
                 # Remove any formatting from voice response
-                voice_response = re.sub(r'\*\*|`|#|>|---|[\U00010000-\U0010ffff]|[\u2600-\u26FF]|[\u2700-\u27BF]', '', voice_response)
-                voice_response = re.sub(r'\s+', ' ', voice_response).strip()
+                voice_response = _clean_voice_text(voice_response)
             else:
                 voice_response = "I've completed your request."
         
         return formatted_response, voice_response
 
-    def get_response(self, prompt, conversation_history, max_retries=3, retry_delay=2):
+    async def _compact_history(self, dropped_messages):
+        """
+        Summarize history dropped by the token budget using a cheap deployment,
+        extending the cached summary of the longest already-summarized prefix.
+        Returns the summary text; if summarization fails, the prefix's summary or None.
+        """
+        lines = [
+            f"{message.get('role', 'user')}: {message.get('content') or ''}" for message in dropped_messages
+        ]
+        # prefix_keys[i] covers lines[:i + 1]
+        running = hashlib.sha1()
+        prefix_keys = []
+        for line in lines:
+            running.update(hashlib.sha1(line.encode('utf-8')).digest())
+            prefix_keys.append(running.hexdigest())
+
+        covered, previous_summary = 0, None
+        for i in range(len(prefix_keys) - 1, -1, -1):
+            previous_summary = _history_summary_cache.pop(prefix_keys[i], None)
+            if previous_summary is not None:
+                # Re-inserted so a session's latest summary is the last to be evicted
+                _history_summary_cache[prefix_keys[i]] = previous_summary
+                covered = i + 1
+                break
+        if covered == len(lines):
+            return previous_summary
+
+        transcript = "\n".join(lines[covered:])
+        if previous_summary is not None:
+            transcript = f"[Summary of earlier messages]\n{previous_summary}\n\n[Later messages]\n{transcript}"
+
+        deployment_name = os.environ.get(
+            'AZURE_OPENAI_SUMMARY_DEPLOYMENT_NAME',
+            os.environ.get('AZURE_OPENAI_DEPLOYMENT_NAME', 'gpt-deployment')
+        )
+        try:
+            response = await self.client.chat.completions.create(
+                model=deployment_name,
+                messages=[
+                    {"role": "system", "content": _HISTORY_SUMMARY_PROMPT},
+                    {"role": "user", "content": transcript}
+                ],
+                max_tokens=HISTORY_SUMMARY_MAX_TOKENS
+            )
+        except Exception as e:
+            logging.warning(f"History summarization failed, dropping evicted messages: {e}")
+            return previous_summary
+
+        summary = (response.choices[0].message.content or "").strip()
+        if not summary:
+            return previous_summary
+
+        if len(_history_summary_cache) >= HISTORY_SUMMARY_CACHE_SIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            _history_summary_cache.pop(next(iter(_history_summary_cache)))
+        _history_summary_cache[prefix_keys[-1]] = summary
+        return summary
+
+    async def _embed_prompt(self, prompt):
+        """Embed prompt as a unit vector for the semantic cache, or None if unavailable."""
+        deployment_name = os.environ.get('AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME')
+        if not deployment_name or np is None or not prompt.strip():
+            return None
+
+        try:
+            response = await self.client.embeddings.create(model=deployment_name, input=prompt)
+        except Exception as e:
+            logging.warning(f"Prompt embedding failed, skipping semantic cache: {e}")
+            return None
+
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    async def _run_agent(self, agent_name, json_data, memory_lock):
+        """
+        Parse tool arguments and run one agent off the event loop.
+        Returns (result string, needs_follow_up); raises on bad arguments or agent errors.
+        """
+        agent = self.known_agents[agent_name]
+        logging.info(f"JSON data before parsing: {json_data}")
+
+        agent_parameters = safe_json_loads(json_data)
+
+        # Sanitize parameters - ensure none are undefined or None
+        sanitized_parameters = {}
+        for key, value in agent_parameters.items():
+            if value is None:
+                sanitized_parameters[key] = ""  # Convert None to empty string
+            else:
+                sanitized_parameters[key] = value
+
+        if agent_name in _MEMORY_AGENTS:
+            # Always use the current user_guid (which might be the default)
+            sanitized_parameters['user_guid'] = self.user_guid
+            async with memory_lock:
+                result = await asyncio.to_thread(agent.perform, **sanitized_parameters)
+        else:
+            result = await asyncio.to_thread(agent.perform, **sanitized_parameters)
+
+        # Memory writes can touch shared memory too, so drop every cached entry
+        if agent_name == 'ManageMemory':
+            self.invalidate_memory()
+
+        # Ensure result is a string
+        if result is None:
+            return "Agent completed successfully", False
+        return str(result), self._needs_follow_up(result)
+
+    @staticmethod
+    def _needs_follow_up(result):
+        """Check an agent result (dict or JSON string) for error indicators or incomplete data flags."""
+        if isinstance(result, dict):
+            result_json = result
+        elif isinstance(result, str) and result.lstrip().startswith('{'):
+            try:
+                result_json = _json_loads(result)
+            except ValueError:
+                # If we can't parse the result as JSON, assume no follow-up needed
+                return False
+        else:
+            # Only JSON objects can carry follow-up flags, so skip parsing anything else
+            return False
+        if not isinstance(result_json, dict):
+            return False
+        return bool(
+            result_json.get('error')
+            or result_json.get('status') == 'incomplete'
+            or result_json.get('requires_additional_action') == True
+        )
+
+    async def get_response(self, prompt, conversation_history, max_retries=3, retry_delay=2, demo_state=None):
         # Check if this is a first-time initialization with just a GUID
         # or if a GUID is in the conversation history or current prompt
         guid_from_history = self._check_first_message_for_guid(conversation_history)
@@ -900,12 +1797,12 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
         # Set or update the memory context if we have a GUID that's different from current
         if target_guid and target_guid != self.user_guid:
             self.user_guid = target_guid
-            self._initialize_context_memory(self.user_guid)
+            await asyncio.to_thread(self._initialize_context_memory, self.user_guid)
             logging.info(f"User GUID updated to: {self.user_guid}")
         elif not self.user_guid:
             # If for some reason we don't have a user_guid, set it to the default
             self.user_guid = DEFAULT_USER_GUID
-            self._initialize_context_memory(self.user_guid)
+            await asyncio.to_thread(self._initialize_context_memory, self.user_guid)
             logging.info(f"Using default User GUID: {self.user_guid}")
 
         # Ensure prompt is string
@@ -917,14 +1814,16 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
             voice = "I've loaded your memory - what can I help you with?"
             return formatted, voice, ""
 
-        # Extract demo state from conversation history (stateless)
-        active_demo, current_step, demo_steps = self._extract_demo_state_from_history(conversation_history)
+        # Extract demo state from the client's echoed state or the conversation history (stateless)
+        active_demo, current_step, demo_steps = self._extract_demo_state_from_history(conversation_history, demo_state)
+        self.demo_state = _demo_state_payload(active_demo, current_step, len(demo_steps or ()))
 
         # Check for "exit demo" command
         if prompt.lower().strip() in ['exit demo', 'stop demo', 'end demo', 'cancel demo']:
             if active_demo:
                 formatted = f"How can I help you?"
                 voice = "What can I help you with?"
+                self.demo_state = _demo_state_payload(None)
                 return formatted, voice, f"Performed DemoExit and got result: {active_demo} terminated by user"
             else:
                 formatted = "How can I help you?"
@@ -945,7 +1844,8 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
             scripted_demo_agent = self.known_agents.get('ScriptedDemo')
             if scripted_demo_agent:
                 try:
-                    canned_response = scripted_demo_agent.perform(
+                    canned_response = await asyncio.to_thread(
+                        scripted_demo_agent.perform,
                         action='respond',
                         demo_name=demo_name,
                         user_input=prompt,
@@ -958,10 +1858,10 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
                     # Extract voice from the canned response
                     voice_sentences = canned_response.split('.')[:2]
                     voice = '.'.join(voice_sentences).strip()
-                    voice = re.sub(r'\*\*|`|#|>|---|[\U00010000-\U0010ffff]|[\u2600-\u26FF]|[\u2700-\u27BF]', '', voice)
-                    voice = re.sub(r'\s+', ' ', voice).strip()
+                    voice = _clean_voice_text(voice)
 
-                    return formatted, voice, f"Performed {demo_name} and got result: Demo activated - Step 1 of {total_steps}"
+                    self.demo_state = _demo_state_payload(demo_name, 1, total_steps)
+                    return formatted, voice, f"Performed {demo_name} and got result: Demo activated - Step 1 of {total_steps}{_demo_state_sentinel(demo_name, 1, total_steps)}"
 
                 except Exception as e:
                     logging.error(f"Error calling ScriptedDemoAgent on trigger: {str(e)}")
@@ -973,7 +1873,8 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
                 # ScriptedDemoAgent not available - use generic message
                 formatted = f"Let me help you with that!"
                 voice = f"Let me help you with that."
-                return formatted, voice, f"Performed {demo_name} and got result: Demo activated - Step 1 of {total_steps}"
+                self.demo_state = _demo_state_payload(demo_name, 1, total_steps)
+                return formatted, voice, f"Performed {demo_name} and got result: Demo activated - Step 1 of {total_steps}{_demo_state_sentinel(demo_name, 1, total_steps)}"
 
         # Check if we're in an active demo (continuing a scripted conversation)
         if active_demo and demo_steps:
@@ -985,6 +1886,7 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
                 # Demo is complete
                 formatted = f"How else can I help you today?"
                 voice = "What else can I help you with?"
+                self.demo_state = _demo_state_payload(None)
                 return formatted, voice, f"Performed DemoCompletion and got result: {active_demo} finished successfully"
 
             logging.info(f"Continuing demo {active_demo}: step {next_step_num}/{total_steps}")
@@ -994,7 +1896,8 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
             if scripted_demo_agent:
                 try:
                     # Call the agent with the user input
-                    canned_response = scripted_demo_agent.perform(
+                    canned_response = await asyncio.to_thread(
+                        scripted_demo_agent.perform,
                         action='respond',
                         demo_name=active_demo,
                         user_input=prompt,
@@ -1008,10 +1911,10 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
                     voice_sentences = canned_response.split('.')[:2]
                     voice = '.'.join(voice_sentences).strip()
                     # Remove markdown formatting from voice
-                    voice = re.sub(r'\*\*|`|#|>|---|[\U00010000-\U0010ffff]|[\u2600-\u26FF]|[\u2700-\u27BF]', '', voice)
-                    voice = re.sub(r'\s+', ' ', voice).strip()
+                    voice = _clean_voice_text(voice)
 
-                    agent_log = f"Performed {active_demo} and got result: Step {next_step_num} of {total_steps} - Returned canned response"
+                    agent_log = f"Performed {active_demo} and got result: Step {next_step_num} of {total_steps} - Returned canned response{_demo_state_sentinel(active_demo, next_step_num, total_steps)}"
+                    self.demo_state = _demo_state_payload(active_demo, next_step_num, total_steps)
                     return formatted, voice, agent_log
 
                 except Exception as e:
@@ -1026,37 +1929,52 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
                 voice = "The demo script isn't available right now. How else can I help?"
                 return formatted, voice, "Performed DemoError and got result: ScriptedDemo agent not found"
         
-        messages = self.prepare_messages(conversation_history)
+        messages, last_user_msg = self.prepare_messages(conversation_history)
 
-        # Check if prompt is already the last user message in conversation_history to avoid duplicates
-        # This can happen when the caller (e.g., Copilot Studio/Teams) includes the current message in history
-        last_user_msg = None
-        for msg in reversed(conversation_history):
-            if msg.get('role') == 'user':
-                last_user_msg = str(msg.get('content', '')).strip()
-                break
+        # Long sessions: keep the gist of dropped history as a summary after the system prompts
+        if self._evicted_history and self._history_tokens > HISTORY_SUMMARY_TRIGGER_TOKENS:
+            summary = await self._compact_history(self._evicted_history)
+            if summary:
+                # After the static prompt and memories, ahead of the remaining history
+                messages.insert(2, {"role": "system", "content": "[Prior context summary]\n" + summary})
 
-        # Only append prompt if it's not already the last user message
+        # Only append prompt if it's not already the last user message in conversation_history
+        # This can happen when the caller (e.g., Copilot Studio/Teams) includes the current message in history
         if last_user_msg != prompt.strip():
             messages.append(ensure_string_content({"role": "user", "content": prompt}))
 
+        # Serve near-identical prompts in the same conversation state from the semantic cache
+        cache_partition = None
+        cache_vector = await self._embed_prompt(prompt)
+        if cache_vector is not None:
+            cache_partition = _semantic_cache_partition(self.user_guid, messages)
+            cached = _semantic_cache_lookup(cache_partition, cache_vector)
+            if cached is not None:
+                logging.info("Semantic cache hit")
+                return cached
+
         agent_logs = []
         retry_count = 0
         needs_follow_up = False
 
-        use_tools_api = self._uses_tools_api()
+        use_tools_api = self._uses_tools_api
 
         while retry_count < max_retries:
             # Make API call - returns Result[response, APIError]
-            api_result = self.get_openai_api_call(messages)
+            api_result = await self.get_openai_api_call(messages)
 
             # Handle API failure
             if api_result.is_failure:
                 error = api_result.error
                 retry_count += 1
                 if error.retryable and retry_count < max_retries:
-                    logging.warning(f"Retryable API error ({retry_count}/{max_retries}): {error}")
-                    time.sleep(retry_delay)
+                    # Honor the server's Retry-After, else back off exponentially with jitter
+                    if error.retry_after is not None:
+                        delay = min(API_RETRY_MAX_DELAY, error.retry_after)
+                    else:
+                        delay = min(API_RETRY_MAX_DELAY, retry_delay * 2 ** (retry_count - 1)) + random.uniform(0, 0.5)
+                    logging.warning(f"Retryable API error ({retry_count}/{max_retries}), retrying in {delay:.1f}s: {error}")
+                    await asyncio.sleep(delay)
                     continue
                 else:
                     # Non-retryable error or max retries reached
@@ -1066,6 +1984,8 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
                         error_msg = "I'm experiencing high demand right now. Please try again in a moment."
                     elif error.error_type == 'auth':
                         error_msg = "There's an authentication issue. Please contact support."
+                        # get_openai_api_call turns 401s into this result, so no exception reaches the handlers
+                        _reset_credentials_after_auth_error(error)
                     return error_msg, "Something went wrong - try again.", ""
 
             # Success - extract response
@@ -1073,70 +1993,44 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
             assistant_msg = response.choices[0].message
             msg_contents = assistant_msg.content or ""  # Ensure content is never None
 
-            # Check for function/tool calls based on API format
-            has_function_call = False
-            agent_name = None
-            json_data = "{}"
-            tool_call_id = None
-
+            # Collect (tool_call_id, agent_name, arguments) for every call the model made
+            calls = []
             if use_tools_api:
-                # GPT-4o, GPT-5.1+ format: tool_calls
-                if assistant_msg.tool_calls:
-                    has_function_call = True
-                    tool_call = assistant_msg.tool_calls[0]
-                    agent_name = str(tool_call.function.name)
-                    json_data = tool_call.function.arguments or "{}"
-                    tool_call_id = tool_call.id
-            else:
-                # Legacy format: function_call
-                if assistant_msg.function_call:
-                    has_function_call = True
-                    agent_name = str(assistant_msg.function_call.name)
-                    json_data = assistant_msg.function_call.arguments or "{}"
+                # GPT-4o, GPT-5.1+ format: tool_calls (may contain several parallel calls)
+                for tool_call in assistant_msg.tool_calls or ():
+                    calls.append((tool_call.id, str(tool_call.function.name), tool_call.function.arguments or "{}"))
+            elif assistant_msg.function_call:
+                # Legacy format: a single function_call
+                calls.append((None, str(assistant_msg.function_call.name), assistant_msg.function_call.arguments or "{}"))
 
             # If no function call, return the response
-            if not has_function_call:
+            if not calls:
                 formatted_response, voice_response = self.parse_response_with_voice(msg_contents)
+                # Only plain replies are cached; tool results can go stale
+                if cache_vector is not None and not agent_logs:
+                    _semantic_cache_store(cache_partition, cache_vector, (formatted_response, voice_response, ""))
                 return formatted_response, voice_response, "\n".join(map(str, agent_logs))
 
-            # Get the agent
-            agent = self.known_agents.get(agent_name)
-            if not agent:
-                return f"Agent '{agent_name}' does not exist", "I couldn't find that agent.", ""
-
-            logging.info(f"JSON data before parsing: {json_data}")
+            # Verify every requested agent exists before running any of them
+            for _, agent_name, _ in calls:
+                if agent_name not in self.known_agents:
+                    return f"Agent '{agent_name}' does not exist", "I couldn't find that agent.", ""
 
+            # Run all requested agents concurrently; memory agents share storage context so they take turns
+            memory_lock = asyncio.Lock()
             try:
-                agent_parameters = safe_json_loads(json_data)
-
-                # Sanitize parameters - ensure none are undefined or None
-                sanitized_parameters = {}
-                for key, value in agent_parameters.items():
-                    if value is None:
-                        sanitized_parameters[key] = ""  # Convert None to empty string
-                    else:
-                        sanitized_parameters[key] = value
-
-                # Add user_guid to agent parameters if agent accepts it
-                # Always use the current user_guid (which might be the default)
-                if agent_name in ['ManageMemory', 'ContextMemory']:
-                    sanitized_parameters['user_guid'] = self.user_guid
-
-                # Always perform agent call - no caching
-                result = agent.perform(**sanitized_parameters)
-
-                # Ensure result is a string
-                if result is None:
-                    result = "Agent completed successfully"
-                else:
-                    result = str(result)
-
-                agent_logs.append(f"Performed {agent_name} and got result: {result}")
-
+                outcomes = await asyncio.gather(*[
+                    self._run_agent(agent_name, json_data, memory_lock)
+                    for _, agent_name, json_data in calls
+                ])
             except Exception as e:
                 return f"Error parsing parameters: {str(e)}", "I hit an error processing that.", ""
 
-            # Add the assistant message and result to conversation based on API format
+            results = [result for result, _ in outcomes]
+            for (_, agent_name, _), result in zip(calls, results):
+                agent_logs.append(f"Performed {agent_name} and got result: {result}")
+
+            # Add the assistant message and results to conversation based on API format
             if use_tools_api:
                 # GPT-4o, GPT-5.1+ format: tool_calls and tool role
                 messages.append({
@@ -1151,15 +2045,20 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
                                 "arguments": json_data
                             }
                         }
+                        for tool_call_id, agent_name, json_data in calls
                     ]
                 })
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call_id,
-                    "content": result
-                })
+                messages.extend(
+                    {
+                        "role": "tool",
+                        "tool_call_id": tool_call_id,
+                        "content": result
+                    }
+                    for (tool_call_id, _, _), result in zip(calls, results)
+                )
             else:
                 # Legacy format: function_call and function role
+                _, agent_name, json_data = calls[0]
                 messages.append({
                     "role": "assistant",
                     "content": msg_contents if msg_contents else None,
@@ -1171,28 +2070,20 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
                 messages.append({
                     "role": "function",
                     "name": agent_name,
-                    "content": result
+                    "content": results[0]
                 })
 
-            # EVALUATION: Check if we need a follow-up function call
-            try:
-                result_json = json.loads(result)
-                # Look for error indicators or incomplete data flags
-                needs_follow_up = False
-                if isinstance(result_json, dict):
-                    # Check for error indicators
-                    if result_json.get('error') or result_json.get('status') == 'incomplete':
-                        needs_follow_up = True
-                    # Check for specific indicators that another action is needed
-                    if result_json.get('requires_additional_action') == True:
-                        needs_follow_up = True
-            except:
-                # If we can't parse the result as JSON, assume no follow-up needed
-                needs_follow_up = False
+            # EVALUATION: Check if any result needs a follow-up function call
+            needs_follow_up = any(follow_up for _, follow_up in outcomes)
+
+            # The model already wrote its final reply alongside the call - skip the summary round-trip
+            if not needs_follow_up and VOICE_DELIMITER in msg_contents:
+                formatted_response, voice_response = self.parse_response_with_voice(msg_contents)
+                return formatted_response, voice_response, "\n".join(map(str, agent_logs))
 
             # If we don't need a follow-up, get the final response and return
             if not needs_follow_up:
-                final_result = self.get_openai_api_call(messages)
+                final_result = await self.get_openai_api_call(messages)
                 if final_result.is_failure:
                     logging.error(f"Final API call failed: {final_result.error}")
                     return "I completed the action but couldn't generate a summary.", "Action completed.", "\n".join(map(str, agent_logs))
@@ -1206,10 +2097,53 @@ Revenue's up 12 percent and customers are happier - looking good for Q3.
 
         return "Service temporarily unavailable. Please try again later.", "Service is down - try again later.", ""
 
+def _read_chat_request(req_body):
+    """Extract (user_input, conversation_history, user_guid, is_guid_only) from a chat request body."""
+    # Ensure user_input is string, handle None case
+    user_input = req_body.get('user_input')
+    if user_input is None:
+        user_input = ""
+    else:
+        user_input = str(user_input)
+    
+    # Ensure conversation_history is list and contents are properly formatted.
+    # Normalized once here so every later pass (GUID/demo checks, prepare_messages)
+    # sees well-formed dicts and takes ensure_string_content's no-copy path.
+    conversation_history = req_body.get('conversation_history', [])
+    if isinstance(conversation_history, list):
+        conversation_history = [ensure_string_content(message) for message in conversation_history]
+    else:
+        conversation_history = []
+    
+    # Extract user_guid if provided in the request
+    user_guid = req_body.get('user_guid')
+
+    # Skip validation if input is just a GUID to load memory
+    is_guid_only = _GUID_RE.fullmatch(user_input.strip())
+
+    return user_input, conversation_history, user_guid, is_guid_only
+
+async def _create_request_assistant(user_input, user_guid, is_guid_only):
+    """Build the per-request Assistant with the caller's memory loaded."""
+    # Agent loading and memory reads hit storage, so keep them off the event loop
+    agents = await asyncio.to_thread(get_agents, user_guid)
+    # Per-request Assistant holds conversation state; agents and client are shared
+    assistant = await asyncio.to_thread(Assistant, agents, _get_openai_client())
+    
+    # Set user_guid if provided in the request or found in input
+    if user_guid:
+        assistant.user_guid = user_guid
+        await asyncio.to_thread(assistant._initialize_context_memory, user_guid)
+    elif is_guid_only:
+        assistant.user_guid = user_input.strip()
+        await asyncio.to_thread(assistant._initialize_context_memory, user_input.strip())
+    # Otherwise, the default GUID will be used (already set in __init__)
+    return assistant
+
 app = func.FunctionApp()
 
 @app.route(route="businessinsightbot_function", auth_level=func.AuthLevel.FUNCTION)
-def main(req: func.HttpRequest) -> func.HttpResponse:
+async def main(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('Python HTTP trigger function processed a request.')
 
     origin = req.headers.get('origin')
@@ -1237,28 +2171,12 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             headers=cors_headers
         )
 
-    # Ensure user_input is string, handle None case
-    user_input = req_body.get('user_input')
-    if user_input is None:
-        user_input = ""
-    else:
-        user_input = str(user_input)
-    
-    # Ensure conversation_history is list and contents are properly formatted
-    conversation_history = req_body.get('conversation_history', [])
-    if not isinstance(conversation_history, list):
-        conversation_history = []
-    
-    # Extract user_guid if provided in the request
-    user_guid = req_body.get('user_guid')
-
-    # Skip validation if input is just a GUID to load memory
-    is_guid_only = re.match(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', user_input.strip(), re.IGNORECASE)
+    user_input, conversation_history, user_guid, is_guid_only = _read_chat_request(req_body)
 
     # Validate user input for non-GUID requests
     if not is_guid_only and not user_input.strip():
         return func.HttpResponse(
-            json.dumps({
+            _json_dumps_bytes({
                 "error": "Missing or empty user_input in JSON payload"
             }),
             status_code=400,
@@ -1267,59 +2185,59 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         )
 
     try:
-        agents = load_agents_from_folder(user_guid)
-        # Create a new Assistant instance for each request
-        assistant = Assistant(agents)
-        
-        # Set user_guid if provided in the request or found in input
-        if user_guid:
-            assistant.user_guid = user_guid
-            assistant._initialize_context_memory(user_guid)
-        elif is_guid_only:
-            assistant.user_guid = user_input.strip()
-            assistant._initialize_context_memory(user_input.strip())
-        # Otherwise, the default GUID will be used (already set in __init__)
-            
-        assistant_response, voice_response, agent_logs = assistant.get_response(
-            user_input, conversation_history)
+        assistant = await _create_request_assistant(user_input, user_guid, is_guid_only)
+
+        assistant_response, voice_response, agent_logs = await assistant.get_response(
+            user_input, conversation_history, demo_state=req_body.get('demo_state'))
 
         # Include GUID and voice response in output
         response = {
             "assistant_response": str(assistant_response),
             "voice_response": str(voice_response),
             "agent_logs": str(agent_logs),
-            "user_guid": assistant.user_guid  # Return the GUID in use (could be default or provided)
+            "user_guid": assistant.user_guid,  # Return the GUID in use (could be default or provided)
+            "demo_state": assistant.demo_state  # Echo back as demo_state to skip the history scan
         }
 
         return func.HttpResponse(
-            json.dumps(response),
+            _json_dumps_bytes(response),
             mimetype="application/json",
             headers=cors_headers
         )
+    except ClientAuthenticationError as e:
+        # Cached credentials can expire (e.g., overnight idle) - reset so the next request re-authenticates
+        _reset_credentials_after_auth_error(e)
+        return _internal_error_response(e, cors_headers)
+    except HttpResponseError as e:
+        if e.status_code in (401, 403):
+            _reset_credentials_after_auth_error(e)
+        return _internal_error_response(e, cors_headers)
     except Exception as e:
-        error_str = str(e)
-
-        # Check for authentication/authorization errors and reset credential cache
-        # This handles cases where cached credentials have expired (e.g., overnight idle)
-        if any(auth_err in error_str for auth_err in [
-            'AuthenticationError', 'AuthorizationFailure', 'AuthenticationFailed',
-            '401', '403', 'token', 'credential', 'Unauthorized'
-        ]):
-            logging.warning(f"Auth error detected, resetting storage manager: {error_str}")
-            try:
-                from utils.storage_factory import reset_storage_manager
-                reset_storage_manager()
-                logging.info("Storage manager reset - next request will use fresh credentials")
-            except Exception as reset_err:
-                logging.error(f"Failed to reset storage manager: {reset_err}")
-
-        error_response = {
-            "error": "Internal server error",
-            "details": error_str
-        }
-        return func.HttpResponse(
-            json.dumps(error_response),
-            status_code=500,
-            mimetype="application/json",
-            headers=cors_headers
-        )
\ No newline at end of file
+        return _internal_error_response(e, cors_headers)
+
+
+def _reset_credentials_after_auth_error(error):
+    """Reset the storage manager (and agents holding it) after an authentication failure."""
+    logging.warning(f"Auth error detected, resetting storage manager: {error}")
+    try:
+        from utils.storage_factory import reset_storage_manager
+        reset_storage_manager()
+        # Cached agents hold the old storage manager, so reload them too
+        _clear_agents_cache()
+        logging.info("Storage manager reset - next request will use fresh credentials")
+    except Exception as reset_err:
+        logging.error(f"Failed to reset storage manager: {reset_err}")
+
+def _internal_error_response(error, cors_headers):
+    """500 JSON response for an unhandled request error."""
+    error_response = {
+        "error": "Internal server error",
+        "details": str(error)
+    }
+    return func.HttpResponse(
+        _json_dumps_bytes(error_response),
+        status_code=500,
+        mimetype="application/json",
+        headers=cors_headers
+    )
+
@@ -8,13 +8,57 @@ Usage:
     python3 automerge_agent.py                # Run continuously
     python3 automerge_agent.py --interval 10  # Check every 10 seconds
     python3 automerge_agent.py --dry-run      # Don't actually merge
+    python3 automerge_agent.py --webhook      # Merge on GitHub webhook deliveries
+
+Webhook mode listens for `pull_request` events (set the repo webhook's content
+type to application/json and its secret to GITHUB_WEBHOOK_SECRET) and keeps a
+slow poll running to catch missed deliveries.
 """
 
 import subprocess
 import json
+import os
+import hmac
+import hashlib
+import threading
 import time
 import argparse
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import requests
+except ImportError:
+    requests = None  # Merges fall back to the gh CLI
+
+
+# pull_request webhook actions that can make an evolution PR mergeable
+WEBHOOK_PR_ACTIONS = frozenset({"opened", "synchronize", "reopened", "ready_for_review"})
+# Fallback poll cadence in webhook mode, for deliveries GitHub dropped
+RECONCILE_INTERVAL = 600
+# GitHub computes mergeability after opened/synchronize deliveries are sent, so a
+# delivered PR is re-queried until it is known, up to this many times this far apart
+MERGEABILITY_ATTEMPTS = 5
+MERGEABILITY_RETRY_DELAY = 2
+
+# Merges per poll run in parallel, started MERGE_SUBMIT_SPACING apart to stay
+# under GitHub's secondary rate limits
+MERGE_WORKERS = 8
+MERGE_SUBMIT_SPACING = 0.1
+# Parallel squash merges into the same base race; the losers get 405 "Base branch
+# was modified" and are retried this many times, MERGE_RETRY_DELAY * attempt apart
+MERGE_BASE_MODIFIED_RETRIES = 3
+MERGE_RETRY_DELAY = 1
+
+# PR numbers being merged right now - webhook deliveries, the reconcile poll and
+# parallel workers must not merge the same PR twice
+_merges_in_flight = set()
+_merges_in_flight_lock = threading.Lock()
+
+GITHUB_API = "https://api.github.com"
+# Keep-alive session for REST merges: None until first use, False if unavailable
+_github_session = None
 
 
 def log(message):
@@ -23,23 +67,135 @@ def log(message):
     print(f"[{timestamp}] {message}")
 
 
+OPEN_PRS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: OPEN, first: 100, after: $cursor) {
+      nodes { number title state mergeable mergeStateStatus headRefName baseRefName isCrossRepository }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}
+"""
+
+
+# Last open-PR list per repo: {"etag", "prs", "fetched_at"}. Reused while GitHub
+# answers 304 Not Modified for the REST PR list (304s don't count against the
+# rate limit), unless some PR's mergeability was still UNKNOWN or the entry is
+# older than PR_CACHE_MAX_AGE - mergeability can change without the list changing.
+PR_CACHE_MAX_AGE = 300
+_pr_list_cache = {}
+
+
+PR_QUERY = """
+query($owner: String!, $name: String!, $number: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) { number title state mergeable mergeStateStatus headRefName baseRefName isCrossRepository }
+  }
+}
+"""
+
+
+def _pr_list_status(repo, etag=None):
+    """Conditionally request the REST open-PR list. Returns (HTTP status, ETag) or (None, None)."""
+    command = ["gh", "api", "-i", f"/repos/{repo}/pulls?state=open&per_page=100"]
+    if etag:
+        command += ["-H", f"If-None-Match: {etag}"]
+    # gh exits non-zero on a 304, so read the status line instead of checking the exit code
+    result = subprocess.run(command, capture_output=True, text=True)
+    
+    status, new_etag = None, None
+    for i, line in enumerate(result.stdout.splitlines()):
+        if i == 0:
+            parts = line.split()
+            if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+                return None, None
+            status = int(parts[1])
+        elif not line.strip():
+            break  # End of headers
+        elif line.lower().startswith("etag:"):
+            new_etag = line.split(":", 1)[1].strip()
+    return status, new_etag
+
+
 def get_open_prs(repo):
-    """Get list of open PRs from the repository."""
+    """Get list of open PRs from the repository, reusing the last list while it is unchanged."""
+    cached = _pr_list_cache.get(repo)
+    status, etag = _pr_list_status(repo, cached["etag"] if cached else None)
+    if (
+        status == 304 and cached
+        and time.monotonic() - cached["fetched_at"] < PR_CACHE_MAX_AGE
+        and all(pr.get("mergeable") != "UNKNOWN" for pr in cached["prs"])
+    ):
+        return cached["prs"]
+    
+    prs = _query_open_prs(repo)
+    if prs is not None and etag:
+        _pr_list_cache[repo] = {"etag": etag, "prs": prs, "fetched_at": time.monotonic()}
+    return prs or []
+
+
+def _query_open_prs(repo):
+    """Get open PRs with mergeability via GraphQL (one request per 100 PRs), or None on error."""
+    owner, name = repo.split("/", 1)
+    prs = []
+    cursor = None
+    try:
+        while True:
+            command = ["gh", "api", "graphql", "-f", f"query={OPEN_PRS_QUERY}",
+                       "-F", f"owner={owner}", "-F", f"name={name}"]
+            if cursor:
+                command += ["-f", f"cursor={cursor}"]
+            result = subprocess.run(
+                command,
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            page = json.loads(result.stdout)["data"]["repository"]["pullRequests"]
+            prs.extend(page["nodes"])
+            if not page["pageInfo"]["hasNextPage"]:
+                return prs
+            cursor = page["pageInfo"]["endCursor"]
+    except subprocess.CalledProcessError as e:
+        log(f"❌ Error fetching PRs: {e}")
+        return None
+    except (json.JSONDecodeError, KeyError, TypeError):
+        log("❌ Error parsing PR list")
+        return None
+
+
+def _query_pr(repo, pr_number):
+    """Get one PR with its mergeability via GraphQL, or None on error."""
+    owner, name = repo.split("/", 1)
     try:
         result = subprocess.run(
-            ["gh", "pr", "list", "--repo", repo, "--json", 
-             "number,title,state,mergeable,headRefName,baseRefName"],
+            ["gh", "api", "graphql", "-f", f"query={PR_QUERY}",
+             "-F", f"owner={owner}", "-F", f"name={name}", "-F", f"number={pr_number}"],
             capture_output=True,
             text=True,
             check=True
         )
-        return json.loads(result.stdout)
+        return json.loads(result.stdout)["data"]["repository"]["pullRequest"]
     except subprocess.CalledProcessError as e:
-        log(f"❌ Error fetching PRs: {e}")
-        return []
-    except json.JSONDecodeError:
-        log("❌ Error parsing PR list")
-        return []
+        log(f"❌ Error fetching PR #{pr_number}: {e}")
+        return None
+    except (json.JSONDecodeError, KeyError, TypeError):
+        log(f"❌ Error parsing PR #{pr_number}")
+        return None
+
+
+def resolve_mergeability(repo, pr):
+    """Re-query a webhook-delivered PR until GitHub has computed its mergeability."""
+    for attempt in range(MERGEABILITY_ATTEMPTS):
+        if attempt:
+            time.sleep(MERGEABILITY_RETRY_DELAY)
+        fetched = _query_pr(repo, pr["number"])
+        if fetched:
+            pr = fetched
+            if pr.get("mergeable") != "UNKNOWN":
+                break
+    return pr
 
 
 def is_evolution_pr(pr):
@@ -55,25 +211,131 @@ def can_merge(pr):
     return mergeable == "MERGEABLE" and base == "main"
 
 
-def merge_pr(repo, pr_number, dry_run=False):
-    """Merge a PR using squash merge."""
+def get_github_session():
+    """
+    Shared requests session authenticated with GITHUB_TOKEN (or `gh auth token`),
+    so merges reuse one keep-alive connection. None if requests or a token is missing.
+    """
+    global _github_session
+    if _github_session is None:
+        _github_session = False
+        token = os.environ.get("GITHUB_TOKEN")
+        if requests is not None and not token:
+            try:
+                token = subprocess.run(
+                    ["gh", "auth", "token"], capture_output=True, text=True, check=True
+                ).stdout.strip()
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                token = None
+        if requests is not None and token:
+            session = requests.Session()
+            session.headers.update({
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            })
+            _github_session = session
+    return _github_session or None
+
+
+def merge_pr(repo, pr_number, dry_run=False, head_ref=None):
+    """Merge a PR using squash merge, then delete head_ref (same-repo branches only)."""
     if dry_run:
         log(f"🔸 [Dry run] Would merge PR #{pr_number}")
         return True
     
+    session = get_github_session()
+    if session is None:
+        return _merge_pr_with_gh(repo, pr_number)
+    
     try:
+        for attempt in range(MERGE_BASE_MODIFIED_RETRIES + 1):
+            if attempt:
+                log(f"   🔁 PR #{pr_number}: base branch moved, retrying merge")
+                time.sleep(MERGE_RETRY_DELAY * attempt)
+            response = session.put(
+                f"{GITHUB_API}/repos/{repo}/pulls/{pr_number}/merge",
+                json={"merge_method": "squash"},
+                timeout=30
+            )
+            if not (response.status_code == 405 and _base_branch_modified(response.text)):
+                break
+        if response.status_code != 200:
+            log(f"❌ Failed to merge PR #{pr_number}: {response.status_code} {response.text}")
+            return False
+        
+        log(f"✅ Merged PR #{pr_number}")
+        # The open-PR list just changed
+        _pr_list_cache.pop(repo, None)
+        
+        if head_ref:
+            response = session.delete(f"{GITHUB_API}/repos/{repo}/git/refs/heads/{head_ref}", timeout=30)
+            # 422: already deleted (e.g. by the repo's auto-delete setting)
+            if response.status_code not in (204, 422):
+                log(f"⚠️  Merged PR #{pr_number} but could not delete {head_ref}: {response.status_code}")
+        return True
+    except requests.RequestException as e:
+        log(f"❌ Failed to merge PR #{pr_number}: {e}")
+        return False
+
+
+def _base_branch_modified(error_message):
+    """Whether a failed merge lost a race with another merge into the same base (GitHub's 405)."""
+    return "Base branch was modified" in error_message
+
+
+def _merge_pr_with_gh(repo, pr_number):
+    """Merge a PR through the gh CLI (used when no API token is available)."""
+    for attempt in range(MERGE_BASE_MODIFIED_RETRIES + 1):
+        if attempt:
+            log(f"   🔁 PR #{pr_number}: base branch moved, retrying merge")
+            time.sleep(MERGE_RETRY_DELAY * attempt)
         result = subprocess.run(
             ["gh", "pr", "merge", str(pr_number), "--repo", repo, 
              "--squash", "--delete-branch"],
             capture_output=True,
-            text=True,
-            check=True
+            text=True
         )
-        log(f"✅ Merged PR #{pr_number}")
-        return True
-    except subprocess.CalledProcessError as e:
-        log(f"❌ Failed to merge PR #{pr_number}: {e.stderr}")
+        if result.returncode == 0 or not _base_branch_modified(result.stderr):
+            break
+    
+    if result.returncode != 0:
+        log(f"❌ Failed to merge PR #{pr_number}: {result.stderr}")
         return False
+    
+    log(f"✅ Merged PR #{pr_number}")
+    # The open-PR list just changed
+    _pr_list_cache.pop(repo, None)
+    return True
+
+
+def process_pr(repo, pr, dry_run=False):
+    """Merge pr if it is a mergeable evolution PR. Returns True if it was merged."""
+    pr_num = pr.get("number")
+    title = pr.get("title", "")[:50]
+    
+    if not is_evolution_pr(pr):
+        log(f"   ⏭️  PR #{pr_num}: Not an evolution PR, skipping")
+        return False
+    
+    if not can_merge(pr):
+        mergeable = pr.get("mergeable", "UNKNOWN")
+        log(f"   ⏸️  PR #{pr_num}: Not mergeable ({mergeable})")
+        return False
+    
+    with _merges_in_flight_lock:
+        if pr_num in _merges_in_flight:
+            log(f"   ⏭️  PR #{pr_num}: Merge already in progress")
+            return False
+        _merges_in_flight.add(pr_num)
+    
+    log(f"   🔄 PR #{pr_num}: {title}...")
+    try:
+        head_ref = None if pr.get("isCrossRepository") else pr.get("headRefName")
+        return merge_pr(repo, pr_num, dry_run, head_ref)
+    finally:
+        with _merges_in_flight_lock:
+            _merges_in_flight.discard(pr_num)
 
 
 def run_agent(repo, interval=30, dry_run=False):
@@ -95,22 +357,23 @@ def run_agent(repo, interval=30, dry_run=False):
             else:
                 log(f"📬 Found {len(prs)} open PR(s)")
                 
+                # Only mergeable evolution PRs cost a worker and a spacing delay;
+                # process_pr just logs why each of the others is skipped
+                candidates = []
                 for pr in prs:
-                    pr_num = pr.get("number")
-                    title = pr.get("title", "")[:50]
-                    
-                    if not is_evolution_pr(pr):
-                        log(f"   ⏭️  PR #{pr_num}: Not an evolution PR, skipping")
-                        continue
-                    
-                    if not can_merge(pr):
-                        mergeable = pr.get("mergeable", "UNKNOWN")
-                        log(f"   ⏸️  PR #{pr_num}: Not mergeable ({mergeable})")
-                        continue
-                    
-                    log(f"   🔄 PR #{pr_num}: {title}...")
-                    if merge_pr(repo, pr_num, dry_run):
-                        total_merged += 1
+                    if is_evolution_pr(pr) and can_merge(pr):
+                        candidates.append(pr)
+                    else:
+                        process_pr(repo, pr, dry_run)
+                
+                # Merges are independent network round-trips, so overlap them
+                with ThreadPoolExecutor(max_workers=MERGE_WORKERS) as executor:
+                    futures = []
+                    for i, pr in enumerate(candidates):
+                        if i:
+                            time.sleep(MERGE_SUBMIT_SPACING)
+                        futures.append(executor.submit(process_pr, repo, pr, dry_run))
+                    total_merged += sum(future.result() for future in futures)
             
             log(f"💤 Sleeping {interval}s... (Total merged: {total_merged})\n")
             time.sleep(interval)
@@ -119,6 +382,89 @@ def run_agent(repo, interval=30, dry_run=False):
         log(f"\n\n⏹️  Agent stopped. Total PRs merged: {total_merged}")
 
 
+def verify_signature(secret, body, signature):
+    """Check a webhook body against its X-Hub-Signature-256 header."""
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+def pr_from_webhook(payload):
+    """Convert a pull_request webhook payload to the shape `gh pr list --json` returns."""
+    pr = payload.get("pull_request") or {}
+    # REST reports mergeable as true/false, or null while GitHub is still computing it
+    mergeable = {True: "MERGEABLE", False: "CONFLICTING"}.get(pr.get("mergeable"), "UNKNOWN")
+    return {
+        "number": pr.get("number"),
+        "title": pr.get("title", ""),
+        "state": (pr.get("state") or "").upper(),
+        "mergeable": mergeable,
+        "headRefName": (pr.get("head") or {}).get("ref", ""),
+        "baseRefName": (pr.get("base") or {}).get("ref", ""),
+        "isCrossRepository": (
+            ((pr.get("head") or {}).get("repo") or {}).get("full_name")
+            != ((pr.get("base") or {}).get("repo") or {}).get("full_name")
+        ),
+    }
+
+
+def run_webhook(repo, port=8080, dry_run=False, reconcile_interval=RECONCILE_INTERVAL):
+    """Merge evolution PRs as GitHub webhook deliveries arrive, with a slow poll as backup."""
+    secret = os.environ.get("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        log("❌ GITHUB_WEBHOOK_SECRET must be set to verify webhook deliveries")
+        return
+    
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if not verify_signature(secret, body, self.headers.get("X-Hub-Signature-256")):
+                self.send_response(401)
+                self.end_headers()
+                return
+            
+            # Acknowledge first - GitHub times out deliveries that take over 10s
+            self.send_response(204)
+            self.end_headers()
+            
+            if self.headers.get("X-GitHub-Event") != "pull_request":
+                return
+            try:
+                payload = json.loads(body)
+            except json.JSONDecodeError:
+                log("❌ Error parsing webhook payload")
+                return
+            if payload.get("action") not in WEBHOOK_PR_ACTIONS:
+                return
+            
+            pr = pr_from_webhook(payload)
+            log(f"📨 Webhook: PR #{pr['number']} {payload['action']}")
+            if is_evolution_pr(pr):
+                # Deliveries usually carry mergeable: null - ask GitHub for the real answer
+                pr = resolve_mergeability(repo, pr)
+            process_pr(repo, pr, dry_run)
+        
+        def log_message(self, format, *args):
+            pass  # Deliveries are logged above; skip http.server's access log
+    
+    log("🤖 Automerge Agent Starting (webhook mode)...")
+    log(f"   Repository: {repo}")
+    log(f"   Listening on port {port}")
+    log(f"   Reconcile interval: {reconcile_interval}s")
+    
+    # Poll occasionally anyway to catch deliveries GitHub failed to make
+    threading.Thread(
+        target=run_agent, args=(repo, reconcile_interval, dry_run), daemon=True
+    ).start()
+    
+    server = ThreadingHTTPServer(("", port), WebhookHandler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log("\n\n⏹️  Webhook receiver stopped.")
+    finally:
+        server.server_close()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Automerge Agent for RAPPverse")
     parser.add_argument("--repo", default="kody-w/CommunityRAPP", 
@@ -127,9 +473,18 @@ def main():
                         help="Seconds between checks (default: 15)")
     parser.add_argument("--dry-run", action="store_true",
                         help="Don't actually merge, just log")
+    parser.add_argument("--webhook", action="store_true",
+                        help="Merge on pull_request webhook deliveries instead of polling")
+    parser.add_argument("--port", type=int, default=8080,
+                        help="Webhook listen port (default: 8080)")
+    parser.add_argument("--reconcile-interval", type=int, default=RECONCILE_INTERVAL,
+                        help=f"Seconds between backup polls in webhook mode (default: {RECONCILE_INTERVAL})")
     
     args = parser.parse_args()
-    run_agent(args.repo, args.interval, args.dry_run)
+    if args.webhook:
+        run_webhook(args.repo, args.port, args.dry_run, args.reconcile_interval)
+    else:
+        run_agent(args.repo, args.interval, args.dry_run)
 
 
 if __name__ == "__main__":
@@ -16,70 +16,303 @@ import sys
 import json
 import shutil
 import argparse
+import filecmp
 import re
+import hashlib
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
+from dataclasses import dataclass
+from operator import attrgetter
 
+# orjson (optional) parses and serializes the large world-state JSONs several
+# times faster than stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
 
-SKIP_DIRS = {'node_modules', '.git', '__pycache__', '.pytest_cache', '.archive', '.steward-backup'}
+    def _canonical_json(data):
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+    def _write_json(data, f):
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+except ImportError:
+    _json_loads = json.loads
+
+    def _canonical_json(data):
+        return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    def _write_json(data, f):
+        f.write(json.dumps(data, indent=2, sort_keys=True).encode('utf-8'))
+
+# requests (optional) is imported by get_github_session on first use: only PR creation
+# needs it, and it is the slowest import for the scan/merge callers (agent, daemon)
+requests = None
+
+try:
+    import xxhash  # Optional - faster than hash()'s SipHash for deriving IDs from content
+    _fast_hash = xxhash.xxh3_64_intdigest
+except ImportError:
+    _fast_hash = hash
+
+try:
+    import ijson  # Optional - streams top-level JSON arrays instead of loading whole files
+except ImportError:
+    ijson = None
+
+_IJSON_ERRORS = (ijson.JSONError, ijson.IncompleteJSONError) if ijson is not None else ()
+
+# Journal marker for an ID that had no entry before a fold
+_MISSING = object()
+
+
+DEFAULT_ID_FIELDS = ['id', 'auction_id', 'post_id', 'card_id', 'bid_id', 'mystery_id', 'bounty_id']
+
+# Pruned by name straight from the directory listing; frozenset, as nothing may grow it at runtime
+SKIP_DIRS = frozenset({'node_modules', '.git', '__pycache__', '.pytest_cache', '.archive', '.steward-backup'})
 
 BACKUP_DIR = '.steward-backup'
 
+GITHUB_API = "https://api.github.com"
+# Keep-alive session for GitHub REST calls: None until first use, False if unavailable
+_github_session = None
+
+# Per-directory scan results, kept between runs in the user cache dir - never inside
+# the scanned tree, where the steward workflow would commit it
+SCAN_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'copilot-steward'
+)
+SCAN_CACHE_VERSION = 1
+
+# Threads listing directories in parallel during a scan (I/O-bound, so more than the cores)
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# 'name 5.json' -> ('name', '5', '.json'); used with fullmatch so it is anchored at both ends
+VERSIONED_NAME_RE = re.compile(r'(.+) (\d+)(\.[\w]+)?')
+
+
+@dataclass(slots=True)
+class Version:
+    """One file in a duplicate group; the canonical itself is version 0."""
+    path: str
+    filename: str
+    version: int
+    ext: str
+    canonical_path: str
+
+
+def _versioned_names(files_here):
+    """The names grouping needs from a directory: versioned files plus the canonicals they map to."""
+    match_versioned = VERSIONED_NAME_RE.fullmatch  # local binding for the hot loop
+    names = []
+    canonicals = set()
+    for filename in files_here:
+        # Every versioned name contains ' ' - a C-level substring test rejects most
+        # files before the regex engine is entered at all
+        if ' ' not in filename:
+            continue
+        match = match_versioned(filename)
+        if match:
+            names.append(filename)
+            canonicals.add(match.group(1) + (match.group(3) or ''))
+    names.extend(canonicals & files_here)
+    return names
+
+
+def _list_dir(path, cache, use_cache):
+    """
+    One directory's [mtime_ns, relevant filenames, subdirs] entry, or None if it can't be read.
+    DirEntry caches the file type from the directory listing, so no extra stat() per file.
+    With use_cache, a `cache` entry whose mtime still matches is returned as-is (the same
+    object, so callers can tell hits from re-listings) - adding, removing or renaming an
+    entry always bumps the directory's mtime. Without it the directory is not stat()ed at all.
+    """
+    mtime = None
+    if use_cache:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached
+    
+    files_here = set()
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    files_here.add(entry.name)
+                elif entry.name not in SKIP_DIRS and entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+    except OSError:
+        return None
+    return [mtime, _versioned_names(files_here), subdirs]
+
+
+def _list_dirs(paths, cache, use_cache):
+    """_list_dir over a batch of directories: (path, entry) pairs for the readable ones."""
+    listed = []
+    for path in paths:
+        entry = _list_dir(path, cache, use_cache)
+        if entry is not None:
+            listed.append((path, entry))
+    return listed
+
 
-def find_versioned_duplicates(root_path):
+def _scan_dirs(root_path, cache, fresh):
+    """
+    Walk the tree, yielding (dirpath, list of relevant filenames) per directory in pre-order.
+    Directories are listed concurrently on SCAN_WORKERS threads - scandir and stat release
+    the GIL, and on network or cold disks each listing is a blocking round trip - then
+    yielded in the same order a serial walk would produce, so results stay deterministic.
+    Every visited directory is recorded into `fresh`; with fresh=None caching is off.
+    """
+    use_cache = fresh is not None
+    entries = {}
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+        # One task per worker per tree level, each listing a strided slice of the level:
+        # per-directory futures would cost more than a warm local scandir
+        level = [root_path]
+        while level:
+            slices = [level[i::SCAN_WORKERS] for i in range(min(SCAN_WORKERS, len(level)))]
+            next_level = []
+            for paths in pool.map(_list_dirs, slices, repeat(cache), repeat(use_cache)):
+                for path, entry in paths:
+                    entries[path] = entry
+                    next_level.extend(entry[2])
+            level = next_level
+    
+    # Explicit stack, same pre-order as recursion: no recursion limit on deep trees
+    stack = [root_path]
+    while stack:
+        path = stack.pop()
+        entry = entries.get(path)
+        if entry is None:
+            continue
+        if use_cache:
+            fresh[path] = entry
+        yield path, entry[1]
+        stack.extend(reversed(entry[2]))
+
+
+def _scan_cache_path(root_path):
+    """The scan cache file for a tree: one per absolute root path."""
+    digest = hashlib.sha256(os.path.abspath(root_path).encode('utf-8', 'surrogateescape')).hexdigest()
+    return os.path.join(SCAN_CACHE_DIR, digest[:32] + '.json')
+
+
+def _load_scan_cache(cache_path):
+    """Load the dirpath -> [mtime_ns, names, subdirs] scan cache, or {} if missing or stale."""
+    try:
+        with open(cache_path, 'rb') as f:
+            cache = _json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get('version') != SCAN_CACHE_VERSION:
+        return {}
+    return cache.get('dirs', {})
+
+
+def _save_scan_cache(cache_path, dirs):
+    """Write the scan cache atomically (temp file + rename); a failed write only costs a full rescan."""
+    tmp_path = cache_path + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(_canonical_json({'version': SCAN_CACHE_VERSION, 'dirs': dirs}))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def find_versioned_duplicates(root_path, use_cache=True, scan_cache=None, save_cache=True):
     """
     Find all files with version suffixes like 'filename 5.json', 'filename 6.json'.
-    Groups them by their canonical (non-versioned) base name.
+    Groups them by their canonical (non-versioned) base name; only groups with something
+    to merge are returned, so callers need no second filtering pass.
+    With use_cache, directories unchanged since the last scan are not re-listed.
+    A long-running caller can pass its own `scan_cache` dict to keep the cache in memory
+    between calls: it is filled from disk when empty, updated in place, and the cache
+    file is only rewritten when some directory had to be listed again.
+    With save_cache=False (scan-only runs) the cache is read but the file is never written.
     """
-    pattern = re.compile(r'^(.+) (\d+)(\.[\w]+)?$')
+    match_versioned = VERSIONED_NAME_RE.fullmatch  # local binding for the hot loop
     groups = defaultdict(list)
+    cache_path = _scan_cache_path(root_path)
+    if not use_cache:
+        cache = {}
+    elif scan_cache:
+        cache = scan_cache
+    else:
+        cache = _load_scan_cache(cache_path)
+    fresh = {} if use_cache else None
     
-    for dirpath, dirnames, filenames in os.walk(root_path):
-        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+    for dirpath, names in _scan_dirs(root_path, cache, fresh):
+        files_here = set(names)
+        prefix = os.path.join(dirpath, '')  # joined once per directory, concatenated per file
         
-        for filename in filenames:
-            match = pattern.match(filename)
+        for filename in names:
+            # Canonicals ride along in `names`; the same ' ' test as the listing pass skips most of them
+            match = ' ' in filename and match_versioned(filename)
             if match:
                 base_name = match.group(1)
                 version_num = int(match.group(2))
                 ext = match.group(3) or ''
                 canonical = base_name + ext
-                full_path = os.path.join(dirpath, filename)
-                canonical_path = os.path.join(dirpath, canonical)
+                full_path = prefix + filename
+                canonical_path = prefix + canonical
                 
-                groups[(dirpath, canonical)].append({
-                    'path': full_path,
-                    'filename': filename,
-                    'version': version_num,
-                    'ext': ext,
-                    'canonical_path': canonical_path
-                })
-    
-    # Also check if canonical version exists
-    for (dirpath, canonical), versions in groups.items():
-        canonical_path = os.path.join(dirpath, canonical)
-        if os.path.exists(canonical_path):
-            versions.append({
-                'path': canonical_path,
-                'filename': canonical,
-                'version': 0,  # Canonical is version 0
-                'ext': versions[0]['ext'] if versions else '',
-                'canonical_path': canonical_path
-            })
-        # Sort by version number
-        versions.sort(key=lambda x: x['version'])
+                key = (dirpath, canonical)
+                if key not in groups:
+                    # Also add the canonical if it exists - already listed, no stat needed
+                    if canonical in files_here:
+                        # Canonical is version 0
+                        groups[key].append(Version(canonical_path, canonical, 0, ext, canonical_path))
+                groups[key].append(Version(full_path, filename, version_num, ext, canonical_path))
+    
+    # Sort by version number, dropping the one group shape with nothing to merge:
+    # a lone 'name 0.ext' with no canonical beside it
+    nothing_to_merge = []
+    for key, versions in groups.items():
+        if len(versions) == 1 and versions[0].version == 0:
+            nothing_to_merge.append(key)
+        else:
+            versions.sort(key=attrgetter('version'))
+    for key in nothing_to_merge:
+        del groups[key]
+    
+    if use_cache:
+        changed = len(fresh) != len(cache) or any(entry is not cache.get(path) for path, entry in fresh.items())
+        if changed and save_cache:
+            _save_scan_cache(cache_path, fresh)
+        if scan_cache is not None:
+            scan_cache.clear()
+            scan_cache.update(fresh)
     
     return groups
 
 
+def _rel_path(path, root_path):
+    """os.path.relpath for paths the scan built under root_path, by slicing instead of normalizing."""
+    root_prefix = os.path.join(root_path, '')
+    if path.startswith(root_prefix):
+        return path[len(root_prefix):]
+    return os.path.relpath(path, root_path)
+
+
 def merge_json_by_id(data_list, id_fields=None):
     """
     Merge multiple JSON data structures, unioning arrays by ID.
     """
     if id_fields is None:
-        id_fields = ['id', 'auction_id', 'post_id', 'card_id', 'bid_id', 'mystery_id', 'bounty_id']
+        id_fields = DEFAULT_ID_FIELDS
     
     if not data_list:
         return {}
@@ -128,65 +361,119 @@ def merge_arrays_by_id(items, id_fields):
     if not items:
         return []
     
-    # If items are simple types, just dedupe
+    # If items are simple types, just dedupe - linear, order-preserving
     if not isinstance(items[0], dict):
-        seen = []
-        for item in items:
-            if item not in seen:
-                seen.append(item)
-        return seen
+        try:
+            return list(dict.fromkeys(items))
+        except TypeError:
+            # Unhashable members (nested lists/dicts) - dedupe on their repr instead
+            seen = set()
+            unique = []
+            for item in items:
+                key = repr(item)
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(item)
+            return unique
     
     seen = {}
+    hashes = {}
     for item in items:
-        # Find ID from known ID fields
-        item_id = None
-        for field in id_fields:
-            if field in item:
-                item_id = item[field]
-                break
+        _fold_item_by_id(seen, item, id_fields, hashes)
+    
+    return _sorted_by_id(seen, id_fields)
+
+
+def _content_hash(item):
+    """Compact digest of an item's canonical JSON, for exact-duplicate checks."""
+    return hashlib.blake2b(_canonical_json(item), digest_size=16).digest()
+
+
+def _fold_item_by_id(seen, item, id_fields, hashes, journal=None):
+    """
+    Add one array item to `seen` (ID -> item), resolving duplicate IDs.
+    Incremental half of merge_arrays_by_id, so arrays can be folded in as they stream.
+    `hashes` caches content digests of the kept items (ID -> digest), computed on first collision.
+    With `journal`, the prior state of the touched ID is appended so _rollback_fold can undo the fold.
+    """
+    if not isinstance(item, dict):
+        key = ('value', repr(item))
+        if key not in seen:
+            if journal is not None:
+                journal.append((key, _MISSING, _MISSING))
+            seen[key] = item
+        return
+    
+    # Find ID from known ID fields
+    item_id = None
+    for field in id_fields:
+        if field in item:
+            item_id = item[field]
+            break
+    
+    if item_id is None:
+        # No ID field - generate hash from content (excluding timestamps)
+        item_copy = {k: v for k, v in item.items() 
+                    if k not in ('timestamp', 'last_updated', 'created_at', 'updated_at')}
+        try:
+            item_id = f"hash_{_fast_hash(_canonical_json(item_copy))}"
+        except:
+            item_id = f"hash_{id(item)}"
+    
+    if journal is not None:
+        journal.append((item_id, seen.get(item_id, _MISSING), hashes.get(item_id, _MISSING)))
+    
+    if item_id not in seen:
+        seen[item_id] = item
+    else:
+        # Duplicate ID found - keep the one with more data or latest timestamp
+        existing = seen[item_id]
         
-        if item_id is None:
-            # No ID field - generate hash from content (excluding timestamps)
-            item_copy = {k: v for k, v in item.items() 
-                        if k not in ('timestamp', 'last_updated', 'created_at', 'updated_at')}
-            try:
-                item_id = f"hash_{hash(json.dumps(item_copy, sort_keys=True))}"
-            except:
-                item_id = f"hash_{id(item)}"
+        # Check if content is identical (true duplicate) - each item is serialized once
+        existing_hash = hashes.get(item_id)
+        if existing_hash is None:
+            existing_hash = hashes[item_id] = _content_hash(existing)
+        item_hash = _content_hash(item)
+        if item_hash == existing_hash:
+            return  # Exact duplicate, skip
+        
+        # Different content - pick the better one
+        new_ts = item.get('timestamp', item.get('last_updated', item.get('created_at', '')))
+        old_ts = existing.get('timestamp', existing.get('last_updated', existing.get('created_at', '')))
+        new_tick = item.get('tick', item.get('current_tick', 0)) or 0
+        old_tick = existing.get('tick', existing.get('current_tick', 0)) or 0
         
-        if item_id not in seen:
+        # Prefer: higher tick > later timestamp > more fields
+        if (new_tick > old_tick
+                or (new_tick == old_tick and new_ts > old_ts)
+                or (new_tick == old_tick and new_ts == old_ts and len(item) > len(existing))):
             seen[item_id] = item
+            hashes[item_id] = item_hash
+
+
+def _rollback_fold(seen, hashes, journal):
+    """Undo the folds recorded in `journal`, newest first."""
+    for key, item, item_hash in reversed(journal):
+        if item is _MISSING:
+            seen.pop(key, None)
         else:
-            # Duplicate ID found - keep the one with more data or latest timestamp
-            existing = seen[item_id]
-            
-            # Check if content is identical (true duplicate)
-            if json.dumps(item, sort_keys=True) == json.dumps(existing, sort_keys=True):
-                continue  # Exact duplicate, skip
-            
-            # Different content - pick the better one
-            new_ts = item.get('timestamp', item.get('last_updated', item.get('created_at', '')))
-            old_ts = existing.get('timestamp', existing.get('last_updated', existing.get('created_at', '')))
-            new_tick = item.get('tick', item.get('current_tick', 0)) or 0
-            old_tick = existing.get('tick', existing.get('current_tick', 0)) or 0
-            
-            # Prefer: higher tick > later timestamp > more fields
-            if new_tick > old_tick:
-                seen[item_id] = item
-            elif new_tick == old_tick and new_ts > old_ts:
-                seen[item_id] = item
-            elif new_tick == old_tick and new_ts == old_ts and len(item) > len(existing):
-                seen[item_id] = item
-    
-    # Sort results for consistent output
+            seen[key] = item
+        if item_hash is _MISSING:
+            hashes.pop(key, None)
+        else:
+            hashes[key] = item_hash
+
+
+def _sorted_by_id(seen, id_fields):
+    """Sort the merged items in `seen` for consistent output."""
     result = list(seen.values())
     try:
         # Try to sort by ID field, then by timestamp
         def sort_key(x):
             for field in id_fields:
-                if field in x:
+                if isinstance(x, dict) and field in x:
                     return (0, str(x[field]))
-            return (1, x.get('timestamp', ''))
+            return (1, x.get('timestamp', '') if isinstance(x, dict) else '')
         result.sort(key=sort_key)
     except:
         pass
@@ -194,9 +481,19 @@ def merge_arrays_by_id(items, id_fields):
     return result
 
 
+def _starts_with_array(f):
+    """Peek whether a binary JSON file holds a top-level array, leaving it at offset 0."""
+    head = f.read(64).lstrip()
+    f.seek(0)
+    return head[:1] == b'['
+
+
 def backup_files(versions, root_path):
     """
     Backup all version files before merging.
+    Backups are hardlinks where the filesystem allows, so no file content is copied.
+    That is safe because merging never writes into an existing file: the canonical is
+    replaced by rename and duplicates are only unlinked, leaving the backup inode intact.
     Returns backup directory path.
     """
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -204,16 +501,43 @@ def backup_files(versions, root_path):
     os.makedirs(backup_base, exist_ok=True)
     
     for v in versions:
-        if os.path.exists(v['path']):
+        if os.path.exists(v.path):
             # Preserve relative path structure in backup
-            rel_path = os.path.relpath(v['path'], root_path)
+            rel_path = _rel_path(v.path, root_path)
             backup_path = os.path.join(backup_base, rel_path)
             os.makedirs(os.path.dirname(backup_path), exist_ok=True)
-            shutil.copy2(v['path'], backup_path)
+            try:
+                os.link(v.path, backup_path)
+            except OSError:
+                # Cross-device, no hardlink support, or already backed up - copy instead
+                shutil.copy2(v.path, backup_path)
     
     return backup_base
 
 
+def _differs_from(version, highest):
+    """
+    Whether a sibling holds content the take-highest strategy would lose.
+    Empty files hold nothing; a size mismatch answers without reading either file.
+    """
+    try:
+        size = os.stat(version.path).st_size
+        if size == 0:
+            return False
+        if size != os.stat(highest.path).st_size:
+            return True
+        return not filecmp.cmp(version.path, highest.path, shallow=False)
+    except OSError:
+        return True
+
+
+def _replace_file(src_path, dst_path):
+    """Copy src over dst via a temp file and rename, never writing into dst's existing inode."""
+    tmp_path = dst_path + '.steward-tmp'
+    shutil.copy2(src_path, tmp_path)
+    os.replace(tmp_path, dst_path)
+
+
 def merge_file_group(versions, dry_run=False, root_path='.'):
     """
     Merge a group of versioned files into the canonical version.
@@ -223,63 +547,99 @@ def merge_file_group(versions, dry_run=False, root_path='.'):
     if not versions:
         return False, "No versions to merge", None
     
-    canonical_path = versions[0]['canonical_path']
-    ext = versions[0]['ext']
+    canonical_path = versions[0].canonical_path
+    ext = versions[0].ext
     
     # Sort by version (highest last = most recent)
-    versions = sorted(versions, key=lambda x: x['version'])
+    versions = sorted(versions, key=attrgetter('version'))
     
     if dry_run:
         return True, f"Would merge {len(versions)} versions", canonical_path
     
     try:
-        # SAFETY: Backup all files before any merge operation
-        backup_path = backup_files(versions, root_path)
+        # SAFETY: Backup files before any merge operation. A JSON merge consumes every
+        # version; taking the highest only loses siblings whose content differs from it.
         if ext == '.json':
-            # JSON merge
-            data_list = []
+            backup_files(versions, root_path)
+        else:
+            highest = versions[-1]
+            backup_files([v for v in versions if v is not highest and _differs_from(v, highest)], root_path)
+        
+        if ext == '.json':
+            # JSON merge - fold one file at a time so only the running result and
+            # the current file are in memory, not every version at once
+            merged = None
+            array_seen = None  # ID -> item while streaming top-level arrays
+            array_hashes = {}
+            merged_count = 0
             for v in versions:
                 try:
-                    with open(v['path'], 'r') as f:
-                        data_list.append(json.load(f))
-                except json.JSONDecodeError as e:
-                    print(f"  ⚠️ Skipping invalid JSON: {v['filename']} - {e}")
+                    with open(v.path, 'rb') as f:
+                        streamable = ijson is not None and _starts_with_array(f)
+                        if merged_count == 0:
+                            array_seen = {} if streamable else None
+                        if streamable and array_seen is not None:
+                            # Each item is folded as it parses, so only the running union is held.
+                            # A file that breaks off mid-stream is rolled back and contributes
+                            # nothing, like any invalid file
+                            journal = []
+                            try:
+                                for item in ijson.items(f, 'item', use_float=True):
+                                    _fold_item_by_id(array_seen, item, DEFAULT_ID_FIELDS, array_hashes, journal)
+                            except _IJSON_ERRORS:
+                                _rollback_fold(array_seen, array_hashes, journal)
+                                raise
+                        elif array_seen is not None:
+                            items = _json_loads(f.read())
+                            if not isinstance(items, list):
+                                # Deleting it after a union that can't include it would lose its data
+                                return False, f"{v.filename} is not a JSON array like the other versions", canonical_path
+                            for item in items:
+                                _fold_item_by_id(array_seen, item, DEFAULT_ID_FIELDS, array_hashes)
+                        else:
+                            data = _json_loads(f.read())
+                            merged = data if merged is None else merge_json_by_id([merged, data])
+                    merged_count += 1
+                except (json.JSONDecodeError, *_IJSON_ERRORS) as e:
+                    print(f"  ⚠️ Skipping invalid JSON: {v.filename} - {e}")
                     continue
             
-            if not data_list:
+            if not merged_count:
                 return False, "No valid JSON files to merge", canonical_path
             
-            merged = merge_json_by_id(data_list)
+            if array_seen is not None:
+                merged = _sorted_by_id(array_seen, DEFAULT_ID_FIELDS)
             
             # Update metadata
             if isinstance(merged, dict):
                 merged['last_updated'] = datetime.utcnow().isoformat() + 'Z'
                 merged['_merged_by'] = 'copilot-steward'
-                merged['_merged_from'] = [v['filename'] for v in versions]
+                merged['_merged_from'] = [v.filename for v in versions]
             
-            with open(canonical_path, 'w') as f:
-                json.dump(merged, f, indent=2)
+            # Write beside and rename over, so a hardlinked backup of the old canonical survives
+            tmp_path = canonical_path + '.steward-tmp'
+            with open(tmp_path, 'wb') as f:
+                _write_json(merged, f)
+            os.replace(tmp_path, canonical_path)
             
-            msg = f"Merged {len(data_list)} JSON files"
+            msg = f"Merged {merged_count} JSON files"
         
         elif ext in ['.md', '.txt']:
             # Markdown/text - take highest version
-            highest = max(versions, key=lambda x: x['version'])
-            if highest['path'] != canonical_path:
-                shutil.copy2(highest['path'], canonical_path)
-            msg = f"Took version {highest['version']} as canonical"
+            if highest.path != canonical_path:
+                _replace_file(highest.path, canonical_path)
+            msg = f"Took version {highest.version} as canonical"
         
         else:
             # Other files - take highest version
-            highest = max(versions, key=lambda x: x['version'])
-            if highest['path'] != canonical_path:
-                shutil.copy2(highest['path'], canonical_path)
-            msg = f"Took version {highest['version']} as canonical"
+            if highest.path != canonical_path:
+                _replace_file(highest.path, canonical_path)
+            msg = f"Took version {highest.version} as canonical"
         
         # Delete versioned duplicates (not the canonical)
         for v in versions:
-            if v['path'] != canonical_path and os.path.exists(v['path']):
-                os.remove(v['path'])
+            if v.path != canonical_path and os.path.exists(v.path):
+                os.remove(v.path)
         
         return True, msg, canonical_path
     
@@ -298,12 +658,54 @@ def create_manifest(merges, root_path):
     }
     
     manifest_path = os.path.join(root_path, '.steward-manifest.json')
-    with open(manifest_path, 'w') as f:
-        json.dump(manifest, f, indent=2)
+    with open(manifest_path, 'wb') as f:
+        _write_json(manifest, f)
     
     return manifest_path
 
 
+def get_github_session():
+    """
+    Shared requests session authenticated with GITHUB_TOKEN (or `gh auth token`),
+    reused for every GitHub call in a steward run. None if requests or a token is missing.
+    """
+    global _github_session, requests
+    if _github_session is None:
+        _github_session = False
+        try:
+            import requests
+        except ImportError:
+            requests = None  # PRs are opened with the gh CLI instead
+        token = os.environ.get("GITHUB_TOKEN")
+        if requests is not None and not token:
+            try:
+                token = subprocess.run(
+                    ["gh", "auth", "token"], capture_output=True, text=True, check=True
+                ).stdout.strip()
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                token = None
+        if requests is not None and token:
+            session = requests.Session()
+            session.headers.update({
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            })
+            _github_session = session
+    return _github_session or None
+
+
+def _default_branch(session, repo):
+    """The repo's default branch (the base `gh pr create` would pick), or None on error."""
+    try:
+        response = session.get(f"{GITHUB_API}/repos/{repo}", timeout=30)
+        if response.status_code == 200:
+            return response.json().get("default_branch")
+    except requests.RequestException:
+        pass
+    return None
+
+
 def create_pr(root_path, merges, repo='kody-w/CommunityRAPP'):
     """Create a GitHub PR with the merged changes."""
     os.chdir(root_path)
@@ -333,8 +735,9 @@ Total: {sum(len(m.get('sources', [])) for m in merges)} files consolidated into
     
     subprocess.run(['git', 'commit', '-m', commit_msg], check=True)
     
-    # Push
-    subprocess.run(['git', 'push', 'origin', branch_name], check=True)
+    # Push in the background - building the PR body, resolving the API token and
+    # looking up the base branch don't depend on it, so they overlap the upload
+    push = subprocess.Popen(['git', 'push', 'origin', branch_name])
     
     # Create PR
     pr_body = f"""## 📚 Copilot Steward - Auto-Merge Report
@@ -366,9 +769,29 @@ Automatically merged versioned duplicate files into master versions.
 *Generated by Copilot Steward - The Organizing Librarian*
 """
     
+    title = f'[Steward] Auto-merge {len(merges)} duplicate file groups'
+    session = get_github_session()
+    base = _default_branch(session, repo) if session is not None else None
+    
+    if push.wait() != 0:
+        raise subprocess.CalledProcessError(push.returncode, push.args)
+    
+    if base:
+        try:
+            response = session.post(
+                f"{GITHUB_API}/repos/{repo}/pulls",
+                json={"title": title, "head": branch_name, "base": base, "body": pr_body},
+                timeout=30
+            )
+            if response.status_code == 201:
+                return True, response.json()["html_url"]
+            return False, f"{response.status_code} {response.text}"
+        except requests.RequestException as e:
+            return False, str(e)
+    
     result = subprocess.run(
         ['gh', 'pr', 'create', 
-         '--title', f'[Steward] Auto-merge {len(merges)} duplicate file groups',
+         '--title', title,
          '--body', pr_body,
          '--repo', repo],
         capture_output=True,
@@ -405,15 +828,9 @@ def main():
     print(f"🔍 Scanning for versioned duplicates in: {root_path}")
     print()
     
-    groups = find_versioned_duplicates(root_path)
-    
-    if not groups:
-        print("✨ No versioned duplicates found! Repository is clean.")
-        return 0
-    
-    # Filter to groups with actual duplicates (>1 version)
-    duplicate_groups = {k: v for k, v in groups.items() if len(v) > 1 or 
-                       (len(v) == 1 and v[0]['version'] > 0)}
+    # Scan-only runs (--scan, --dry-run, no action) leave no files behind, the cache included
+    scan_only = args.scan or args.dry_run or (not args.auto and not args.pr)
+    duplicate_groups = find_versioned_duplicates(root_path, save_cache=not scan_only)
     
     if not duplicate_groups:
         print("✨ No versioned duplicates found! Repository is clean.")
@@ -425,12 +842,12 @@ def main():
     
     # Display groups
     for (dirpath, canonical), versions in sorted(duplicate_groups.items()):
-        rel_dir = os.path.relpath(dirpath, root_path)
+        rel_dir = _rel_path(dirpath, root_path)
         print(f"📁 {rel_dir}/")
-        for v in sorted(versions, key=lambda x: x['version']):
+        for v in sorted(versions, key=attrgetter('version')):
             marker = "└──" if v == versions[-1] else "├──"
-            ver_label = f"(v{v['version']})" if v['version'] > 0 else "(master)"
-            print(f"  {marker} {v['filename']} {ver_label}")
+            ver_label = f"(v{v.version})" if v.version > 0 else "(master)"
+            print(f"  {marker} {v.filename} {ver_label}")
         print(f"  → Merge to: {canonical}")
         print()
     
@@ -453,24 +870,31 @@ def main():
     success_count = 0
     fail_count = 0
     
-    for (dirpath, canonical), versions in duplicate_groups.items():
-        rel_canonical = os.path.relpath(os.path.join(dirpath, canonical), root_path)
-        print(f"📝 Merging: {rel_canonical}")
-        
-        success, msg, canonical_path = merge_file_group(versions, dry_run=args.dry_run, root_path=root_path)
-        
-        if success:
-            print(f"  ✅ {msg}")
-            success_count += 1
-            merges.append({
-                'canonical': rel_canonical,
-                'sources': [v['filename'] for v in versions if v['version'] > 0],
-                'strategy': 'union_by_id' if versions[0]['ext'] == '.json' else 'latest_version',
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            })
-        else:
-            print(f"  ❌ {msg}")
-            fail_count += 1
+    # Groups touch disjoint files, so JSON parsing/merging fans out across cores;
+    # results come back in order and are reported from this process
+    tasks = list(duplicate_groups.items())
+    task_versions = [versions for _, versions in tasks]
+    merge_group = partial(merge_file_group, dry_run=args.dry_run, root_path=root_path)
+    with ProcessPoolExecutor() as executor:
+        # Worker processes start lazily, so a dry run never spawns any
+        run = map if args.dry_run else executor.map
+        results = run(merge_group, task_versions)
+        for ((dirpath, canonical), versions), (success, msg, canonical_path) in zip(tasks, results):
+            rel_canonical = _rel_path(versions[0].canonical_path, root_path)
+            print(f"📝 Merging: {rel_canonical}")
+            
+            if success:
+                print(f"  ✅ {msg}")
+                success_count += 1
+                merges.append({
+                    'canonical': rel_canonical,
+                    'sources': [v.filename for v in versions if v.version > 0],
+                    'strategy': 'union_by_id' if versions[0].ext == '.json' else 'latest_version',
+                    'timestamp': datetime.utcnow().isoformat() + 'Z'
+                })
+            else:
+                print(f"  ❌ {msg}")
+                fail_count += 1
     
     print()
     print("─" * 60)
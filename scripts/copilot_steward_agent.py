@@ -19,11 +19,29 @@ import sys
 import os
 import json
 import argparse
+import re
 import subprocess
 import shutil
-from datetime import datetime
+import time
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
 
+# orjson (optional) is several times faster than stdlib json for the prompt and status files
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps_indented(data) -> str:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps_indented(data) -> str:
+        return json.dumps(data, indent=2)
+
 # Add scripts directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -31,42 +49,62 @@ from copilot_steward import (
     find_versioned_duplicates,
     merge_file_group,
     create_manifest,
-    SKIP_DIRS
+    SKIP_DIRS,
+    BACKUP_DIR
 )
 
 
+# Merge groups per Copilot CLI review call, and the diff sample bytes shared among them
+REVIEW_BATCH_SIZE = 10
+REVIEW_DIFF_LIMIT = 4000
+
+# Concurrent Copilot CLI processes, and CLI calls started per rolling minute
+REVIEW_MAX_CONCURRENCY = int(os.environ.get('STEWARD_MAX_CONCURRENCY', '8'))
+REVIEW_RATE_PER_MINUTE = int(os.environ.get('STEWARD_REVIEWS_PER_MINUTE', '60'))
+
+
 # ============================================================================
 # Check for Copilot CLI availability
 # ============================================================================
 
+@lru_cache(maxsize=1)
 def check_copilot_cli() -> bool:
-    """Check if Copilot CLI is available."""
+    """
+    Check if Copilot CLI is available. Checked lazily and once per process: a PATH
+    lookup rules it out without spawning anything, `copilot --version` confirms it runs.
+    """
+    copilot_path = shutil.which('copilot')
+    if not copilot_path:
+        return False
     try:
         result = subprocess.run(
-            ['copilot', '--version'],
+            [copilot_path, '--version'],
             capture_output=True,
             text=True,
             timeout=10
         )
         return result.returncode == 0
-    except (FileNotFoundError, subprocess.TimeoutExpired):
+    except (OSError, subprocess.TimeoutExpired):
         return False
 
-HAS_COPILOT_CLI = check_copilot_cli()
-
 
 # ============================================================================
 # Steward Tool Implementations
 # ============================================================================
 
+@lru_cache(maxsize=8)
+def _scan_cached(root_path: str) -> dict:
+    """
+    find_versioned_duplicates, shared by the scan, dry-run and merge passes of one run.
+    Cleared at the start of each auto run and whenever a real merge changes the tree.
+    """
+    return find_versioned_duplicates(root_path)
+
+
 def scan_for_duplicates(path: str = ".") -> dict:
     """Scan directory for versioned duplicate files."""
-    root_path = os.path.abspath(path)
-    groups = find_versioned_duplicates(root_path)
-    
-    # Filter to actual duplicates
-    duplicate_groups = {k: v for k, v in groups.items() if len(v) > 1 or 
-                       (len(v) == 1 and v[0]['version'] > 0)}
+    root_path = path if os.path.isabs(path) else os.path.abspath(path)
+    duplicate_groups = _scan_cached(root_path)
     
     if not duplicate_groups:
         return {
@@ -85,7 +123,7 @@ def scan_for_duplicates(path: str = ".") -> dict:
         groups_list.append({
             "directory": rel_dir,
             "canonical": canonical,
-            "versions": [v['filename'] for v in sorted(versions, key=lambda x: x['version'])],
+            "versions": [v.filename for v in sorted(versions, key=attrgetter('version'))],
             "version_count": len(versions)
         })
     
@@ -100,11 +138,8 @@ def scan_for_duplicates(path: str = ".") -> dict:
 
 def merge_duplicates(path: str = ".", dry_run: bool = False) -> dict:
     """Merge versioned duplicate files into canonical versions."""
-    root_path = os.path.abspath(path)
-    groups = find_versioned_duplicates(root_path)
-    
-    duplicate_groups = {k: v for k, v in groups.items() if len(v) > 1 or 
-                       (len(v) == 1 and v[0]['version'] > 0)}
+    root_path = path if os.path.isabs(path) else os.path.abspath(path)
+    duplicate_groups = _scan_cached(root_path)
     
     if not duplicate_groups:
         return {
@@ -118,6 +153,10 @@ def merge_duplicates(path: str = ".", dry_run: bool = False) -> dict:
     success_count = 0
     fail_count = 0
     
+    if not dry_run:
+        # The files are about to change - later scans must see the merged tree
+        _scan_cached.cache_clear()
+    
     for (dirpath, canonical), versions in duplicate_groups.items():
         rel_canonical = os.path.relpath(os.path.join(dirpath, canonical), root_path)
         
@@ -127,7 +166,7 @@ def merge_duplicates(path: str = ".", dry_run: bool = False) -> dict:
             success_count += 1
             merges.append({
                 "canonical": rel_canonical,
-                "sources": [v['filename'] for v in versions if v['version'] > 0],
+                "sources": [v.filename for v in versions if v.version > 0],
                 "message": msg
             })
         else:
@@ -135,11 +174,13 @@ def merge_duplicates(path: str = ".", dry_run: bool = False) -> dict:
     
     # Create manifest if not dry run
     if not dry_run and merges:
+        # One timestamp for the whole run; same '...Z' format as utcnow().isoformat() + 'Z'
+        timestamp = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
         manifest_merges = [{
             'canonical': m['canonical'],
             'sources': m['sources'],
             'strategy': 'union_by_id',
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
+            'timestamp': timestamp
         } for m in merges]
         create_manifest(manifest_merges, root_path)
     
@@ -148,10 +189,41 @@ def merge_duplicates(path: str = ".", dry_run: bool = False) -> dict:
         "message": f"{'Would merge' if dry_run else 'Merged'} {success_count} groups, {fail_count} failed",
         "merged": success_count,
         "failed": fail_count,
-        "merges": merges[:10]  # Limit output
+        # Every merged group: the review gate must see all of what commit_and_push commits
+        "merges": merges
     }
 
 
+# path -> (mtime_ns, parsed JSON); status files only change when a merge runs
+_status_file_cache = {}
+
+
+def _load_status_file(path: str):
+    """Parse a steward state file, re-reading it only when its mtime changes. None if missing or invalid."""
+    path = os.path.abspath(path)  # relative names are resolved against the current directory
+    try:
+        # One open per call: the mtime comes from fstat on the same descriptor that is read
+        with open(path, 'rb') as f:
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            cached = _status_file_cache.get(path)
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1]
+            raw = f.read()
+    except OSError:
+        _status_file_cache.pop(path, None)
+        return None
+    
+    try:
+        data = _json_loads(raw)
+    except ValueError:
+        # ValueError covers JSONDecodeError (stdlib and orjson) and undecodable bytes
+        data = None
+    if not isinstance(data, dict):
+        data = None
+    _status_file_cache[path] = (mtime_ns, data)
+    return data
+
+
 def get_steward_status() -> dict:
     """Get the current steward status and last run info."""
     manifest_path = ".steward-manifest.json"
@@ -164,29 +236,21 @@ def get_steward_status() -> dict:
         "daemon_state": None
     }
     
-    if os.path.exists(manifest_path):
-        try:
-            with open(manifest_path) as f:
-                manifest = json.load(f)
-                status["last_manifest"] = {
-                    "last_run": manifest.get("last_run"),
-                    "total_groups_merged": manifest.get("total_groups_merged"),
-                    "total_files_consolidated": manifest.get("total_files_consolidated")
-                }
-        except:
-            pass
-    
-    if os.path.exists(daemon_state_path):
-        try:
-            with open(daemon_state_path) as f:
-                state = json.load(f)
-                status["daemon_state"] = {
-                    "last_run": state.get("last_run"),
-                    "total_merges": state.get("total_merges"),
-                    "prs_created": len(state.get("prs_created", []))
-                }
-        except:
-            pass
+    manifest = _load_status_file(manifest_path)
+    if manifest is not None:
+        status["last_manifest"] = {
+            "last_run": manifest.get("last_run"),
+            "total_groups_merged": manifest.get("total_groups_merged"),
+            "total_files_consolidated": manifest.get("total_files_consolidated")
+        }
+    
+    state = _load_status_file(daemon_state_path)
+    if state is not None:
+        status["daemon_state"] = {
+            "last_run": state.get("last_run"),
+            "total_merges": state.get("total_merges"),
+            "prs_created": len(state.get("prs_created", []))
+        }
     
     return status
 
@@ -195,47 +259,102 @@ def get_steward_status() -> dict:
 # Copilot CLI Agent (uses invoked agent, no SDK required)
 # ============================================================================
 
-def run_copilot_cli_review(prompt: str) -> tuple[bool, str]:
+# A batched review's verdict for group <n>: a line starting (after any list or emphasis
+# markup) with APPROVED_<n> or REJECTED_<n>. Mentions mid-sentence are not verdicts.
+REVIEW_VERDICT_RE = re.compile(r'^[\s*_#>`-]*(APPROVED|REJECTED)_(\d+)', re.IGNORECASE | re.MULTILINE)
+
+
+def _parse_verdicts(text: str) -> dict:
+    """Group number -> approved, from the verdict lines in text. Conflicting lines for a group reject it."""
+    verdicts = {}
+    for verdict, number in REVIEW_VERDICT_RE.findall(text):
+        number = int(number)
+        verdicts[number] = verdicts.get(number, True) and verdict.upper() == 'APPROVED'
+    return verdicts
+
+
+async def _read_until_verdict(proc, numbered_verdicts: int) -> bytes:
     """
-    Use Copilot CLI to review changes. Returns (approved, response_text).
-    The invoked agent handles all the AI stuff - no SDK needed.
+    Stream the review line by line and stop the CLI as soon as every one of the
+    `numbered_verdicts` groups has its verdict line, rather than waiting for it to
+    finish explaining. Returns everything read. Only line-leading verdicts count, the
+    same rule _parse_verdicts applies to the result.
     """
-    if not HAS_COPILOT_CLI:
-        return False, "Copilot CLI not available"
-    
+    lines = []
+    seen = set()
+    async for line in proc.stdout:
+        lines.append(line)
+        seen.update(_parse_verdicts(line.decode(errors='replace')))
+        if len(seen) >= numbered_verdicts:
+            if proc.returncode is None:
+                proc.terminate()
+            break
+    await proc.wait()
+    return b''.join(lines)
+
+
+# Per-event-loop review pool: (loop, semaphore); asyncio primitives bind to one loop
+_review_pool = None
+# Start times of recent CLI calls, for the rolling one-minute rate window
+_review_starts = deque()
+
+
+def _review_semaphore() -> asyncio.Semaphore:
+    """The semaphore capping concurrent CLI reviews on the running event loop."""
+    global _review_pool
+    loop = asyncio.get_running_loop()
+    if _review_pool is None or _review_pool[0] is not loop:
+        _review_pool = (loop, asyncio.Semaphore(REVIEW_MAX_CONCURRENCY))
+    return _review_pool[1]
+
+
+async def _wait_for_rate_window():
+    """Sleep until starting another CLI call keeps within REVIEW_RATE_PER_MINUTE."""
+    while True:
+        now = time.monotonic()
+        while _review_starts and now - _review_starts[0] >= 60:
+            _review_starts.popleft()
+        if len(_review_starts) < REVIEW_RATE_PER_MINUTE:
+            _review_starts.append(now)
+            return
+        await asyncio.sleep(60 - (now - _review_starts[0]))
+
+
+async def _copilot_cli_output(prompt: str, numbered_verdicts: int) -> str:
+    """Run the Copilot CLI on a review prompt and return its output, up to the last expected verdict."""
+    # Pooled and rate limited, so batched reviews can't fork unbounded CLI processes
+    # or run into Copilot backend rate limits
+    async with _review_semaphore():
+        await _wait_for_rate_window()
+        return await _run_copilot_cli(prompt, numbered_verdicts)
+
+
+async def _run_copilot_cli(prompt: str, numbered_verdicts: int) -> str:
+    # Awaited, so the event loop keeps running
+    proc = await asyncio.create_subprocess_exec(
+        'copilot', '--model', 'claude-opus-4.5', '-m', prompt,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT
+    )
     try:
-        # Use copilot CLI with the prompt
-        result = subprocess.run(
-            ['copilot', '--model', 'claude-opus-4.5', '-m', prompt],
-            capture_output=True,
-            text=True,
+        output = await asyncio.wait_for(
+            _read_until_verdict(proc, numbered_verdicts),
             timeout=120  # 2 minute timeout for review
         )
-        
-        response = result.stdout + result.stderr
-        
-        # Check for approval in response
-        response_upper = response.upper()
-        if 'APPROVED' in response_upper and 'REJECTED' not in response_upper:
-            return True, response
-        elif 'REJECTED' in response_upper:
-            return False, response
-        else:
-            # Ambiguous - check for positive signals
-            if any(word in response_upper for word in ['SAFE', 'GOOD', 'CORRECT', 'VALID', 'LGTM']):
-                return True, response
-            return False, response
-            
-    except subprocess.TimeoutExpired:
-        return False, "Review timed out"
-    except Exception as e:
-        return False, f"Review failed: {e}"
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return output.decode(errors='replace')
 
 
 async def run_auto_mode(path: str = ".", dry_run: bool = False, skip_review: bool = False):
     """Run steward in automatic mode with AI review gate before commit."""
     print("📚 Copilot Steward - Auto Mode with AI Review Gate")
-    print(f"🔍 Scanning: {os.path.abspath(path)}")
+    _scan_cached.cache_clear()  # fresh scan per run, shared by its passes
+    # Resolved once; everything below is handed the absolute path
+    path = os.path.abspath(path)
+    print(f"🔍 Scanning: {path}")
     print()
     
     # Step 1: Scan for duplicates
@@ -287,7 +406,7 @@ async def run_auto_mode(path: str = ".", dry_run: bool = False, skip_review: boo
     print("🤖 AI REVIEW GATE - Copilot Agent Auditing Changes...")
     print("=" * 60 + "\n")
     
-    if HAS_COPILOT_CLI:
+    if check_copilot_cli():
         approved, review_response = await ai_review_changes(path, merge_result)
         
         print(review_response)
@@ -307,54 +426,122 @@ async def run_auto_mode(path: str = ".", dry_run: bool = False, skip_review: boo
         print("   git add -A && git commit -m '[Steward] Auto-merge duplicates' && git push")
 
 
+async def _git_output(cmd: list, cwd: str, limit: int | None = None, timeout: float = 30) -> str:
+    """Run a git command without blocking the event loop; return the first `limit` bytes of stdout, decoded."""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    # Slice before decoding so only the part used in the prompt is decoded
+    return stdout[:limit].decode(errors='replace')
+
+
+async def _merge_left_tree_clean(abs_path: str) -> bool:
+    """
+    True only if `git status` succeeds and reports nothing besides the steward's own
+    bookkeeping (the manifest, rewritten on every merge, and the backup directory).
+    `git status` rather than `git diff --quiet` so new untracked canonicals still get reviewed.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        'git', 'status', '--porcelain', '--', '.',
+        ':(exclude).steward-manifest.json', f':(exclude){BACKUP_DIR}',
+        cwd=abs_path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=30)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return False
+    return proc.returncode == 0 and not stdout.strip()
+
+
 async def ai_review_changes(path: str, merge_result: dict) -> tuple[bool, str]:
     """
     Use Copilot CLI (invoked agent) to review and audit the merged changes.
-    Returns (approved, response_text).
+    Groups are reviewed REVIEW_BATCH_SIZE to a prompt, batches concurrently;
+    the merge is approved only if every group is. Returns (approved, response_text).
     """
     abs_path = path if os.path.isabs(path) else os.path.abspath(path)
     
-    # Collect the git diff to show what changed
+    # Idempotent merges leave the tree untouched; don't spend an LLM round trip on nothing
+    if await _merge_left_tree_clean(abs_path):
+        return True, 'No diff — auto-approved'
+    
+    merges = merge_result.get('merges', [])
+    batches = [merges[i:i + REVIEW_BATCH_SIZE] for i in range(0, len(merges), REVIEW_BATCH_SIZE)]
+    results = await asyncio.gather(*(ai_review_batch(abs_path, batch, merge_result) for batch in batches))
+    
+    verdicts = [approved for batch_verdicts, _ in results for approved in batch_verdicts]
+    response = '\n\n'.join(batch_response for _, batch_response in results)
+    return bool(verdicts) and all(verdicts), response
+
+
+async def ai_review_batch(abs_path: str, groups: list, merge_result: dict) -> tuple[list, str]:
+    """
+    Review several merge groups in one Copilot CLI call, amortizing its startup and
+    model round-trip across them. Returns (per-group approvals, response_text);
+    a group without a verdict counts as rejected.
+    """
+    if not check_copilot_cli():
+        return [False] * len(groups), "Copilot CLI not available"
+    
+    # Collect the git diff to show what changed - stat and per-group content in parallel.
+    # Limited at the source to the merged canonicals, without context lines, so git
+    # never emits (and we never buffer) unrelated churn or unchanged parts of large JSONs.
+    paths = [m['canonical'] for m in groups]
+    # The stat also lists the removed versioned sources; their content is not needed
+    stat_paths = paths + [os.path.join(os.path.dirname(m['canonical']), source)
+                          for m in groups for source in m['sources']]
+    diff_limit = max(REVIEW_DIFF_LIMIT // len(groups), 400)
     try:
-        diff_result = subprocess.run(
-            ['git', 'diff', '--stat'],
-            cwd=abs_path,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        git_diff_stat = diff_result.stdout[:2000]
-        
-        # Get actual diff content (limited)
-        diff_content_result = subprocess.run(
-            ['git', 'diff', '--no-color'],
-            cwd=abs_path,
-            capture_output=True,
-            text=True,
-            timeout=30
+        # Ask git which canonicals actually changed (cheap, index-only) so only those get a
+        # content diff; -z gives raw names, --relative makes them match our cwd-relative paths
+        changed = set((await _git_output(
+            ['git', 'diff', '--name-only', '--relative', '-z', '--', *paths], abs_path
+        )).split('\0'))
+        changed_paths = [p for p in paths if p in changed]
+        git_diff_stat, *changed_diffs = await asyncio.gather(
+            _git_output(['git', 'diff', '--stat', '--', *stat_paths], abs_path, limit=2000),
+            *(_git_output(['git', '--no-pager', 'diff', '--no-color', '-U0', '--', p], abs_path, limit=diff_limit)
+              for p in changed_paths)
         )
-        git_diff_content = diff_content_result.stdout[:4000]
+        diffs_by_path = dict(zip(changed_paths, changed_diffs))
+        group_diffs = [diffs_by_path.get(p, "(no changes to tracked files)") for p in paths]
     except Exception as e:
         git_diff_stat = f"Could not get diff: {e}"
-        git_diff_content = ""
+        group_diffs = [""] * len(groups)
+    
+    group_sections = "\n\n".join(
+        f"=== GROUP {i} ===\n{_json_dumps_indented(group)}\n\nGit Diff Content (sample):\n{diff}"
+        for i, (group, diff) in enumerate(zip(groups, group_diffs), start=1)
+    )
     
     # Build the review prompt
     review_prompt = f"""You are the AI Review Gate for the Copilot Steward auto-merge system.
 
-AUDIT these file merges and determine if they are SAFE to commit.
+AUDIT these file merges and determine if each is SAFE to commit.
 
 ## Merge Summary
 - Groups merged: {merge_result['merged']}
 - Failed: {merge_result['failed']}
-
-## Files Changed
-{json.dumps(merge_result.get('merges', [])[:15], indent=2)}
+- Groups in this review: {len(groups)}
 
 ## Git Diff Statistics
 {git_diff_stat}
 
-## Git Diff Content (sample)
-{git_diff_content[:2500]}
+## Groups
+{group_sections}
 
 ## Review Checklist
 1. Data Integrity - Arrays should be UNIONED, not replaced
@@ -363,14 +550,22 @@ AUDIT these file merges and determine if they are SAFE to commit.
 4. Proper Deduplication - Exact duplicates removed correctly
 
 ## YOUR VERDICT
-End your response with exactly one of:
-- APPROVED - if merge is safe and correct
-- REJECTED: <reason> - if there are data integrity issues
+End your response with one line per group, numbered as above (1 to {len(groups)}):
+- APPROVED_<n> - if that group's merge is safe and correct
+- REJECTED_<n>: <reason> - if it has data integrity issues
 
 Be concise. Focus on data safety."""
 
     # Use Copilot CLI for review
-    return run_copilot_cli_review(review_prompt)
+    try:
+        response = await _copilot_cli_output(review_prompt, numbered_verdicts=len(groups))
+    except asyncio.TimeoutError:
+        return [False] * len(groups), "Review timed out"
+    except Exception as e:
+        return [False] * len(groups), f"Review failed: {e}"
+    
+    verdicts = _parse_verdicts(response)
+    return [verdicts.get(i, False) for i in range(1, len(groups) + 1)], response
 
 
 async def commit_and_push(path: str, merge_result: dict):
@@ -379,25 +574,38 @@ async def commit_and_push(path: str, merge_result: dict):
     
     try:
         # Stage all changes
-        subprocess.run(['git', 'add', '-A'], cwd=abs_path, check=True)
+        # Output is only wanted on failure: stdout is discarded, stderr kept for the error
+        subprocess.run(
+            ['git', 'add', '-A'],
+            cwd=abs_path,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
         
-        # Create commit message
+        # Create commit message (joined outside the f-string: no backslashes in its expressions before 3.12)
+        merges = merge_result.get('merges', [])
+        merged_files = '\n'.join(f"- {m['canonical']}" for m in merges[:10])
         commit_msg = f"""[Steward] Auto-merge {merge_result['merged']} duplicate file groups
 
 AI Review: APPROVED by Claude Opus 4.5
 
 Merged files:
-{chr(10).join(['- ' + m['canonical'] for m in merge_result.get('merges', [])[:10]])}
-{'... and more' if len(merge_result.get('merges', [])) > 10 else ''}
+{merged_files}
+{'... and more' if len(merges) > 10 else ''}
 
 ---
 Auto-generated by Copilot Steward with AI review gate
 """
         
+        # Message on stdin rather than argv, so its size is never bounded by ARG_MAX
         subprocess.run(
-            ['git', 'commit', '-m', commit_msg],
+            ['git', 'commit', '-F', '-'],
             cwd=abs_path,
-            check=True
+            input=commit_msg.encode('utf-8'),
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
         )
         print("✅ Changes committed")
         
@@ -405,7 +613,8 @@ Auto-generated by Copilot Steward with AI review gate
         result = subprocess.run(
             ['git', 'push'],
             cwd=abs_path,
-            capture_output=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True
         )
         
@@ -417,6 +626,8 @@ Auto-generated by Copilot Steward with AI review gate
             
     except subprocess.CalledProcessError as e:
         print(f"❌ Git operation failed: {e}")
+        if e.stderr:
+            print(f"   {e.stderr.decode(errors='replace').strip()}")
         print("   Changes are staged but not committed/pushed")
 
 
@@ -20,6 +20,19 @@ import logging
 from datetime import datetime
 from pathlib import Path
 
+# orjson (optional) serializes the state file, which grows every cycle, several times faster
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps_indented(data):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps_indented(data):
+        return json.dumps(data, indent=2).encode('utf-8')
+
 # Import the main steward functions
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from copilot_steward import (
@@ -51,12 +64,11 @@ def signal_handler(signum, frame):
 
 def load_state(state_file):
     """Load previous daemon state."""
-    if os.path.exists(state_file):
-        try:
-            with open(state_file, 'r') as f:
-                return json.load(f)
-        except:
-            pass
+    try:
+        with open(state_file, 'rb') as f:
+            return _json_loads(f.read())
+    except (OSError, ValueError):
+        pass
     return {
         'last_run': None,
         'total_merges': 0,
@@ -67,23 +79,22 @@ def load_state(state_file):
 
 
 def save_state(state_file, state):
-    """Save daemon state."""
-    with open(state_file, 'w') as f:
-        json.dump(state, f, indent=2)
+    """Save daemon state atomically (temp file + rename), so a crash mid-write never leaves truncated JSON."""
+    tmp_path = state_file + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_json_dumps_indented(state))
+    os.replace(tmp_path, state_file)
 
 
-def run_steward_cycle(root_path, auto_pr=False, repo='kody-w/CommunityRAPP'):
+def run_steward_cycle(root_path, auto_pr=False, repo='kody-w/CommunityRAPP', scan_cache=None):
     """
     Run a single steward cycle: scan, merge, optionally create PR.
+    `scan_cache` carries directory listings between cycles (see find_versioned_duplicates).
     Returns (merges_count, files_count, pr_url or None)
     """
     logger.info(f"Starting scan cycle for: {root_path}")
     
-    groups = find_versioned_duplicates(root_path)
-    
-    # Filter to actual duplicates
-    duplicate_groups = {k: v for k, v in groups.items() if len(v) > 1 or 
-                       (len(v) == 1 and v[0]['version'] > 0)}
+    duplicate_groups = find_versioned_duplicates(root_path, scan_cache=scan_cache)
     
     if not duplicate_groups:
         logger.info("No duplicates found - repository is clean")
@@ -106,8 +117,8 @@ def run_steward_cycle(root_path, auto_pr=False, repo='kody-w/CommunityRAPP'):
             success_count += 1
             merges.append({
                 'canonical': rel_canonical,
-                'sources': [v['filename'] for v in versions if v['version'] > 0],
-                'strategy': 'union_by_id' if versions[0]['ext'] == '.json' else 'latest_version',
+                'sources': [v.filename for v in versions if v.version > 0],
+                'strategy': 'union_by_id' if versions[0].ext == '.json' else 'latest_version',
                 'timestamp': datetime.utcnow().isoformat() + 'Z'
             })
         else:
@@ -156,13 +167,15 @@ def daemon_loop(root_path, interval=300, auto_pr=False, repo='kody-w/CommunityRA
     logger.info("=" * 60)
     
     cycle_count = 0
+    # Kept across cycles so a quiet tree costs one stat() per directory, not a full re-listing
+    scan_cache = {}
     
     while running:
         cycle_count += 1
         logger.info(f"\n--- Cycle {cycle_count} ---")
         
         try:
-            merges, files, pr_url = run_steward_cycle(root_path, auto_pr, repo)
+            merges, files, pr_url = run_steward_cycle(root_path, auto_pr, repo, scan_cache)
             
             # Update state
             state['last_run'] = datetime.utcnow().isoformat() + 'Z'
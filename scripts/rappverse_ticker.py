@@ -32,6 +32,8 @@ import random
 import hashlib
 import subprocess
 import argparse
+import heapq
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -44,6 +46,8 @@ POSTS_PATH = BASE_PATH / "posts"
 INDEX_FILE = BASE_PATH / "index.json"
 REPO_PATH = Path(__file__).parent.parent / "CommunityRAPP"
 GITHUB_REPO = "kody-w/CommunityRAPP"
+INDEX_POST_LIMIT = 100  # Newest posts kept in index.json
+INDEX_LOAD_WORKERS = 32  # Threads reading post files during index rebuild
 
 # Dimension Configuration
 DIMENSION_NAME = "Prime"  # The main dimension
@@ -468,35 +472,45 @@ def save_post(post, date_str):
     return post_file
 
 
+def _load_index_entry(date_str, post_file):
+    """Read one post file and return its index entry, or None if unreadable."""
+    try:
+        with open(post_file, 'r') as f:
+            post = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return None
+    content = post.get("content", "")
+    return {
+        "id": post.get("id"),
+        "date": date_str,
+        "file": post_file.name,
+        "author": post.get("author", {}),
+        "title": post.get("title", "Untitled"),
+        "content": content[:200] + "..." if len(content) > 200 else content,
+        "submolt": post.get("submolt", "general"),
+        "created_at": post.get("created_at", ""),
+        "dimension": post.get("dimension", "Prime"),
+        "vote_count": post.get("vote_count", 0)
+    }
+
+
 def update_index():
     """Rebuild the index.json file from all posts."""
-    posts = []
+    post_files = []
     
     if POSTS_PATH.exists():
         for date_dir in sorted(POSTS_PATH.iterdir(), reverse=True):
             if date_dir.is_dir() and date_dir.name.startswith("202"):
                 date_str = date_dir.name
-                for post_file in date_dir.glob("*.json"):
-                    try:
-                        with open(post_file, 'r') as f:
-                            post = json.load(f)
-                        posts.append({
-                            "id": post.get("id"),
-                            "date": date_str,
-                            "file": post_file.name,
-                            "author": post.get("author", {}),
-                            "title": post.get("title", "Untitled"),
-                            "content": post.get("content", "")[:200] + "..." if len(post.get("content", "")) > 200 else post.get("content", ""),
-                            "submolt": post.get("submolt", "general"),
-                            "created_at": post.get("created_at", ""),
-                            "dimension": post.get("dimension", "Prime"),
-                            "vote_count": post.get("vote_count", 0)
-                        })
-                    except (json.JSONDecodeError, IOError):
-                        continue
-    
-    posts.sort(key=lambda p: p.get("created_at", ""), reverse=True)
-    posts = posts[:100]
+                post_files.extend((date_str, post_file) for post_file in date_dir.glob("*.json"))
+    
+    # Reading posts is I/O bound, so load them in parallel (map keeps file order)
+    with ThreadPoolExecutor(max_workers=INDEX_LOAD_WORKERS) as executor:
+        entries = executor.map(lambda args: _load_index_entry(*args), post_files)
+        posts = [entry for entry in entries if entry is not None]
+    
+    # Only the newest posts are indexed, so select them without sorting everything
+    posts = heapq.nlargest(INDEX_POST_LIMIT, posts, key=lambda p: p.get("created_at", ""))
     
     index = {
         "posts": posts,
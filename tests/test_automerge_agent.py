@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Tests for the Automerge Agent
+
+Tests cover:
+1. Webhook signature verification
+2. Webhook payload to PR conversion
+3. Mergeability re-query for webhook-delivered PRs (mocked)
+4. Merge retries after losing a base-branch race (mocked)
+
+Usage:
+    python3 tests/test_automerge_agent.py
+    python3 tests/test_automerge_agent.py -v  # verbose
+"""
+
+import hashlib
+import hmac
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add scripts to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the module under test
+from scripts import automerge_agent
+from scripts.automerge_agent import (
+    pr_from_webhook,
+    resolve_mergeability,
+    verify_signature
+)
+
+
+def make_payload(mergeable=None, head_repo="kody-w/CommunityRAPP", base_repo="kody-w/CommunityRAPP"):
+    """A minimal pull_request webhook payload."""
+    return {
+        "action": "opened",
+        "pull_request": {
+            "number": 42,
+            "title": "🌍 World Evolution: tick 7",
+            "state": "open",
+            "mergeable": mergeable,
+            "head": {"ref": "evolution/tick-7", "repo": {"full_name": head_repo}},
+            "base": {"ref": "main", "repo": {"full_name": base_repo}},
+        },
+    }
+
+
+class TestVerifySignature(unittest.TestCase):
+    """Test X-Hub-Signature-256 verification."""
+
+    def setUp(self):
+        self.secret = "s3cret"
+        self.body = b'{"action": "opened"}'
+        self.signature = "sha256=" + hmac.new(self.secret.encode(), self.body, hashlib.sha256).hexdigest()
+
+    def test_valid_signature(self):
+        """A signature made with the shared secret is accepted."""
+        self.assertTrue(verify_signature(self.secret, self.body, self.signature))
+
+    def test_wrong_secret(self):
+        """A signature made with another secret is rejected."""
+        self.assertFalse(verify_signature("other", self.body, self.signature))
+
+    def test_tampered_body(self):
+        """A body changed after signing is rejected."""
+        self.assertFalse(verify_signature(self.secret, self.body + b" ", self.signature))
+
+    def test_missing_signature(self):
+        """Deliveries without the header are rejected."""
+        self.assertFalse(verify_signature(self.secret, self.body, None))
+
+
+class TestPrFromWebhook(unittest.TestCase):
+    """Test conversion of webhook payloads to the GraphQL PR shape."""
+
+    def test_same_repo_pr(self):
+        """Fields map to the names process_pr reads."""
+        pr = pr_from_webhook(make_payload(mergeable=True))
+        self.assertEqual(pr["number"], 42)
+        self.assertEqual(pr["state"], "OPEN")
+        self.assertEqual(pr["mergeable"], "MERGEABLE")
+        self.assertEqual(pr["headRefName"], "evolution/tick-7")
+        self.assertEqual(pr["baseRefName"], "main")
+        self.assertFalse(pr["isCrossRepository"])
+
+    def test_conflicting_pr(self):
+        """mergeable: false means the PR conflicts."""
+        self.assertEqual(pr_from_webhook(make_payload(mergeable=False))["mergeable"], "CONFLICTING")
+
+    def test_null_mergeable_is_unknown(self):
+        """GitHub sends null while it is still computing mergeability."""
+        self.assertEqual(pr_from_webhook(make_payload(mergeable=None))["mergeable"], "UNKNOWN")
+
+    def test_cross_repo_pr(self):
+        """A PR from a fork is cross-repository, so its branch is never deleted."""
+        pr = pr_from_webhook(make_payload(mergeable=True, head_repo="someone/CommunityRAPP"))
+        self.assertTrue(pr["isCrossRepository"])
+
+    def test_missing_pull_request(self):
+        """A payload without pull_request doesn't raise."""
+        pr = pr_from_webhook({})
+        self.assertIsNone(pr["number"])
+        self.assertEqual(pr["mergeable"], "UNKNOWN")
+
+
+class TestResolveMergeability(unittest.TestCase):
+    """Test the mergeability re-query for delivered PRs (mocked GraphQL)."""
+
+    def setUp(self):
+        self.pr = pr_from_webhook(make_payload(mergeable=None))
+        sleep_patcher = patch.object(automerge_agent.time, "sleep")
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def test_retries_until_known(self):
+        """UNKNOWN answers are retried; the first known state is used."""
+        answers = [dict(self.pr, mergeable="UNKNOWN"), dict(self.pr, mergeable="MERGEABLE")]
+        with patch.object(automerge_agent, "_query_pr", side_effect=answers) as query:
+            pr = resolve_mergeability("kody-w/CommunityRAPP", self.pr)
+        self.assertEqual(pr["mergeable"], "MERGEABLE")
+        self.assertEqual(query.call_count, 2)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_gives_up_while_unknown(self):
+        """After MERGEABILITY_ATTEMPTS the PR is left UNKNOWN for the reconcile poll."""
+        with patch.object(automerge_agent, "_query_pr", return_value=dict(self.pr, mergeable="UNKNOWN")) as query:
+            pr = resolve_mergeability("kody-w/CommunityRAPP", self.pr)
+        self.assertEqual(pr["mergeable"], "UNKNOWN")
+        self.assertEqual(query.call_count, automerge_agent.MERGEABILITY_ATTEMPTS)
+
+    def test_query_error_keeps_payload(self):
+        """A failing query falls back to the delivered PR."""
+        with patch.object(automerge_agent, "_query_pr", return_value=None):
+            pr = resolve_mergeability("kody-w/CommunityRAPP", self.pr)
+        self.assertEqual(pr, self.pr)
+
+
+class TestMergeRetry(unittest.TestCase):
+    """Test squash merges retried on 405 Base branch was modified (mocked REST session)."""
+
+    def setUp(self):
+        self.session = MagicMock()
+        session_patcher = patch.object(automerge_agent, "get_github_session", return_value=self.session)
+        session_patcher.start()
+        self.addCleanup(session_patcher.stop)
+        sleep_patcher = patch.object(automerge_agent.time, "sleep")
+        sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    @staticmethod
+    def response(status_code, text=""):
+        return MagicMock(status_code=status_code, text=text)
+
+    def test_retries_after_base_branch_race(self):
+        """A merge that lost the race is tried again and succeeds."""
+        self.session.put.side_effect = [
+            self.response(405, '{"message": "Base branch was modified. Review and try the merge again."}'),
+            self.response(200),
+        ]
+        self.assertTrue(automerge_agent.merge_pr("kody-w/CommunityRAPP", 42))
+        self.assertEqual(self.session.put.call_count, 2)
+
+    def test_other_405_is_not_retried(self):
+        """A PR that is simply not mergeable fails without retries."""
+        self.session.put.return_value = self.response(405, '{"message": "Pull Request is not mergeable"}')
+        self.assertFalse(automerge_agent.merge_pr("kody-w/CommunityRAPP", 42))
+        self.assertEqual(self.session.put.call_count, 1)
+
+    def test_gives_up_after_retries(self):
+        """A base branch that keeps moving stops after MERGE_BASE_MODIFIED_RETRIES retries."""
+        self.session.put.return_value = self.response(405, "Base branch was modified.")
+        self.assertFalse(automerge_agent.merge_pr("kody-w/CommunityRAPP", 42))
+        self.assertEqual(self.session.put.call_count, automerge_agent.MERGE_BASE_MODIFIED_RETRIES + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for the Copilot Steward's duplicate scan cache
+
+Tests cover:
+1. Re-listing only directories whose mtime changed
+2. Cache file placement outside the scanned tree
+3. Scan-only runs leaving the cache file alone
+4. In-memory cache reuse across daemon cycles
+5. Streaming JSON array merges, including files that break off mid-stream
+
+Usage:
+    python3 tests/test_copilot_steward.py
+    python3 tests/test_copilot_steward.py -v  # verbose
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add scripts to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the module under test
+from scripts import copilot_steward
+from scripts.copilot_steward import find_versioned_duplicates, merge_file_group
+
+
+def write(path, text="[]"):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def bump_mtime(path):
+    """Move a directory's mtime forward, as adding/removing an entry does (without relying on timestamp granularity)."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+class TestScanCache(unittest.TestCase):
+    """Test the mtime-keyed per-directory scan cache."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.temp_dir, "repo")
+        self.sub = os.path.join(self.root, "state")
+        os.makedirs(self.sub)
+        write(os.path.join(self.root, "world.json"))
+        write(os.path.join(self.root, "world 2.json"))
+
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        self.patcher = patch.object(copilot_steward, "SCAN_CACHE_DIR", self.cache_dir)
+        self.patcher.start()
+
+        real_scandir = os.scandir
+        self.listed = []
+
+        def counting_scandir(path):
+            self.listed.append(path)
+            return real_scandir(path)
+
+        self.scandir_patcher = patch.object(copilot_steward.os, "scandir", counting_scandir)
+        self.scandir_patcher.start()
+
+    def tearDown(self):
+        self.scandir_patcher.stop()
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def scan(self, **kwargs):
+        self.listed.clear()
+        groups = find_versioned_duplicates(self.root, **kwargs)
+        return {canonical: [v.version for v in versions] for (_, canonical), versions in groups.items()}
+
+    def test_unchanged_tree_is_not_relisted(self):
+        """A second scan of an unchanged tree reuses every listing."""
+        self.assertEqual(self.scan(), {"world.json": [0, 2]})
+        self.assertEqual(sorted(self.listed), sorted([self.root, self.sub]))
+        self.assertEqual(self.scan(), {"world.json": [0, 2]})
+        self.assertEqual(self.listed, [])
+
+    def test_changed_directory_is_relisted(self):
+        """A directory whose mtime moved is listed again and its new duplicates found."""
+        self.scan()
+        write(os.path.join(self.sub, "posts.json"))
+        write(os.path.join(self.sub, "posts 3.json"))
+        bump_mtime(self.sub)
+
+        self.assertEqual(self.scan(), {"world.json": [0, 2], "posts.json": [0, 3]})
+        self.assertEqual(self.listed, [self.sub])
+
+    def test_removed_duplicate_is_forgotten(self):
+        """Deleting a versioned file invalidates its directory's cached names."""
+        self.scan()
+        os.remove(os.path.join(self.root, "world 2.json"))
+        bump_mtime(self.root)
+        self.assertEqual(self.scan(), {})
+
+    def test_cache_file_lives_outside_the_tree(self):
+        """The cache is written to SCAN_CACHE_DIR, never into the scanned tree."""
+        self.scan()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.root, copilot_steward.BACKUP_DIR)))
+
+    def test_scan_only_run_writes_no_cache(self):
+        """save_cache=False reads the cache but never writes the file."""
+        self.scan(save_cache=False)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_use_cache_false_always_lists(self):
+        """Without the cache every directory is listed on every scan."""
+        self.scan(use_cache=False)
+        self.scan(use_cache=False)
+        self.assertEqual(sorted(self.listed), sorted([self.root, self.sub]))
+
+    def test_in_memory_cache_across_cycles(self):
+        """A caller-held scan_cache skips the cache file and is updated in place."""
+        scan_cache = {}
+        self.scan(scan_cache=scan_cache)
+        self.assertEqual(set(scan_cache), {self.root, self.sub})
+
+        with patch.object(copilot_steward, "_load_scan_cache") as load:
+            self.scan(scan_cache=scan_cache)
+        load.assert_not_called()
+        self.assertEqual(self.listed, [])
+
+        write(os.path.join(self.sub, "notes 1.md"), "v1")
+        bump_mtime(self.sub)
+        self.assertEqual(self.scan(scan_cache=scan_cache), {"world.json": [0, 2], "notes.md": [1]})
+        self.assertIn("notes 1.md", scan_cache[self.sub][1])
+
+
+@unittest.skipIf(copilot_steward.ijson is None, "ijson not installed")
+class TestStreamingArrayMerge(unittest.TestCase):
+    """Test merging top-level JSON arrays item by item with ijson."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def merge_versions(self, *contents):
+        """Write posts.json, posts 1.json, ... and merge them; return merge_file_group's result."""
+        for n, text in enumerate(contents):
+            write(os.path.join(self.root, "posts.json" if n == 0 else f"posts {n}.json"), text)
+        (versions,) = find_versioned_duplicates(self.root, use_cache=False).values()
+        return merge_file_group(versions, root_path=self.root)
+
+    def merge(self, *contents):
+        """Merge the versions; return (success, merged data)."""
+        success, _, canonical_path = self.merge_versions(*contents)
+        with open(canonical_path) as f:
+            return success, json.load(f)
+
+    def test_items_are_unioned_by_id(self):
+        """Duplicate IDs collapse to the higher tick; new IDs are added."""
+        success, merged = self.merge(
+            json.dumps([{"id": "a", "tick": 1}, {"id": "b", "tick": 1}]),
+            json.dumps([{"id": "a", "tick": 2}, {"id": "c", "tick": 1}]),
+        )
+        self.assertTrue(success)
+        self.assertEqual(merged, [{"id": "a", "tick": 2}, {"id": "b", "tick": 1}, {"id": "c", "tick": 1}])
+
+    def test_truncated_file_contributes_nothing(self):
+        """Items folded before a file breaks off are rolled back, including replacements."""
+        success, merged = self.merge(
+            json.dumps([{"id": "a", "tick": 1}]),
+            '[{"id": "a", "tick": 5}, {"id": "z", "tick": 1}, {"id": ',
+            json.dumps([{"id": "b", "tick": 1}]),
+        )
+        self.assertTrue(success)
+        self.assertEqual(merged, [{"id": "a", "tick": 1}, {"id": "b", "tick": 1}])
+
+    def test_non_array_version_fails_the_group(self):
+        """A valid object among array versions leaves every file in place."""
+        success, _, _ = self.merge_versions("[1, 2]", '{"id": "a"}')
+        self.assertFalse(success)
+        self.assertTrue(os.path.exists(os.path.join(self.root, "posts 1.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
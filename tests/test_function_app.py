@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Tests for conversation history budgeting in function_app
+
+Tests cover:
+1. Grouping assistant tool/function calls with their replies
+2. Trimming history to the token budget without splitting groups
+3. Eviction order: lowest importance per token first, oldest first on ties
+4. Shared agent set with a bounded per-GUID cache (mocked storage)
+5. Context memory cache size cap and expiry
+6. Validation of client-supplied demo state
+7. Incremental summaries of dropped history (mocked model)
+
+Usage:
+    python3 tests/test_function_app.py
+    python3 tests/test_function_app.py -v  # verbose
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add repo root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import the module under test
+import function_app
+from function_app import (
+    HISTORY_KEEP_RECENT_GROUPS,
+    VOICE_DELIMITER,
+    _classify_importance,
+    _count_message_tokens,
+    _fit_history_to_budget,
+    _group_messages,
+    get_agents
+)
+
+
+def user(text):
+    return {"role": "user", "content": text}
+
+
+def assistant(text):
+    return {"role": "assistant", "content": text}
+
+
+def tool_call_turn(call_id, *reply_ids):
+    """An assistant message calling tools, followed by one tool reply per id."""
+    ids = (call_id,) + reply_ids
+    return [
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {"id": i, "type": "function", "function": {"name": "ManageMemory", "arguments": "{}"}}
+                for i in ids
+            ],
+        },
+        *({"role": "tool", "tool_call_id": i, "content": f"result for {i}"} for i in ids),
+    ]
+
+
+def total_tokens(messages):
+    return sum(_count_message_tokens(message) for message in messages)
+
+
+def assert_tool_replies_paired(test, messages):
+    """Every tool reply follows the assistant message that called it, and no call lost its reply."""
+    open_calls = set()
+    for message in messages:
+        if message.get("role") == "tool":
+            test.assertIn(message["tool_call_id"], open_calls, "tool reply without its assistant tool_calls")
+            open_calls.discard(message["tool_call_id"])
+        else:
+            test.assertFalse(open_calls, "assistant tool_calls separated from their tool replies")
+            open_calls = {call["id"] for call in message.get("tool_calls") or ()}
+    test.assertFalse(open_calls, "assistant tool_calls separated from their tool replies")
+
+
+class TestGroupMessages(unittest.TestCase):
+    """Test splitting history into keep-or-drop-together groups."""
+
+    def test_plain_messages_are_single_groups(self):
+        """Messages without tool traffic each form their own group."""
+        messages = [user("hi"), assistant("hello"), user("bye")]
+        self.assertEqual(_group_messages(messages), [[m] for m in messages])
+
+    def test_tool_calls_group_with_their_replies(self):
+        """An assistant tool_calls message and all its tool replies are one group."""
+        turn = tool_call_turn("call_1", "call_2")
+        groups = _group_messages([user("remember this")] + turn + [assistant("done")])
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(groups[1], turn)
+
+    def test_unrelated_tool_reply_starts_a_group(self):
+        """A tool reply for an id the previous assistant never called is not folded into it."""
+        turn = tool_call_turn("call_1")
+        stray = {"role": "tool", "tool_call_id": "call_9", "content": "?"}
+        groups = _group_messages(turn + [stray])
+        self.assertEqual(groups, [turn, [stray]])
+
+    def test_legacy_function_call_groups_with_function_reply(self):
+        """The legacy function_call format groups the same way."""
+        call = {"role": "assistant", "content": None, "function_call": {"name": "ManageMemory", "arguments": "{}"}}
+        reply = {"role": "function", "name": "ManageMemory", "content": "ok"}
+        self.assertEqual(_group_messages([call, reply, user("next")]), [[call, reply], [user("next")]])
+
+
+class TestFitHistoryToBudget(unittest.TestCase):
+    """Test trimming history to the token budget."""
+
+    def setUp(self):
+        # First message, then alternating plain and tool-call turns, then a protected tail
+        self.history = [user("my project is called Atlas " * 5)]
+        for turn in range(12):
+            self.history.append(user(f"question {turn} " * 20))
+            self.history.extend(tool_call_turn(f"call_{turn}a", f"call_{turn}b"))
+            self.history.append(assistant(f"answer {turn} " * 20))
+
+    def test_under_budget_is_unchanged(self):
+        """History that fits is returned as-is with nothing dropped."""
+        kept, dropped, history_tokens = _fit_history_to_budget(self.history, budget=10**9)
+        self.assertIs(kept, self.history)
+        self.assertEqual(dropped, [])
+        self.assertEqual(history_tokens, total_tokens(self.history))
+
+    def test_trimmed_history_fits_budget(self):
+        """Kept messages fit within the budget when enough history is droppable."""
+        budget = total_tokens(self.history) // 3
+        kept, dropped, history_tokens = _fit_history_to_budget(self.history, budget=budget)
+        self.assertLessEqual(total_tokens(kept), budget)
+        self.assertTrue(dropped)
+        self.assertEqual(history_tokens, total_tokens(self.history))
+        self.assertEqual(len(kept) + len(dropped), len(self.history))
+
+    def test_tool_calls_stay_with_their_replies(self):
+        """Trimming never keeps a tool_calls message without its replies, or the reverse."""
+        for divisor in (2, 3, 5, 10):
+            kept, dropped, _ = _fit_history_to_budget(self.history, budget=total_tokens(self.history) // divisor)
+            assert_tool_replies_paired(self, kept)
+            assert_tool_replies_paired(self, dropped)
+
+    def test_first_and_recent_groups_are_kept(self):
+        """The first group and the last HISTORY_KEEP_RECENT_GROUPS groups survive any budget."""
+        groups = _group_messages(self.history)
+        kept, _, _ = _fit_history_to_budget(self.history, budget=1)
+        protected = groups[0] + [m for group in groups[-HISTORY_KEEP_RECENT_GROUPS:] for m in group]
+        self.assertEqual(kept, protected)
+
+
+class TestEvictionOrder(unittest.TestCase):
+    """Test which groups _fit_history_to_budget drops first."""
+
+    def setUp(self):
+        self.tail = [user(f"recent {i}") for i in range(HISTORY_KEEP_RECENT_GROUPS)]
+
+    def fit_dropping_one(self, middle):
+        """Trim [first] + middle + tail to just under its size, so exactly one middle group must go."""
+        history = [user("first")] + middle + self.tail
+        kept, dropped, _ = _fit_history_to_budget(history, budget=total_tokens(history) - 1)
+        return kept, dropped
+
+    def test_importance_ranks_tool_traffic_highest(self):
+        """Tool traffic outranks full assistant replies, which outrank plain messages."""
+        call, reply = tool_call_turn("call_1")
+        full_reply = assistant(f"Done.{VOICE_DELIMITER}Done.")
+        self.assertEqual(_classify_importance(call), _classify_importance(reply))
+        self.assertGreater(_classify_importance(reply), _classify_importance(full_reply))
+        self.assertGreater(_classify_importance(full_reply), _classify_importance(user("hi")))
+
+    def test_plain_message_dropped_before_tool_group(self):
+        """A plain message goes before a tool group of similar size."""
+        turn = tool_call_turn("call_1")
+        filler = user("x " * (total_tokens(turn) // 2 + 1))
+        kept, dropped = self.fit_dropping_one(turn + [filler])
+        self.assertEqual(dropped, [filler])
+        self.assertTrue(all(message in kept for message in turn))
+
+    def test_full_reply_outlives_plain_reply(self):
+        """An assistant reply with a voice part is kept over a plain one of the same length."""
+        full_reply = assistant("words " * 30 + VOICE_DELIMITER + "short")
+        plain_reply = assistant("words " * 30 + "_" * len(VOICE_DELIMITER) + "short")
+        kept, dropped = self.fit_dropping_one([full_reply, plain_reply])
+        self.assertEqual(dropped, [plain_reply])
+        self.assertIn(full_reply, kept)
+
+    def test_oldest_dropped_first_on_ties(self):
+        """Groups with equal value per token are dropped oldest first."""
+        older, newer = user("same size a"), user("same size b")
+        kept, dropped = self.fit_dropping_one([older, newer])
+        self.assertEqual(dropped, [older])
+        self.assertIn(newer, kept)
+
+
+class TestGetAgents(unittest.TestCase):
+    """Test the shared agent set and the per-GUID enabled-agents cache (mocked storage)."""
+
+    def setUp(self):
+        self.agents = {
+            "Local": SimpleNamespace(),
+            "Weather": SimpleNamespace(_agent_file="weather_agent.py"),
+            "Sales": SimpleNamespace(_agent_file="sales_agent.py"),
+        }
+        function_app._clear_agents_cache()
+        self.addCleanup(function_app._clear_agents_cache)
+        load_patcher = patch.object(function_app, "load_agents_from_folder", return_value=self.agents)
+        self.load = load_patcher.start()
+        self.addCleanup(load_patcher.stop)
+        enabled_patcher = patch.object(
+            function_app, "load_user_specific_agents", return_value=frozenset(["weather_agent.py"])
+        )
+        self.load_enabled = enabled_patcher.start()
+        self.addCleanup(enabled_patcher.stop)
+
+    @staticmethod
+    def guid(n):
+        return f"{n:08x}-0000-4000-8000-000000000000"
+
+    def test_agents_load_once_for_every_guid(self):
+        """Every GUID filters the one shared agent set; local agents are always enabled."""
+        self.assertEqual(set(get_agents(self.guid(1))), {"Local", "Weather"})
+        self.assertEqual(set(get_agents(self.guid(2))), {"Local", "Weather"})
+        self.assertEqual(self.load.call_count, 1)
+
+    def test_guid_delta_is_cached(self):
+        """A repeated GUID reuses its filtered set without reading its config again."""
+        first = get_agents(self.guid(1))
+        self.assertIs(get_agents(self.guid(1)), first)
+        self.assertEqual(self.load_enabled.call_count, 1)
+
+    def test_non_guid_gets_every_agent(self):
+        """Arbitrary user_guid values never reach storage or the cache."""
+        for user_guid in (None, "", "../../agents", {"not": "hashable"}):
+            self.assertIs(get_agents(user_guid), self.agents)
+        self.load_enabled.assert_not_called()
+        self.assertFalse(function_app._user_agents_cache)
+
+    def test_guid_cache_is_capped(self):
+        """The per-GUID cache never grows past USER_AGENT_CACHE_SIZE, dropping the least recent."""
+        with patch.object(function_app, "USER_AGENT_CACHE_SIZE", 3):
+            for n in range(10):
+                get_agents(self.guid(n))
+        self.assertEqual(list(function_app._user_agents_cache), [self.guid(n) for n in (7, 8, 9)])
+
+
+class TestMemoryCache(unittest.TestCase):
+    """Test the bounded context memory cache."""
+
+    def setUp(self):
+        function_app._memory_cache.clear()
+        self.addCleanup(function_app._memory_cache.clear)
+
+    def test_cache_is_capped(self):
+        """At most MEMORY_CACHE_SIZE GUIDs are kept, oldest dropped first."""
+        with patch.object(function_app, "MEMORY_CACHE_SIZE", 3):
+            for n in range(10):
+                function_app._cache_memory(f"guid-{n}", "shared", "user")
+        self.assertEqual(list(function_app._memory_cache), ["guid-7", "guid-8", "guid-9"])
+
+    def test_expired_entries_are_dropped(self):
+        """Entries older than MEMORY_CACHE_TTL_SECONDS are removed when another is stored."""
+        with patch.object(function_app.time, "monotonic", return_value=1000.0):
+            function_app._cache_memory("old", "shared", "user")
+        later = 1000.0 + function_app.MEMORY_CACHE_TTL_SECONDS
+        with patch.object(function_app.time, "monotonic", return_value=later):
+            function_app._cache_memory("new", "shared", "user")
+        self.assertEqual(list(function_app._memory_cache), ["new"])
+
+
+class TestClientDemoState(unittest.TestCase):
+    """Test that an echoed-back demo_state only selects indexed demos and in-range steps."""
+
+    def setUp(self):
+        self.steps = [{"step": 1}, {"step": 2}, {"step": 3}]
+        self.assistant = function_app.Assistant.__new__(function_app.Assistant)
+        self.assistant.storage_manager = MagicMock()
+        self.assistant._get_demo_index = MagicMock(return_value={"Tour": {"conversation_flow": self.steps}})
+
+    def extract(self, demo_state, history=()):
+        return self.assistant._extract_demo_state_from_history(list(history), demo_state)
+
+    def test_indexed_demo_is_used(self):
+        """A known demo and in-range step are returned as sent."""
+        self.assertEqual(self.extract({"active_demo": "Tour", "step": 2}), ("Tour", 2, self.steps))
+
+    def test_step_is_clamped(self):
+        """Out-of-range steps are clamped to 0..len(demo_steps)."""
+        self.assertEqual(self.extract({"active_demo": "Tour", "step": -5})[1], 0)
+        self.assertEqual(self.extract({"active_demo": "Tour", "step": 99})[1], len(self.steps))
+
+    def test_unknown_demo_never_reads_storage(self):
+        """A name outside the index falls back to the history without touching storage."""
+        history = [{"role": "system", "content": f"Step 1 of 3 {function_app._demo_state_sentinel('Tour', 1, 3)}"}]
+        self.assertEqual(self.extract({"active_demo": "../secrets", "step": 1}), (None, 0, None))
+        self.assertEqual(self.extract({"active_demo": ["Tour"], "step": 1}, history), ("Tour", 1, self.steps))
+        self.assistant.storage_manager.read_file.assert_not_called()
+
+
+class TestCompactHistory(unittest.TestCase):
+    """Test that dropped history is summarized incrementally (mocked model)."""
+
+    def setUp(self):
+        function_app._history_summary_cache.clear()
+        self.addCleanup(function_app._history_summary_cache.clear)
+        self.assistant = function_app.Assistant.__new__(function_app.Assistant)
+        self.create = AsyncMock(side_effect=self.reply)
+        self.assistant.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.create)))
+
+    @staticmethod
+    async def reply(**request):
+        summary = f"summary #{len(request['messages'][1]['content'])}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=summary))])
+
+    def compact(self, messages):
+        return asyncio.run(self.assistant._compact_history(messages))
+
+    def sent_transcript(self):
+        return self.create.call_args.kwargs["messages"][1]["content"]
+
+    def test_new_messages_fold_into_previous_summary(self):
+        """A grown dropped set sends only the previous summary and the new messages."""
+        dropped = [user(f"old {i}") for i in range(5)]
+        first = self.compact(dropped)
+        second = self.compact(dropped + [user("new 1"), user("new 2")])
+
+        self.assertEqual(self.create.call_count, 2)
+        transcript = self.sent_transcript()
+        self.assertIn(first, transcript)
+        self.assertIn("user: new 1", transcript)
+        self.assertNotIn("old 0", transcript)
+        self.assertNotEqual(first, second)
+
+    def test_unchanged_dropped_set_reuses_summary(self):
+        """The same dropped messages make no second model call."""
+        dropped = [user("a"), user("b")]
+        self.assertEqual(self.compact(dropped), self.compact(dropped))
+        self.assertEqual(self.create.call_count, 1)
+
+    def test_changed_prefix_is_summarized_in_full(self):
+        """Without a cached prefix every dropped message is sent."""
+        self.compact([user("a"), user("b")])
+        self.compact([user("x"), user("b")])
+        self.assertEqual(self.sent_transcript(), "user: x\nuser: b")
+
+    def test_failed_fold_keeps_prefix_summary(self):
+        """If the fold call fails, the summary of the cached prefix is still used."""
+        first = self.compact([user("a")])
+        self.create.side_effect = RuntimeError("unavailable")
+        self.assertEqual(self.compact([user("a"), user("b")]), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
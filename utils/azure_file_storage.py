@@ -41,6 +41,12 @@ from azure.storage.fileshare import ShareServiceClient, ShareFileClient, ShareDi
 from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
 from azure.core.exceptions import ResourceNotFoundError, ResourceExistsError, AzureError
 
+# orjson (optional) parses tool arguments and stored JSON several times faster than stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def safe_json_loads(json_str):
     """
@@ -51,6 +57,11 @@ def safe_json_loads(json_str):
     try:
         if isinstance(json_str, (dict, list)):
             return json_str
+        if orjson is not None:
+            try:
+                return orjson.loads(json_str)
+            except orjson.JSONDecodeError:
+                pass  # stdlib json also accepts NaN/Infinity, which orjson rejects
         return json.loads(json_str)
     except json.JSONDecodeError:
         return {"error": f"Invalid JSON: {json_str}"}
@@ -128,6 +128,7 @@ class APIError:
     message: str
     status_code: Optional[int] = None
     retryable: bool = False
+    retry_after: Optional[float] = None  # Seconds to wait, from the Retry-After header
 
     def __str__(self) -> str:
         code = f" ({self.status_code})" if self.status_code else ""